@@ -3,13 +3,20 @@
 # ================================
 
 import os, re, glob, pandas as pd, numpy as np
-from bs4 import BeautifulSoup
+from collections import Counter
 from io import StringIO
 import json
 
+from signal_history import (SIGNAL_HISTORY, HTML_TO_HISTORY, NUMERIC_HISTORY, PROBA_CANDIDATES,
+                            file_sha1, report_day, standard_column, to_float)
+from signal_eval import evaluate_won
+from calibration_artifact import ARTIFACT_VERSION, build_artifact, write_artifact
+from threshold_opt import best_threshold, curve_panel_html, curves_frame, find_optimal_threshold, threshold_curve
+
 BASE_DIR = os.path.dirname(__file__)
 RAPPORTS_DIR = os.path.join(BASE_DIR, "rapports_quotidiens")
 OUT_HTML = os.path.join(BASE_DIR, "analyse_globale_footbot.html")
+OUT_ARTIFACT = os.getenv("FOOTBOT_CALIBRATION_PATH", os.path.join(BASE_DIR, "analyse_globale_footbot.json"))
 
 def extract_float(txt):
     try:
@@ -31,17 +38,12 @@ def pick_numeric_col(df, candidates):
     return None
 
 # ----------------------------------------------------------
-# 1) Read all reports
+# 1) Read all reports (historique SQLite : seuls les rapports nouveaux / modifiés sont relus)
 # ----------------------------------------------------------
-html_files = sorted(glob.glob(os.path.join(RAPPORTS_DIR, "FootBot — Profil Volume — *.html")))
-if not html_files:
-    print("⚠️ Aucun rapport trouvé dans 'rapports_quotidiens'.")
-    raise SystemExit()
-
-print(f"📊 {len(html_files)} rapports trouvés → analyse en cours...")
+def read_report_table(path):
+    """Relit le tableau des signaux d'un rapport HTML → (DataFrame standardisé ou None, taux global)."""
+    from bs4 import BeautifulSoup   # import coûteux : seulement si un rapport doit être relu
 
-all_rows = []
-for path in html_files:
     with open(path, encoding="utf-8") as f:
         html = f.read()
 
@@ -55,51 +57,69 @@ for path in html_files:
     # main table (by id or class)
     main_table = soup.find("table", {"id": "signalsTable"}) or soup.find("table", {"class": "signals"})
     if not main_table:
-        continue
+        return None, taux_global
 
     try:
         df = pd.read_html(StringIO(str(main_table)))[0]
 
-        # ---- Standardize headers
-        rename = {}
-        for c in df.columns:
-            lc = str(c).strip().lower()
-            if "type" in lc:
-                rename[c] = "Type"
-            elif "ligue" in lc or "league" in lc:
-                rename[c] = "Ligue"
-            elif "prob" in lc:           # "Probabilité"
-                rename[c] = "Probabilite"
-            elif lc == "ic":
-                # In your HTML, the "IC" column is LABEL text ("IC"), not a number.
-                # We'll rename it to "IC_label" to avoid confusion.
-                rename[c] = "IC_label"
-            elif "résultat" in lc or "result" in lc:
-                rename[c] = "Resultat"
-
-        df = df.rename(columns=rename)
+        # ---- Standardize headers (Type, Ligue, Probabilite, IC_label, Resultat)
+        df = df.rename(columns=standard_column)
 
         # ---- Build a real numeric "IC" column from whichever is numeric:
         # Prefer Probabilite; otherwise fallback to a truly numeric "IC" if present
-        proba_col = pick_numeric_col(df, ["Probabilite", "IC", "Proba", "Confidence", "Score"])
+        proba_col = pick_numeric_col(df, PROBA_CANDIDATES)
         if proba_col is None:
             # no numeric signal in this table → skip it
-            continue
+            return None, taux_global
 
         df["IC"] = pd.to_numeric(df[proba_col].astype(str).str.replace("%","").str.replace(",","."), errors="coerce")
-
-        # Keep essentials
-        df["source_file"] = os.path.basename(path)
-        df["taux_global"] = taux_global
-        all_rows.append(df)
+        return df, taux_global
     except Exception:
-        continue
+        return None, taux_global
+
+
+def ingest_report(path):
+    """
+    Met signal_history à jour pour un rapport : 'skip' (taille + mtime inchangés),
+    'attach' (même hash que les lignes écrites par build_html), 'parsed' (relu).
+    """
+    day, name, st = report_day(path), os.path.basename(path), os.stat(path)
+    rec = SIGNAL_HISTORY.report(day)
+    if rec and (rec["file_name"], rec["file_size"], rec["file_mtime"]) == (name, st.st_size, st.st_mtime_ns):
+        return "skip"
+    sha1 = file_sha1(path)
+    if rec and rec["sha1"] == sha1:
+        SIGNAL_HISTORY.attach_file(day, name, st.st_size, st.st_mtime_ns)
+        return "attach"
+
+    table, taux_global = read_report_table(path)
+    rows = []
+    if table is not None and "Type" in table.columns:
+        # mêmes lignes que celles gardées au nettoyage (type renseigné, IC numérique)
+        for r in table[table["Type"].notna() & table["IC"].notna()].to_dict("records"):
+            rows.append({col: to_float(r.get(h)) if col in NUMERIC_HISTORY else (None if pd.isna(r.get(h)) else r.get(h))
+                         for h, col in HTML_TO_HISTORY.items()})
+    SIGNAL_HISTORY.record_day(day, rows, "html", sha1=sha1, taux_global=taux_global,
+                              file_name=name, file_size=st.st_size, file_mtime=st.st_mtime_ns)
+    return "parsed"
 
-if not all_rows:
+
+html_files = sorted(glob.glob(os.path.join(RAPPORTS_DIR, "FootBot — Profil Volume — *.html")))
+if not html_files:
+    print("⚠️ Aucun rapport trouvé dans 'rapports_quotidiens'.")
+    raise SystemExit()
+
+ingested = Counter(ingest_report(p) for p in html_files)
+print(f"📊 {len(html_files)} rapports trouvés ({ingested['parsed']} relus, "
+      f"{ingested['skip'] + ingested['attach']} déjà dans l'historique) → analyse en cours...")
+
+cols, records = SIGNAL_HISTORY.signals([report_day(p) for p in html_files])
+if not records:
     print("❌ Aucun tableau exploitable détecté.")
     raise SystemExit()
 
-df = pd.concat(all_rows, ignore_index=True)
+df = pd.DataFrame.from_records(records, columns=cols).rename(
+    columns=dict({col: h for h, col in HTML_TO_HISTORY.items()}, file_name="source_file"))
 
 # ----------------------------------------------------------
 # 2) Cleaning
@@ -148,63 +168,11 @@ else:
 # Summary by type: use IC as the success proxy (mean of numeric ICs)
 # --- Résumé par type : taux de réussite réel et IC moyen gagnant ---
 
-def parse_score(score):
-    """Extrait buts domicile / extérieur à partir du texte de score ('2–1', '1-0', etc.)"""
-    if isinstance(score, str):
-        parts = re.split(r"[–\-:]", score)
-        if len(parts) == 2:
-            try:
-                return int(parts[0].strip()), int(parts[1].strip())
-            except ValueError:
-                return None, None
-    return None, None
-
-
-def is_won(row):
-    """Retourne True si le pari est gagnant selon le type et le score final."""
-    sh, sa = parse_score(row.get("Resultat"))
-    if sh is None:
-        return None  # match non joué ou score vide
-
-    t = str(row.get("Type") or "").lower().strip()
-    sugg = str(row.get("Suggestion") or "").lower()
-
-    # Résultat
-    if "résultat" in t or "result" in t:
-        if sh > sa and ("domicile" in sugg or "home" in sugg):
-            return True
-        if sa > sh and ("extérieur" in sugg or "away" in sugg):
-            return True
-        if sh == sa and ("nul" in sugg or "draw" in sugg):
-            return True
-        return False
-
-    # Over 1.5
-    if "over" in t and "1.5" in t:
-        return (sh + sa) > 1.5
-
-    # BTTS
-    if "btts" in t or "deux" in t or "both" in t:
-        return (sh > 0 and sa > 0)
-
-    # Équipe marque
-    if "équipe marque" in t or "equipe marque" in t:
-        home_team = str(row.get("Match")).split("–")[0].strip().lower()
-        away_team = str(row.get("Match")).split("–")[-1].strip().lower()
-        if home_team in sugg and sh > 0:
-            return True
-        if away_team in sugg and sa > 0:
-            return True
-        return False
-
-    return None
-
-
 # Conversion IC en float propre
 df["IC_val"] = pd.to_numeric(df["IC"].astype(str).str.replace("%", "").str.replace(",", "."), errors="coerce")
 
-# Ajout du statut gagné/perdu
-df["won"] = df.apply(is_won, axis=1)
+# Ajout du statut gagné/perdu (vectorisé, identique à l'ancien df.apply(is_won) → signal_eval.py)
+df["won"] = evaluate_won(df)
 
 # --- Agrégation par Type ---
 rows = []
@@ -252,66 +220,23 @@ if not by_league.empty:
 
 
 
-# Best threshold per type
-def best_threshold(subdf):
-    """
-    Détermine le meilleur seuil d'IC pour un type donné :
-      - Cherche un bon équilibre entre taux de réussite et volume
-      - Volume minimal : 15 % du total
-    """
-    best_thr, best_rate, best_vol = None, 0, 0
-    total = len(subdf)
-    global_rate = subdf["won"].eq(True).mean() * 100 if "won" in subdf else np.nan
-
-    for thr in np.arange(60, 96, 1):  # pas de 1 % pour plus de précision
-        filt = subdf[subdf["IC"] >= thr]
-        if len(filt) < 0.15 * total:  # au moins 15 % du volume
-            continue
-
-        # taux de réussite réel (basé sur les matchs gagnés)
-        wins = filt["won"].eq(True).sum()
-        rate = (wins / len(filt) * 100) if len(filt) > 0 else 0
-
-        # on privilégie la stabilité : gain de réussite min. 0.5 % au-dessus du global
-        if rate >= global_rate + 0.5 and rate > best_rate:
-            best_rate, best_thr, best_vol = rate, thr, len(filt)
-
-    # Si rien trouvé, on prend la meilleure réussite globale (fallback)
-    if best_thr is None and total > 0:
-        best_thr = 70
-        best_rate = global_rate
-        best_vol = total
+# Best threshold per type : une courbe précision / volume par type (tri + sommes cumulées, threshold_opt.py)
+CURVES = {t: threshold_curve(g["IC"], g["won"]) for t, g in df.groupby("Type")}
 
-    return pd.Series({
-        "Type": subdf["Type"].iloc[0],
-        "Seuil_optimal": round(best_thr, 1),
-        "Taux_au_seuil": round(best_rate, 1),
-        "Volume_seuil": int(best_vol)
+thr_rows = []
+for t, g in df.groupby("Type"):
+    # Volume minimal 15 %, gain ≥ 0.5 point sur le taux global du type (sinon 70 %)
+    thr, rate, vol = best_threshold(CURVES[t], len(g), g["won"].eq(True).mean() * 100)
+    thr_rows.append({
+        "Type": t,
+        "Seuil_optimal": round(thr, 1),
+        "Taux_au_seuil": round(rate, 1),
+        "Volume_seuil": int(vol)
     })
-
-
-# --- Option complémentaire : seuils dynamiques par probabilité réelle ---
-def find_optimal_threshold(df, col_proba, col_result):
-    """
-    Recherche le seuil de probabilité (50–99 %) qui maximise la réussite réelle.
-    Sert de recalibrage complémentaire à 'best_threshold' pour stabiliser l'analyse globale.
-    """
-    best_thr = 50
-    best_rate = 0.0
-    for t in range(50, 100):
-        subset = df[df[col_proba] >= t]
-        if len(subset) < 10:
-            continue
-        rate = subset[col_result].mean() * 100
-        if rate > best_rate:
-            best_rate = rate
-            best_thr = t
-    return best_thr
-
-
-thr_df = df.groupby("Type", group_keys=False).apply(best_threshold).reset_index(drop=True)
+thr_df = pd.DataFrame(thr_rows)
 
 # --- Recalibrage global dynamique (pour enregistrement et affichage dans main.py) ---
+SEUILS_OPTIMAUX = {}
 try:
     df_btts = df[df["Type"].str.contains("BTTS", case=False, na=False)]
     df_o15 = df[df["Type"].str.contains("Over 1.5", case=False, na=False)]
@@ -319,14 +244,13 @@ try:
     df_team = df[df["Type"].str.contains("Équipe marque|EQUIPE MARQUE", case=False, na=False)]
 
     SEUILS_OPTIMAUX = {
-        "BTTS": find_optimal_threshold(df_btts, "IC_val", "won"),
-        "Over 1.5": find_optimal_threshold(df_o15, "IC_val", "won"),
-        "Résultat": find_optimal_threshold(df_res, "IC_val", "won"),
-        "Équipe marque": find_optimal_threshold(df_team, "IC_val", "won"),
+        "BTTS": find_optimal_threshold(threshold_curve(df_btts["IC_val"], df_btts["won"])),
+        "Over 1.5": find_optimal_threshold(threshold_curve(df_o15["IC_val"], df_o15["won"])),
+        "Résultat": find_optimal_threshold(threshold_curve(df_res["IC_val"], df_res["won"])),
+        "Équipe marque": find_optimal_threshold(threshold_curve(df_team["IC_val"], df_team["won"])),
     }
 
-    # Sauvegarde supplémentaire pour le main.py (utilisé dans _load_optimal_thresholds_from_global)
-    seuils_path_html = os.path.join(BASE_DIR, "analyse_globale_footbot.html")
+    # Enregistrés pour main.py dans l'artefact de calibration (seuil_dynamique, voir plus bas)
     print(f"📈 Seuils recalculés dynamiquement : {SEUILS_OPTIMAUX}")
 except Exception as e:
     print(f"⚠️ Erreur lors du recalcul dynamique des seuils optimaux : {e}")
@@ -401,6 +325,14 @@ try:
 except Exception as e:
     print(f"⚠️ Impossible d’enregistrer les seuils optimaux : {e}")
 
+# Courbes complètes (tous les seuils) → CSV long, relisible sans relancer l'analyse
+CURVES_PATH = os.path.join(BASE_DIR, "courbes_seuils.csv")
+try:
+    curves_frame(CURVES).round(2).to_csv(CURVES_PATH, index=False, encoding="utf-8-sig")
+    print(f"💾 Courbes précision / volume enregistrées → {CURVES_PATH}")
+except Exception as e:
+    print(f"⚠️ Impossible d’enregistrer les courbes de seuils : {e}")
+
 
 # Numeric formatting
 summary["Taux_moy"] = pd.to_numeric(summary["Taux_moy"], errors="coerce").round(1)
@@ -575,6 +507,41 @@ except Exception as e:
     print(f"⚠️ Erreur calibration automatique : {e}")
 
 
+# ----------------------------------------------------------
+# Artefact machine pour main.py (seuils + calibration + fourchettes) — le HTML n'est plus relu
+# ----------------------------------------------------------
+try:
+    types_artifact = {}
+    for _, row in summary.iterrows():
+        rec = {
+            "matchs": row.get("Matchs"),
+            "taux_moy": row.get("Taux_moy"),
+            "ic_moy": row.get("IC_moy"),
+            "seuil_optimal": row.get("Seuil_optimal"),
+            "taux_au_seuil": row.get("Taux_au_seuil"),
+            "volume_seuil": row.get("Volume_seuil"),
+            "seuil_dynamique": SEUILS_OPTIMAUX.get(row["Type"]),
+            "zone_defaites": row.get("Zone_defaites"),
+            "defaites_zone": row.get("Defaites_zone"),
+            "part_defaites_zone": row.get("Part_defaites_zone"),
+        }
+        # colonnes fusionnées (NaN → float) : les compteurs redeviennent entiers
+        for f in ("matchs", "volume_seuil", "defaites_zone"):
+            if pd.notna(rec[f]):
+                rec[f] = int(rec[f])
+        types_artifact[row["Type"]] = rec
+    buckets_artifact = [
+        {"type": r["Type"], "fourchette": r["Fourchette IC"], "matchs": int(r["Matchs"]),
+         "taux_reussite": r["Taux_reussite"], "part_du_total": r["Part_du_total (%)"]}
+        for _, r in dist_df.iterrows()
+    ]
+    artifact_path = write_artifact(build_artifact(periode, len(df), calib_rows, types_artifact, buckets_artifact),
+                                   OUT_ARTIFACT)
+    print(f"💾 Artefact seuils / calibration v{ARTIFACT_VERSION} → {artifact_path}")
+except Exception as e:
+    print(f"⚠️ Impossible d’écrire l’artefact de calibration : {e}")
+
+
 # ----------------------------------------------------------
 # 4) HTML render
 # ----------------------------------------------------------
@@ -687,6 +654,8 @@ if not by_league.empty:
 else:
     tab_league = "<p class='note'>Aucune donnée par ligue disponible.</p>"
 
+curves_html = curve_panel_html(CURVES, dict(zip(thr_df["Type"], thr_df["Seuil_optimal"])) if not thr_df.empty else None)
+
 bar_html = f"""
 <div class='barbox'>
   <div class='bar current' style='width:{taux_actuel}%'>{taux_actuel}%</div>
@@ -718,6 +687,11 @@ html = f"""<!doctype html>
       {bar_html}
     </div>
 
+    <div class="panel">
+      <h2>Courbes précision / volume par seuil d’IC</h2>
+      {curves_html}
+    </div>
+
     <div class="panel">
       <h2>Répartition des réussites par fourchette d’IC</h2>
       {tab_dist}
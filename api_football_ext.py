@@ -4,65 +4,58 @@
 # Dernier patch: 2025-10-23
 # ================================
 import os
-import time
-import json
 import math
-import requests
 from datetime import datetime, timezone, timedelta
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from http_client import api_football_get, understat_get
+from utils import cache_get, cache_set
+from cache_store import CACHE
+from metrics import METRICS
 
 # ----------------------------------------------------
 # Configuration (.env) — lu par main.py via dotenv
 # ----------------------------------------------------
-API_KEY = os.getenv("API_FOOTBALL_KEY", "").strip()
-API_BASE = "https://v3.football.api-sports.io"
-SLEEP_API = float(os.getenv("SLEEP_API", "0.2"))
 MAX_FIXTURES = int(os.getenv("MAX_FIXTURES", "0"))  # 0 = illimité ✅
 USE_INJURIES = os.getenv("USE_INJURIES", "true").lower() == "true"
 
 DEFAULT_TIMEOUT = 12
-HEADERS = {"x-apisports-key": API_KEY, "Accept": "application/json"}
 
 
 # =======================================
 #  CACHE COTES FOOTBOT (Over 1.5 / BTTS)
 # =======================================
+# Stocké dans le cache SQLite (namespace "odds") ; l'ancien cache_odds.json est importé une fois.
 CACHE_FILE = os.path.join(os.path.dirname(__file__), "cache_odds.json")
 
 def _load_cache():
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return {}
+    CACHE.import_json_file("odds", CACHE_FILE, key="footbot")
+    return CACHE.get("odds", "footbot", default={})
 
 # ===================== CACHE GLOBAL INTELLIGENT =====================
-GLOBAL_CACHE = {}
-TEAM_FORM_CACHE = {}
-
+# Anciennement des dicts mémoire sans limite : désormais le cache SQLite
+# (TTL par namespace, éviction par taille, partagé entre runs du même jour).
 def cache_call(key, fn, *args, **kwargs):
     """Mémorise le résultat d’une fonction lente pour éviter les appels multiples."""
-    if key in GLOBAL_CACHE:
-        return GLOBAL_CACHE[key]
-    val = fn(*args, **kwargs)
-    GLOBAL_CACHE[key] = val
+    val = CACHE.get("call", repr(key))
+    if val is None:
+        val = fn(*args, **kwargs)
+        CACHE.set("call", repr(key), val)
     return val
 
 def get_recent_form_cached_smart(team_id, league_id, season, side):
     """Version ultra-rapide de get_recent_form avec cache d’équipe."""
-    key = (team_id, league_id, season, side)
-    if key not in TEAM_FORM_CACHE:
-        TEAM_FORM_CACHE[key] = get_recent_form(team_id, league_id, season, side)
-    return TEAM_FORM_CACHE[key]
+    key = f"{team_id}:{league_id}:{season}:{side}"
+    form = CACHE.get("team_form", key)
+    if form is None:
+        form = get_recent_form(team_id, league_id, season, side)
+        CACHE.set("team_form", key, form)
+    return form
 
 
 def _save_cache(cache):
-    try:
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(cache, f, indent=2, ensure_ascii=False)
-    except Exception:
-        pass
+    CACHE.set("odds", "footbot", cache)
 
 ODDS_CACHE = _load_cache()
 TODAY = datetime.now().strftime("%Y-%m-%d")
@@ -72,31 +65,12 @@ TODAY = datetime.now().strftime("%Y-%m-%d")
 # ----------------------------------------------------
 def _api_get(path: str, params: dict):
     """
-    Appel GET avec gestion de clé, timeout, backoff simple.
-    path: "/fixtures" etc.
+    Appel GET via le client HTTP partagé (pool keep-alive, retries/backoff).
+    path: "/fixtures" etc. ; la clé (ou son absence en replay) est gérée par http_client._api_headers.
     """
-    if not API_KEY:
-        raise RuntimeError("API_FOOTBALL_KEY manquant dans .env")
-
-    url = API_BASE + (path if path.startswith("/") else f"/{path}")
-    backoff = 0.5
-    for attempt in range(3):
-        try:
-            r = requests.get(url, headers=HEADERS, params=params, timeout=DEFAULT_TIMEOUT)
-            r.raise_for_status()
-            j = r.json()
-            # API renvoie {"response":[...]} ou {"response":{...}}
-            return j.get("response", [])
-        except Exception:
-            if attempt == 2:
-                raise
-            time.sleep(backoff)
-            backoff *= 2
-    return []
-
-def _sleep():
-    if SLEEP_API > 0:
-        time.sleep(SLEEP_API)
+    j = api_football_get(path, params, timeout=DEFAULT_TIMEOUT)
+    # API renvoie {"response":[...]} ou {"response":{...}}
+    return j.get("response", [])
 
 def _safe_float(x, default=0.0):
     try:
@@ -109,49 +83,130 @@ def _safe_float(x, default=0.0):
 # ----------------------------------------------------
 from datetime import datetime, timedelta
 
-def get_fixtures_by_date(yyyy_mm_dd: str):
-    """
-    Récupère les matchs de la date donnée en heure française (UTC+2).
-    Exemple : si on entre 2025-10-24 → on obtient bien les matchs du 24 octobre heure FR.
-    """
+# Mode de récupération des matchs du jour :
+#   "leagues" (défaut) : /fixtures?date&league&season pour les seules ligues pertinentes, en parallèle
+#   "all"              : /fixtures?date (tous les matchs du monde, ~1 500 par jour) puis filtrage local
+FIXTURES_FETCH_MODE = os.getenv("FIXTURES_FETCH_MODE", "leagues").strip().lower()
+FIXTURES_FETCH_WORKERS = int(os.getenv("FIXTURES_FETCH_WORKERS", "8"))
+LEAGUE_IDS_TTL_DAYS = float(os.getenv("LEAGUE_IDS_TTL_DAYS", "7"))
+
+def _api_date(yyyy_mm_dd: str):
     # ⚙️ Ajuste pour que la France (UTC+2) corresponde aux bons créneaux API
     date_obj = datetime.strptime(yyyy_mm_dd, "%Y-%m-%d") + timedelta(hours=2)
-    params = {"date": date_obj.strftime("%Y-%m-%d")}
-    data = _api_get("/fixtures", params)
-    _sleep()
-
+    return date_obj.strftime("%Y-%m-%d")
+
+def _fixture_row(it):
+    """Item /fixtures → dict fixture FootBot (lève si l'item est incomplet)."""
+    f = it["fixture"]
+    l = it["league"]
+    t = it["teams"]
+    return {
+        "id": f["id"],
+        "date_utc": f.get("date"),
+        "league_id": l["id"],
+        "league_name": l["name"],
+        "country": l.get("country", ""),
+        "season": l.get("season"),
+        "referee": f.get("referee"),
+        "venue": f.get("venue", {}),
+        "home_id": t["home"]["id"],
+        "away_id": t["away"]["id"],
+        "home_team": t["home"]["name"],
+        "away_team": t["away"]["name"],
+
+        # ✅ Récupération correcte du score réel et statut du match
+        "score_home": it.get("goals", {}).get("home"),
+        "score_away": it.get("goals", {}).get("away"),
+        "status": f.get("status", {}).get("short"),  # ex: "FT", "NS", "LIVE"
+    }
+
+def _fixture_rows(data):
     fixtures = []
-    for it in data[:MAX_FIXTURES if MAX_FIXTURES > 0 else len(data)]:
+    for it in data:
         try:
-            f = it["fixture"]
-            l = it["league"]
-            t = it["teams"]
-
-            fixtures.append({
-                "id": f["id"],
-                "date_utc": f.get("date"),
-                "league_id": l["id"],
-                "league_name": l["name"],
-                "country": l.get("country", ""),
-                "season": l.get("season"),
-                "referee": f.get("referee"),
-                "venue": f.get("venue", {}),
-                "home_id": t["home"]["id"],
-                "away_id": t["away"]["id"],
-                "home_team": t["home"]["name"],
-                "away_team": t["away"]["name"],
-
-                # ✅ Récupération correcte du score réel et statut du match
-                "score_home": it.get("goals", {}).get("home"),
-                "score_away": it.get("goals", {}).get("away"),
-                "status": f.get("status", {}).get("short"),  # ex: "FT", "NS", "LIVE"
-            })
-
+            fixtures.append(_fixture_row(it))
         except Exception:
             continue
-
     return fixtures
 
+def get_relevant_league_seasons(refresh=False):
+    """
+    {league_id: saison courante} des ligues pertinentes (MAJOR_LEAGUES / EXCLUDED),
+    résolu via /leagues?current=true (1 appel) et mis en cache LEAGUE_IDS_TTL_DAYS jours.
+    """
+    from league_filter import LEAGUE_FILTER
+
+    cache_key = "league_ids:current"
+    if not refresh:
+        cached = cache_get(cache_key, max_age_days=LEAGUE_IDS_TTL_DAYS)
+        if cached:
+            return {int(k): v for k, v in cached.items()}
+
+    out = {}
+    for it in _api_get("/leagues", {"current": "true"}):
+        lg = it.get("league") or {}
+        country = (it.get("country") or {}).get("name", "")
+        if not lg.get("id") or not LEAGUE_FILTER.is_relevant(country, lg.get("name"), lg["id"]):
+            continue
+        current = [s.get("year") for s in it.get("seasons") or [] if s.get("current")]
+        if current and current[-1]:
+            out[int(lg["id"])] = int(current[-1])
+    if out:
+        cache_set(cache_key, out)
+    print(f"[🏆 Ligues] {len(out)} ligues pertinentes résolues (API-Football)")
+    return out
+
+def _fetch_league_day(args):
+    date, league_id, season = args
+    return _api_get("/fixtures", {"date": date, "league": league_id, "season": season})
+
+def league_seasons_of(fixtures):
+    """{league_id: saison} des fixtures (ex. snapshot du jour) → get_fixtures_by_date(leagues=…)."""
+    return {int(fx["league_id"]): fx.get("season") for fx in fixtures if fx.get("league_id")}
+
+def get_fixtures_by_date(yyyy_mm_dd: str, mode: str = None, leagues: dict = None):
+    """
+    Récupère les matchs de la date donnée en heure française (UTC+2).
+    Exemple : si on entre 2025-10-24 → on obtient bien les matchs du 24 octobre heure FR.
+    mode "leagues" (défaut, FIXTURES_FETCH_MODE) : seulement les ligues pertinentes ;
+    "all" : tous les matchs du jour (debug / ancien comportement).
+    leagues={league_id: saison} : seulement ces ligues (ex. mise à jour des scores d'un snapshot).
+    Repli sur "all" si les ligues ne peuvent pas être résolues ou si un appel par ligue échoue :
+    jamais de journée partielle (elle serait sauvegardée puis relue en mode refresh).
+    """
+    date = _api_date(yyyy_mm_dd)
+    mode = (mode or FIXTURES_FETCH_MODE).lower()
+
+    league_seasons = {}
+    if leagues is not None:
+        if not leagues:
+            return []
+        league_seasons = leagues
+    elif mode == "leagues":
+        try:
+            league_seasons = get_relevant_league_seasons()
+        except Exception as e:
+            print(f"[⚠️ Ligues] résolution impossible ({e}) → récupération complète du jour")
+
+    data = None
+    if league_seasons:
+        jobs = [(date, lid, season) for lid, season in sorted(league_seasons.items())]
+        try:
+            data = []
+            with ThreadPoolExecutor(max_workers=max(1, min(FIXTURES_FETCH_WORKERS, len(jobs)))) as ex:
+                for part in ex.map(_fetch_league_day, jobs):
+                    data.extend(part)
+            METRICS.inc("fixtures_fetch", mode="leagues")
+        except Exception as e:
+            print(f"[⚠️ /fixtures par ligue] {e} → récupération complète du jour")
+            METRICS.inc("fixtures_fetch_fallback")
+            data = None
+    if data is None:
+        data = _api_get("/fixtures", {"date": date})   # lève si l'appel échoue : rien n'est sauvegardé
+        METRICS.inc("fixtures_fetch", mode="all")
+
+    return _fixture_rows(data[:MAX_FIXTURES if MAX_FIXTURES > 0 else len(data)])
+
 
 
 # ==========================================================
@@ -197,141 +252,327 @@ def enrich_with_odds_and_markets(fixtures):
 
 
 # ----------------------------------------------------
-# 3) FORME RÉCENTE — 5–10 derniers matchs
+# 3) FORME RÉCENTE — store des fixtures ligue/saison
 # ----------------------------------------------------
-def get_recent_form(team_id: int, league_id: int, season: int, side="overall", ref_date=None):
+# Un seul appel /fixtures?league=X&season=Y par ligue, mis en cache disque et
+# rafraîchi incrémentalement ; la forme de chaque équipe est calculée localement.
+LEAGUE_STORE_MAX_AGE_DAYS = int(os.getenv("LEAGUE_STORE_MAX_AGE_DAYS", "7"))
+PLAYED_STATUSES = ("FT", "AET", "PEN", "AWD", "WO")   # matchs joués (fenêtre "last")
+CLOSED_STATUSES = PLAYED_STATUSES + ("CANC", "ABD")    # plus rien à rafraîchir
+DEFERRED_STATUSES = ("PST", "TBD", "SUSP")             # reportés / suspendus : clos s'ils sont datés dans le passé
+PENDING_GRACE = timedelta(hours=3)                     # délai avant de re-demander un match passé non clos
+STALE_WINDOW_DAYS = int(os.getenv("LEAGUE_STALE_WINDOW_DAYS", "14"))   # fenêtre max du rafraîchissement incrémental
+
+LEAGUE_STORE = {}          # (league_id, season) -> {fixture_id: item allégé}
+_LEAGUE_LOCKS = {}
+_LEAGUE_LOCKS_GUARD = threading.Lock()
+
+_EMPTY_FORM = {"wins":0,"draws":0,"losses":0,"goals_for":0,"goals_against":0,"n":0,"xg_for":1.2,"xg_against":1.1}
+
+
+def _league_lock(key):
+    with _LEAGUE_LOCKS_GUARD:
+        return _LEAGUE_LOCKS.setdefault(key, threading.Lock())
+
+def _slim_fixture(it):
+    """Ne garde que les champs utiles au calcul de forme (cache plus léger)."""
+    f = it.get("fixture", {})
+    t = it.get("teams", {})
+    slim = {
+        "fixture": {
+            "id": f.get("id"),
+            "date": f.get("date"),
+            "timestamp": f.get("timestamp"),
+            "status": {"short": (f.get("status") or {}).get("short")},
+        },
+        "teams": {
+            "home": {"id": t.get("home", {}).get("id"), "winner": t.get("home", {}).get("winner")},
+            "away": {"id": t.get("away", {}).get("id"), "winner": t.get("away", {}).get("winner")},
+        },
+        "goals": dict(it.get("goals") or {}),
+    }
+    if it.get("statistics"):
+        slim["statistics"] = it["statistics"]
+    return slim
+
+def _fixture_dt(f):
+    try:
+        return datetime.fromisoformat(f["fixture"]["date"].replace("Z", "+00:00"))
+    except Exception:
+        return None
+
+def _parse_ref_date(ref_date):
+    if not ref_date:
+        return None
+    try:
+        return datetime.fromisoformat(str(ref_date).replace("Z", "+00:00"))
+    except Exception:
+        return None
+
+def _played_after(f, ref_dt):
+    dt = _fixture_dt(f)
+    return bool(ref_dt and dt and dt > ref_dt)
+
+def _stale_since(fixtures):
     """
-    Calcule la forme offensive/défensive réelle :
-      - sur la même compétition et saison
-      - selon la position (home/away)
-      - avant la date de référence (si donnée)
-    Retourne :
-      {wins, draws, losses, goals_for, goals_against, n, xg_for, xg_against}
+    Date du plus ancien match passé dont le statut n'est pas encore final (None si à jour).
+    Un match reporté (PST/TBD/SUSP) daté dans le passé est considéré clos : sa nouvelle date
+    arrive avec le rechargement complet (LEAGUE_STORE_MAX_AGE_DAYS). Fenêtre bornée à
+    STALE_WINDOW_DAYS jours pour qu'un statut jamais mis à jour ne rallonge pas chaque appel.
     """
-    try:
-        params = {"team": team_id, "league": league_id, "season": season, "last": 10}
-        data = _api_get("/fixtures", params)
-        _sleep()
+    now = datetime.now(timezone.utc)
+    limit = now - PENDING_GRACE
+    floor = now - timedelta(days=STALE_WINDOW_DAYS)
+    oldest = None
+    for f in fixtures.values():
+        if f["fixture"]["status"]["short"] in CLOSED_STATUSES + DEFERRED_STATUSES:
+            continue
+        dt = _fixture_dt(f)
+        if dt and dt < limit and (oldest is None or dt < oldest):
+            oldest = dt
+    return max(oldest, floor) if oldest is not None else None
 
-        if not data:
-            return {"wins":0,"draws":0,"losses":0,"goals_for":0,"goals_against":0,"n":0,"xg_for":1.2,"xg_against":1.1}
+def get_league_fixtures(league_id: int, season: int):
+    """
+    Retourne {fixture_id: fixture} pour toute la saison d'une ligue.
+      - 1er appel : /fixtures?league=&season= (puis cache disque)
+      - ensuite : seuls les matchs passés non clos sont re-demandés (from/to)
+      - rechargement complet tous les LEAGUE_STORE_MAX_AGE_DAYS jours (reports de dates)
+    """
+    key = (league_id, season)
+    if key in LEAGUE_STORE:
+        return LEAGUE_STORE[key]
 
-        w = d = l = gf = ga = 0
-        xg_for_total = xg_against_total = 0.0
-        match_count = 0
+    with _league_lock(key):
+        if key in LEAGUE_STORE:
+            return LEAGUE_STORE[key]
 
-        # référence temporelle : ne pas compter les matchs futurs
-        ref_dt = None
-        if ref_date:
-            try:
-                ref_dt = datetime.fromisoformat(str(ref_date).replace("Z", "+00:00"))
-            except Exception:
-                pass
+        cache_key = f"league_fixtures:{league_id}:{season}"
+        cached = cache_get(cache_key, max_age_days=None) or {}
+        fetched_at = _parse_ref_date(cached.get("fetched_at"))
+        now = datetime.now(timezone.utc)
 
-        for f in data:
-            fix = f.get("fixture", {})
-            status = fix.get("status", {}).get("short", "")
-            if status not in ("FT", "AET"):
-                continue  # uniquement matchs terminés
-
-            # filtre sur la date
-            if ref_dt:
-                try:
-                    f_date = datetime.fromisoformat(fix["date"].replace("Z", "+00:00"))
-                    if f_date > ref_dt:
-                        continue
-                except Exception:
-                    pass
-
-            is_home = f["teams"]["home"]["id"] == team_id
-            g_home, g_away = f["goals"]["home"], f["goals"]["away"]
-
-            # 🔹 filtre sur la position
-            if side == "home" and not is_home:
-                continue
-            if side == "away" and is_home:
-                continue
+        if fetched_at and now - fetched_at < timedelta(days=LEAGUE_STORE_MAX_AGE_DAYS):
+            fixtures = {int(k): v for k, v in (cached.get("fixtures") or {}).items()}
+            since = _stale_since(fixtures)
+            if since is not None:
+                params = {
+                    "league": league_id, "season": season,
+                    "from": since.strftime("%Y-%m-%d"),
+                    "to": now.strftime("%Y-%m-%d"),
+                }
+                for it in _api_get("/fixtures", params):
+                    slim = _slim_fixture(it)
+                    fixtures[int(slim["fixture"]["id"])] = slim
+                cache_set(cache_key, {"fetched_at": cached["fetched_at"], "fixtures": fixtures})
+        else:
+            # Rechargement complet (1er passage ou store trop ancien)
+            data = _api_get("/fixtures", {"league": league_id, "season": season})
+            fixtures = {int(s["fixture"]["id"]): s for s in map(_slim_fixture, data)}
+            cache_set(cache_key, {"fetched_at": now.isoformat(), "fixtures": fixtures})
 
-            if is_home:
-                gf += g_home
-                ga += g_away
-                win = f["teams"]["home"]["winner"]
-                lose = f["teams"]["away"]["winner"]
-            else:
-                gf += g_away
-                ga += g_home
-                win = f["teams"]["away"]["winner"]
-                lose = f["teams"]["home"]["winner"]
-
-            if win:
-                w += 1
-            elif lose:
-                l += 1
-            else:
-                d += 1
+        LEAGUE_STORE[key] = fixtures
+        return fixtures
 
-            # 🔹 récupération xG si dispo (API-Football "statistics" ou "xG")
-            stats = f.get("statistics", [])
-            if stats:
-                for s in stats:
-                    if s["team"]["id"] == team_id:
-                        xg_for_total += s.get("xG", 0.0)
-                    else:
-                        xg_against_total += s.get("xG", 0.0)
+def get_team_league_fixtures(team_id: int, league_id: int, season: int, ref_date=None, last: int = 10):
+    """
+    Les `last` derniers matchs joués par l'équipe dans la ligue (plus récent d'abord),
+    strictement avant ref_date si donnée.
+    """
+    ref_dt = _parse_ref_date(ref_date)
+    played = []
+    for f in get_league_fixtures(league_id, season).values():
+        if team_id not in (f["teams"]["home"]["id"], f["teams"]["away"]["id"]):
+            continue
+        if f["fixture"]["status"]["short"] not in PLAYED_STATUSES:
+            continue
+        if _played_after(f, ref_dt):
+            continue
+        played.append((_fixture_dt(f) or datetime.min.replace(tzinfo=timezone.utc), f))
 
-            match_count += 1
+    played.sort(key=lambda x: x[0], reverse=True)
+    return [f for _, f in played[:last]]
 
-        if match_count == 0:
-            return {"wins":0,"draws":0,"losses":0,"goals_for":0,"goals_against":0,"n":0,"xg_for":1.2,"xg_against":1.1}
+def _form_from_fixtures(data, team_id: int, side="overall"):
+    """Agrège W/D/L, buts et xG moyens depuis une liste de fixtures API-Football."""
+    w = d = l = gf = ga = 0
+    xg_for_total = xg_against_total = 0.0
+    match_count = 0
 
-        # Moyennes par match
-        gf_avg = gf / match_count
-        ga_avg = ga / match_count
-        xg_for_avg = (xg_for_total / match_count) if xg_for_total else gf_avg
-        xg_against_avg = (xg_against_total / match_count) if xg_against_total else ga_avg
+    for f in data:
+        fix = f.get("fixture", {})
+        status = fix.get("status", {}).get("short", "")
+        if status not in ("FT", "AET"):
+            continue  # uniquement matchs terminés
 
-        return {
-            "wins": w,
-            "draws": d,
-            "losses": l,
-            "goals_for": round(gf_avg, 2),
-            "goals_against": round(ga_avg, 2),
-            "n": match_count,
-            "xg_for": round(xg_for_avg, 2),
-            "xg_against": round(xg_against_avg, 2)
-        }
+        is_home = f["teams"]["home"]["id"] == team_id
+        g_home, g_away = f["goals"]["home"], f["goals"]["away"]
+
+        # 🔹 filtre sur la position
+        if side == "home" and not is_home:
+            continue
+        if side == "away" and is_home:
+            continue
+
+        if is_home:
+            gf += g_home
+            ga += g_away
+            win = f["teams"]["home"]["winner"]
+            lose = f["teams"]["away"]["winner"]
+        else:
+            gf += g_away
+            ga += g_home
+            win = f["teams"]["away"]["winner"]
+            lose = f["teams"]["home"]["winner"]
+
+        if win:
+            w += 1
+        elif lose:
+            l += 1
+        else:
+            d += 1
+
+        # 🔹 récupération xG si dispo (API-Football "statistics" ou "xG")
+        stats = f.get("statistics", [])
+        if stats:
+            for s in stats:
+                if s["team"]["id"] == team_id:
+                    xg_for_total += s.get("xG", 0.0)
+                else:
+                    xg_against_total += s.get("xG", 0.0)
+
+        match_count += 1
+
+    if match_count == 0:
+        return dict(_EMPTY_FORM)
+
+    # Moyennes par match
+    gf_avg = gf / match_count
+    ga_avg = ga / match_count
+    xg_for_avg = (xg_for_total / match_count) if xg_for_total else gf_avg
+    xg_against_avg = (xg_against_total / match_count) if xg_against_total else ga_avg
+
+    return {
+        "wins": w,
+        "draws": d,
+        "losses": l,
+        "goals_for": round(gf_avg, 2),
+        "goals_against": round(ga_avg, 2),
+        "n": match_count,
+        "xg_for": round(xg_for_avg, 2),
+        "xg_against": round(xg_against_avg, 2)
+    }
+
+def get_recent_form(team_id: int, league_id: int, season: int, side="overall", ref_date=None):
+    """
+    Calcule la forme offensive/défensive réelle :
+      - sur la même compétition et saison (10 derniers matchs joués)
+      - selon la position (home/away)
+      - avant la date de référence (si donnée)
+    Calcul local depuis le store ligue/saison ; repli sur /fixtures?team=...&last=10.
+    Retourne :
+      {wins, draws, losses, goals_for, goals_against, n, xg_for, xg_against}
+    """
+    try:
+        try:
+            data = get_team_league_fixtures(team_id, league_id, season, ref_date=ref_date)
+        except Exception as e:
+            print(f"[ℹ️ store ligue indisponible {league_id}/{season}] {e} — appel par équipe")
+            params = {"team": team_id, "league": league_id, "season": season, "last": 10}
+            ref_dt = _parse_ref_date(ref_date)
+            data = [f for f in _api_get("/fixtures", params) if not _played_after(f, ref_dt)]
+
+        if not data:
+            return dict(_EMPTY_FORM)
+        return _form_from_fixtures(data, team_id, side)
 
     except Exception as e:
         print(f"[⚠️ get_recent_form error {team_id}] {e}")
-        return {
-            "wins":0,"draws":0,"losses":0,
-            "goals_for":0,"goals_against":0,
-            "n":0,"xg_for":1.2,"xg_against":1.1
-        }
+        return dict(_EMPTY_FORM)
 
 
 # ----------------------------------------------------
 # 4) BLESSÉS INFLUENTS
 # ----------------------------------------------------
+# INJURIES_MODE : "league" (1 appel /injuries?league&season par ligue, défaut),
+#                 "date"   (1 appel /injuries?date= par jour de match),
+#                 "team"   (ancien mode : 1 appel par équipe)
+INJURIES_MODE = os.getenv("INJURIES_MODE", "league").strip().lower()
+INJURIES_TTL_HOURS = float(os.getenv("INJURIES_TTL_HOURS", "12"))  # refresh + full du même jour : 1 seul fetch
+
+INJURIES_INDEX = {}        # ("league", lid, season) | ("date", yyyy-mm-dd) -> {team_id: [noms...]}
+_INJURIES_LOCKS = {}
+
+def _injuries_lock(key):
+    with _LEAGUE_LOCKS_GUARD:
+        return _INJURIES_LOCKS.setdefault(key, threading.Lock())
+
+def _index_injuries(rows):
+    """Regroupe les lignes /injuries par team_id (ordre de l'API conservé)."""
+    index = {}
+    for row in rows:
+        tid = (row.get("team") or {}).get("id")
+        nm = (row.get("player") or {}).get("name")
+        if tid is None or not nm:
+            continue
+        index.setdefault(int(tid), []).append(nm)
+    return index
+
+def get_injuries_index(scope, params: dict):
+    """
+    Index {team_id: [noms...]} pour un périmètre (ligue/saison ou date).
+    Mémoire du process + cache disque (INJURIES_TTL_HOURS).
+    """
+    if scope in INJURIES_INDEX:
+        return INJURIES_INDEX[scope]
+
+    with _injuries_lock(scope):
+        if scope in INJURIES_INDEX:
+            return INJURIES_INDEX[scope]
+
+        cache_key = "injuries:" + ":".join(str(x) for x in scope)
+        cached = cache_get(cache_key, max_age_days=INJURIES_TTL_HOURS / 24.0)
+        if cached is not None:
+            index = {int(k): v for k, v in cached.items()}
+        else:
+            index = _index_injuries(_api_get("/injuries", params))
+            cache_set(cache_key, index)
+
+        INJURIES_INDEX[scope] = index
+        return index
+
+def _injuries_scope(fx: dict):
+    if INJURIES_MODE == "date":
+        day = (fx.get("date_utc") or "")[:10] or TODAY
+        return ("date", day), {"date": day}
+    return ("league", fx["league_id"], fx["season"]), {"league": fx["league_id"], "season": fx["season"]}
+
 def add_injuries_influents(fx: dict):
     """
     Ajoute fx["injuries"][team_id] = [noms...]
     (simple: liste, tu peux pondérer côté main.py)
+    Modes "league"/"date" : lecture dans l'index partagé, sans appel par équipe.
     """
     if not USE_INJURIES:
         return fx
 
     try:
-        for team_id in (fx["home_id"], fx["away_id"]):
-            params = {"team": team_id, "league": fx["league_id"], "season": fx["season"]}
-            data = _api_get("/injuries", params)
-            _sleep()
+        if INJURIES_MODE == "team":
+            for team_id in (fx["home_id"], fx["away_id"]):
+                params = {"team": team_id, "league": fx["league_id"], "season": fx["season"]}
+                data = _api_get("/injuries", params)
+                fx.setdefault("injuries", {})
+                fx["injuries"][team_id] = []
+                for row in data:
+                    nm = row.get("player", {}).get("name")
+                    if nm:
+                        fx["injuries"][team_id].append(nm)
+        else:
+            scope, params = _injuries_scope(fx)
+            index = get_injuries_index(scope, params)
             fx.setdefault("injuries", {})
-            fx["injuries"][team_id] = []
-            for row in data:
-                nm = row.get("player", {}).get("name")
-                if nm:
-                    fx["injuries"][team_id].append(nm)
+            for team_id in (fx["home_id"], fx["away_id"]):
+                fx["injuries"][team_id] = list(index.get(int(team_id), []))
     except Exception:
         pass
     return fx
@@ -351,7 +592,6 @@ def get_team_expected(team_id: int, league_id: int, season: int):
         # --- 1️⃣ Tentative API-Football réelle
         params = {"team": team_id, "league": league_id, "season": season}
         data = _api_get("/teams/statistics", params)
-        _sleep()
 
         if isinstance(data, list):
             data = data[0] if data else {}
@@ -364,6 +604,7 @@ def get_team_expected(team_id: int, league_id: int, season: int):
             if xg_for is not None and xga is not None:
                 val = {"xg_for": _safe_float(xg_for), "xga": _safe_float(xga)}
                 print(f"[✅ xG API] team={team_id} league={league_id} xG={val}")
+                METRICS.inc("xg_source", source="api")
                 return val
 
         # --- 2️⃣ Fallback : calcule un xG proxy crédible
@@ -385,14 +626,7 @@ def get_team_expected(team_id: int, league_id: int, season: int):
 
         val = {"xg_for": xg_for, "xga": xga}
         print(f"[ℹ️ xG proxy] team={team_id} league={league_id} xG={val}")
-
-                # --- Incrément compteur API si disponible ---
-        try:
-            globals()["STATS"]["n_api"] += 1
-        except Exception:
-            pass
-
-
+        METRICS.inc("xg_source", source="proxy")
         return val
 
     except Exception as e:
@@ -403,7 +637,6 @@ def get_team_expected(team_id: int, league_id: int, season: int):
 # ----------------------------------------------------
 # 5B) xG via Understat API JSON (Top 5 ligues)
 # ----------------------------------------------------
-import json, unicodedata
 
 UNDERSTAT_LEAGUE_SLUGS = {
     "Premier League": "epl",
@@ -413,6 +646,8 @@ UNDERSTAT_LEAGUE_SLUGS = {
     "Ligue 1": "ligue_1",
 }
 
+UNDERSTAT_BASE = os.getenv("UNDERSTAT_BASE", "https://understat.com").rstrip("/")
+
 UNDERSTAT_TEAM_MAP = {
     # 🇬🇧 Premier League
     "Arsenal": "Arsenal",
@@ -578,11 +813,7 @@ def normalize_name(name: str):
 # ----------------------------------------------------
 # ✅ Understat v2 — Parser Hybride (NUXT → JS → Fallback)
 # ----------------------------------------------------
-import re, json, unicodedata, html as _html
-import requests
-
 def get_understat_xg_v2(team_name: str, league_name: str, season: int = 2025, fallback_func=None):
-    import json, requests, unicodedata
 
     def _safe_return(src="default", xf=1.25, xa=1.15):
         return {"xg_for": xf, "xg_against": xa, "n": 1, "source": src}
@@ -742,10 +973,10 @@ def get_understat_xg_v2(team_name: str, league_name: str, season: int = 2025, fa
 }
 
     team_slug = UNDERSTAT_TEAM_MAP.get(team_name, team_name.replace(" ", "_"))
-    url = f"https://understat.com/api/team/{team_slug}/{season}"
+    url = f"{UNDERSTAT_BASE}/api/team/{team_slug}/{season}"
 
     try:
-        r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        r = understat_get(url, timeout=10)
         r.raise_for_status()
         data = r.json()
 
@@ -789,7 +1020,7 @@ def get_understat_xg_v2(team_name: str, league_name: str, season: int = 2025, fa
 # ----------------------------------------------------
 # 6) H2H — BTTS %, Moy. Buts, Score pondéré
 # ----------------------------------------------------
-H2H_CACHE = {}  # 🧠 cache mémoire H2H
+H2H_ERROR_TTL = 600  # un échec n'est mémorisé que 10 min (l'API sera re-tentée ensuite)
 
 def get_btts_h2h(home_id: int, away_id: int, last: int = 10):
     """
@@ -797,16 +1028,16 @@ def get_btts_h2h(home_id: int, away_id: int, last: int = 10):
       - % BTTS (les deux équipes marquent)
       - Moyennes de buts marqués et encaissés
       - Score H2H pondéré (BTTS %, buts pour/contre)
-    Utilise un cache mémoire pour éviter les appels répétés.
+    Utilise le cache SQLite (namespace "h2h") pour éviter les appels répétés.
     """
-    key = (home_id, away_id, last)
-    if key in H2H_CACHE:
-        return H2H_CACHE[key]  # ⚡ cache hit, aucun appel API
+    key = f"{home_id}-{away_id}:{last}"
+    cached = CACHE.get("h2h", key)
+    if cached is not None:
+        return cached  # ⚡ cache hit, aucun appel API
 
     try:
         params = {"h2h": f"{home_id}-{away_id}", "last": last}
         data = _api_get("/fixtures/headtohead", params)
-        _sleep()
 
         if not data:
             result = {
@@ -818,7 +1049,7 @@ def get_btts_h2h(home_id: int, away_id: int, last: int = 10):
                 "ga_away": 0.0,
                 "score_h2h": 0.0
             }
-            H2H_CACHE[key] = result
+            CACHE.set("h2h", key, result)
             return result
 
         both = 0
@@ -861,7 +1092,7 @@ def get_btts_h2h(home_id: int, away_id: int, last: int = 10):
             "ga_away": round(ga_away, 2),
             "score_h2h": round(score_h2h, 2)
         }
-        H2H_CACHE[key] = result
+        CACHE.set("h2h", key, result)
         return result
 
     except Exception:
@@ -874,7 +1105,7 @@ def get_btts_h2h(home_id: int, away_id: int, last: int = 10):
             "ga_away": 0.0,
             "score_h2h": 0.0
         }
-        H2H_CACHE[key] = result
+        CACHE.set("h2h", key, result, ttl=H2H_ERROR_TTL)
         return result
 
 
@@ -889,7 +1120,6 @@ def get_table_strength(league_id: int, season: int, team_id: int):
     try:
         params = {"league": league_id, "season": season}
         data = _api_get("/standings", params)
-        _sleep()
         if not data:
             return 0.5
         # structure: response[0]["league"]["standings"][0] = liste
@@ -908,41 +1138,85 @@ def get_table_strength(league_id: int, season: int, team_id: int):
 # ----------------------------------------------------
 # 8) SOT — tirs cadrés moyens dernier N (option léger)
 # ----------------------------------------------------
+# Stats d'un match terminé = immuables → cache disque sans expiration, partagé
+# entre toutes les équipes (un même match sert à l'équipe à domicile et à l'adversaire).
+STATS_FETCH_WORKERS = int(os.getenv("STATS_FETCH_WORKERS", "8"))
+FIXTURE_STATS = {}         # fixture_id -> [bloc équipe A, bloc équipe B]
+
+def _fetch_fixture_statistics(fid: int):
+    try:
+        return fid, _api_get("/fixtures/statistics", {"fixture": fid})
+    except Exception as e:
+        print(f"[⚠️ /fixtures/statistics {fid}] {e}")
+        return fid, None
+
+def get_fixtures_statistics(fixture_ids):
+    """
+    Retourne {fixture_id: statistics} pour des matchs terminés.
+    Mémoire → cache disque (immuable) → appels API des manquants, en parallèle.
+    Seules les réponses complètes (2 équipes) sont mises en cache.
+    """
+    out, missing = {}, []
+    for fid in dict.fromkeys(int(x) for x in fixture_ids):
+        st = FIXTURE_STATS.get(fid)
+        if st is None:
+            st = cache_get(f"fixture_stats:{fid}", max_age_days=None)
+        if st is not None:
+            FIXTURE_STATS[fid] = out[fid] = st
+        else:
+            missing.append(fid)
+
+    if missing:
+        workers = max(1, min(STATS_FETCH_WORKERS, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for fid, st in ex.map(_fetch_fixture_statistics, missing):
+                if not st:
+                    continue
+                out[fid] = st
+                if len(st) == 2:
+                    FIXTURE_STATS[fid] = st
+                    cache_set(f"fixture_stats:{fid}", st)
+    return out
+
 def get_shots_on_target_avgs(team_id: int, league_id: int, season: int, last: int = 5):
     """
     Approche légère: moyenne 'shots on target' pour et contre sur N derniers matchs.
-    (Utilise /fixtures/statistics par match — peut être plus lent si N grand)
+    Matchs lus dans le store ligue/saison, stats par match via get_fixtures_statistics
+    (quasi aucun appel une fois la saison lancée).
     """
     try:
         # 1) Récupère les derniers matchs IDs
-        params = {"team": team_id, "league": league_id, "season": season, "last": last}
-        fixtures = _api_get("/fixtures", params)
-        _sleep()
+        try:
+            fixtures = get_team_league_fixtures(team_id, league_id, season, last=last)
+        except Exception:
+            fixtures = []
+        if not fixtures:
+            params = {"team": team_id, "league": league_id, "season": season, "last": last}
+            fixtures = _api_get("/fixtures", params)
         if not fixtures:
             return {"for": 0.0, "against": 0.0, "n": 0}
 
+        ids = [f["fixture"]["id"] for f in fixtures]
+        stats = get_fixtures_statistics(ids)
+
+        def _sog(block):
+            for it in block.get("statistics", []):
+                if it.get("type") == "Shots on Goal":
+                    return _safe_float(it.get("value"), 0)
+            return 0.0
+
         total_for = total_against = 0.0
         n = 0
-        for f in fixtures:
-            fid = f["fixture"]["id"]
-            st = _api_get("/fixtures/statistics", {"fixture": fid})
-            _sleep()
-            if not st:
-                continue
+        for fid in ids:
+            st = stats.get(int(fid))
             # st = [ { "team": {...}, "statistics": [ {"type":"Shots on Goal","value":X}, ... ] }, {...} ]
-            if len(st) != 2:
+            if not st or len(st) != 2:
                 continue
-            # équipe A
-            a = st[0]; b = st[1]
+            a, b = st[0], st[1]
             if a["team"]["id"] == team_id:
                 me, opp = a, b
             else:
                 me, opp = b, a
-            def _sog(block):
-                for it in block.get("statistics", []):
-                    if it.get("type") == "Shots on Goal":
-                        return _safe_float(it.get("value"), 0)
-                return 0.0
             total_for += _sog(me)
             total_against += _sog(opp)
             n += 1
@@ -963,7 +1237,6 @@ def get_days_since_last_match(team_id: int, league_id: int, season: int):
     try:
         params = {"team": team_id, "league": league_id, "season": season, "last": 1}
         data = _api_get("/fixtures", params)
-        _sleep()
         if not data:
             return None
         dt = data[0]["fixture"]["date"]
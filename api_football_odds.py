@@ -1,36 +1,17 @@
 # api_football_odds.py
 from datetime import datetime
-import os, requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from time import sleep
-
-API_KEY = os.getenv("API_FOOTBALL_KEY")
-API_BASE = "https://v3.football.api-sports.io"
-HEADERS  = {"x-apisports-key": API_KEY, "Accept": "application/json"}
+from http_client import api_football_get
+from metrics import METRICS
 
 # --- marchés demandés
 BET_FILTER = "1,2,5,8"   # 1=Match Winner, 2=Home/Away team to score, 5=Over/Under, 8=BTTS
 BET365_ID  = 8           # bookmaker Bet365 (quand dispo)
 
 # ---------- Utils ----------
-def _check_key():
-    if not API_KEY:
-        raise RuntimeError("API_FOOTBALL_KEY manquant dans .env")
-
 def _get(path, params, timeout=12):
-    """GET avec petit backoff."""
-    url = f"{API_BASE}{path if path.startswith('/') else '/' + path}"
-    backoff = 0.5
-    for attempt in range(3):
-        try:
-            r = requests.get(url, headers=HEADERS, params=params, timeout=timeout)
-            r.raise_for_status()
-            return r.json()
-        except Exception:
-            if attempt == 2:
-                raise
-            sleep(backoff)
-            backoff *= 2
+    """GET via le client HTTP partagé (pool + retries)."""
+    return api_football_get(path, params, timeout=timeout)
 
 def _pick_bookmaker(bookmakers):
     """Priorise Bet365, sinon 1er bookmaker dispo."""
@@ -138,9 +119,8 @@ def fetch_odds_for_date(date_str: str):
        - récupère fixture IDs via /fixtures?date=...
        - lance /odds?fixture=<id> (en //) et parse
     Retourne: { fixture_id:int -> {odds_*:float, ...} }
+    Clé absente : http_client lève RuntimeError (sauf en replay, où aucune clé n'est requise).
     """
-    _check_key()
-
     # --- Tentative 1: par date
     params = {"date": date_str, "bet": BET_FILTER}
     print(f"1/ Appel /odds par date → {params}")
@@ -163,6 +143,7 @@ def fetch_odds_for_date(date_str: str):
             parsed = _parse_bets(bm.get("bets"))
             if parsed:
                 odds_map[int(fid)] = parsed
+        METRICS.inc("odds_fixtures", len(odds_map), source="date")
         return odds_map
 
     print("→ 0 résultat. Activation du fallback intelligent (par fixture).")
@@ -175,6 +156,7 @@ def fetch_odds_for_date(date_str: str):
 
     # --- Interroger /odds fixture par fixture en // (rapide et robuste)
     odds_map = {}
+    METRICS.inc("odds_fallback_requests", len(fids))
     with ThreadPoolExecutor(max_workers=12) as ex:
         futures = [ex.submit(_fetch_odds_for_fixture, fid) for fid in fids]
         for fut in as_completed(futures):
@@ -186,6 +168,7 @@ def fetch_odds_for_date(date_str: str):
                 pass
 
     print(f"→ Fallback terminé: cotes trouvées pour {len(odds_map)}/{len(fids)} fixtures")
+    METRICS.inc("odds_fixtures", len(odds_map), source="fallback")
     return odds_map
 
 
@@ -0,0 +1,228 @@
+# ================================
+# backfill_history.py — FootBot PRO
+# Import unique (ré-exécutable) des rapports HTML existants dans l'historique des signaux
+#   - parsing lxml direct (sans BeautifulSoup ni pd.read_html), en parallèle (process pool)
+#   - mêmes colonnes standard que analyse_globale (signal_history.standard_column)
+#   - écrit signal_history (SQLite) + un jeu de données colonnaire partitionné par jour :
+#       history_dataset/day=YYYY-MM-DD/signals.parquet   (pyarrow)
+#       history_dataset/day=YYYY-MM-DD/signals.csv.gz    (repli sans pyarrow)
+#   - idempotent : un rapport déjà importé avec le même hash n'est ni relu ni réécrit
+#   python backfill_history.py [--reports DIR] [--workers N] [--force] [--format parquet|csv]
+# ================================
+import os
+import re
+import csv
+import sys
+import glob
+import gzip
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml.html
+
+from signal_history import (SIGNAL_HISTORY, SIGNAL_COLUMNS, HTML_TO_HISTORY, NUMERIC_HISTORY, PROBA_CANDIDATES,
+                            file_sha1, report_day, standard_column, to_float)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RAPPORTS_DIR = os.path.join(BASE_DIR, "rapports_quotidiens")
+REPORT_GLOB = "FootBot — Profil Volume — *.html"
+
+DATASET_DIR = os.getenv("FOOTBOT_HISTORY_DATASET", os.path.join(BASE_DIR, "history_dataset"))
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", str(min(8, os.cpu_count() or 1))))
+MANIFEST = "_manifest.json"          # {day: sha1 des lignes écrites} → partitions à jour ou non
+
+_WS = re.compile(r"[\s\xa0]+")
+_TAUX_GLOBAL = re.compile(r"Taux global\s*[:=]\s*([\d,.]+)%")
+
+
+# ----------------------------------------------------
+# Parsing (process enfant)
+# ----------------------------------------------------
+def _text(el):
+    """Texte de cellule comme pd.read_html : espaces normalisés ; vide → None."""
+    t = _WS.sub(" ", el.text_content()).strip()
+    return t or None
+
+
+def _signals_table(root):
+    tables = root.xpath('//table[@id="signalsTable"]')
+    return tables[0] if tables else next(iter(root.xpath(
+        '//table[contains(concat(" ", normalize-space(@class), " "), " signals ")]')), None)
+
+
+def _table_rows(table):
+    """(en-têtes, lignes) ; les colspan sont répétés (lignes de section) comme dans pd.read_html."""
+    head = table.xpath("./thead/tr[1]/th | ./thead/tr[1]/td")
+    body = table.xpath("./tbody/tr")
+    if not head:                                   # pas de <thead> : 1re ligne = en-têtes
+        trs = body or table.xpath("./tr")
+        head, body = (trs[0].xpath("./th | ./td"), trs[1:]) if trs else ([], [])
+    headers = [_text(th) or "" for th in head]
+    rows = []
+    for tr in body:
+        cells = []
+        for td in tr.xpath("./td | ./th"):
+            cells.extend([_text(td)] * max(1, int(td.get("colspan") or 1)))
+        rows.append((cells + [None] * len(headers))[:len(headers)])
+    return headers, rows
+
+
+def parse_report(path):
+    """Rapport HTML → {day, rows (dicts SIGNAL_COLUMNS), taux_global, parse_s}."""
+    t0 = time.perf_counter()
+    with open(path, "rb") as f:
+        root = lxml.html.fromstring(f.read())
+
+    m = _TAUX_GLOBAL.search(_WS.sub(" ", root.text_content()))
+    taux_global = to_float(m.group(1)) if m else None
+
+    out = []
+    table = _signals_table(root)
+    if table is not None:
+        headers, rows = _table_rows(table)
+        cols = [standard_column(h) for h in headers]
+        records = [dict(zip(cols, r)) for r in rows]
+        # probabilité numérique : 1re colonne candidate à ≥ 30 % de valeurs numériques
+        proba_col = next((c for c in PROBA_CANDIDATES if c in cols and records
+                          and sum(to_float(r[c]) is not None for r in records) >= 0.3 * len(records)), None)
+        for r in records if proba_col else []:
+            r["IC"] = to_float(r[proba_col])
+            if r.get("Type") is None or r["IC"] is None:
+                continue                           # lignes de section / sans probabilité
+            out.append({col: to_float(r.get(h)) if col in NUMERIC_HISTORY else r.get(h)
+                        for h, col in HTML_TO_HISTORY.items()})
+    return {"day": report_day(path), "rows": out, "taux_global": taux_global,
+            "parse_s": time.perf_counter() - t0}
+
+
+# ----------------------------------------------------
+# Jeu de données partitionné par jour
+# ----------------------------------------------------
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _write_partition(dataset_dir, day, rows, fmt):
+    """Réécrit day=<jour>/ (fichier temporaire puis remplacement) ; retourne le chemin."""
+    part = os.path.join(dataset_dir, f"day={day}")
+    os.makedirs(part, exist_ok=True)
+    path = os.path.join(part, "signals.parquet" if fmt == "parquet" else "signals.csv.gz")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if fmt == "parquet":
+        pa = _pyarrow()
+        table = pa.table({c: [r[c] for r in rows] for c in SIGNAL_COLUMNS},
+                         schema=pa.schema([(c, pa.float64() if c in NUMERIC_HISTORY else pa.string())
+                                           for c in SIGNAL_COLUMNS]))
+        pa.parquet.write_table(table, tmp, compression="zstd")
+    else:
+        with gzip.open(tmp, "wt", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(SIGNAL_COLUMNS)
+            w.writerows([r[c] for c in SIGNAL_COLUMNS] for r in rows)
+    os.replace(tmp, path)
+    for name in os.listdir(part):                  # autre format d'un import précédent
+        if name != os.path.basename(path):
+            os.remove(os.path.join(part, name))
+    return path
+
+
+def _load_manifest(dataset_dir):
+    try:
+        with open(os.path.join(dataset_dir, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(dataset_dir, manifest):
+    path = os.path.join(dataset_dir, MANIFEST)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+# ----------------------------------------------------
+# Orchestration
+# ----------------------------------------------------
+def backfill(reports_dir=RAPPORTS_DIR, dataset_dir=DATASET_DIR, workers=BACKFILL_WORKERS, force=False, fmt=None):
+    fmt = fmt or ("parquet" if _pyarrow() else "csv")
+    if fmt == "parquet" and not _pyarrow():
+        print("[⚠️ Backfill] pyarrow absent → partitions CSV gzip")
+        fmt = "csv"
+    paths = sorted(glob.glob(os.path.join(glob.escape(reports_dir), REPORT_GLOB)))
+    if not paths:
+        print(f"⚠️ Aucun rapport dans {reports_dir}")
+        return {}
+
+    # 1) rapports nouveaux / modifiés (hash) → à relire
+    todo, status = [], {}
+    for p in paths:
+        day, st, sha1 = report_day(p), os.stat(p), file_sha1(p)
+        rec = SIGNAL_HISTORY.report(day)
+        if rec and rec["sha1"] == sha1 and not force:
+            if rec["file_name"] != os.path.basename(p):
+                SIGNAL_HISTORY.attach_file(day, os.path.basename(p), st.st_size, st.st_mtime_ns)
+            status[p] = ("déjà importé", None, rec["n_signals"])
+        else:
+            todo.append((p, sha1, st))
+
+    # 2) parsing en parallèle
+    t0 = time.perf_counter()
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as ex:
+            parsed = list(ex.map(parse_report, [p for p, _, _ in todo], chunksize=4))
+        for (p, sha1, st), res in zip(todo, parsed):
+            ok = SIGNAL_HISTORY.record_day(res["day"], res["rows"], "html", sha1=sha1,
+                                           taux_global=res["taux_global"], file_name=os.path.basename(p),
+                                           file_size=st.st_size, file_mtime=st.st_mtime_ns)
+            status[p] = ("importé" if ok else "échec écriture", res["parse_s"], len(res["rows"]))
+    wall = time.perf_counter() - t0
+
+    # 3) partitions : réécrites seulement si les lignes du jour ont changé (hash) ou manquent
+    os.makedirs(dataset_dir, exist_ok=True)
+    manifest = _load_manifest(dataset_dir)
+    n_written = 0
+    for p in paths:
+        day = report_day(p)
+        rec = SIGNAL_HISTORY.report(day)
+        if rec is None:                            # écriture SQLite en échec : jour repris au prochain run
+            continue
+        ext = "signals.parquet" if fmt == "parquet" else "signals.csv.gz"
+        if (not force and manifest.get(day) == rec["sha1"]
+                and os.path.exists(os.path.join(dataset_dir, f"day={day}", ext))):
+            continue
+        cols, rows = SIGNAL_HISTORY.signals([day])
+        _write_partition(dataset_dir, day, [dict(zip(cols, r)) for r in rows], fmt)
+        manifest[day] = rec["sha1"]
+        n_written += 1
+    _save_manifest(dataset_dir, manifest)
+
+    for p in paths:
+        label, parse_s, n = status[p]
+        ms = f"{1000 * parse_s:7.1f} ms" if parse_s is not None else f"{'—':>10}"
+        print(f"  {os.path.basename(p):<44} {label:<14} {n:>5} signaux  {ms}")
+    n_parsed = sum(1 for s in status.values() if s[1] is not None)
+    cpu = sum(s[1] for s in status.values() if s[1] is not None)
+    print(f"📚 {len(paths)} rapports : {n_parsed} relus ({cpu:.2f}s de parsing cumulé, {wall:.2f}s avec "
+          f"{min(workers, max(1, n_parsed))} process), {n_written} partition(s) {fmt} écrite(s) → {dataset_dir}")
+    return status
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Importe les rapports HTML existants dans l'historique des signaux")
+    ap.add_argument("--reports", default=RAPPORTS_DIR)
+    ap.add_argument("--dataset", default=DATASET_DIR)
+    ap.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    ap.add_argument("--force", action="store_true", help="relit et réécrit tout, même les rapports inchangés")
+    ap.add_argument("--format", choices=("parquet", "csv"), default=None)
+    a = ap.parse_args()
+    backfill(a.reports, a.dataset, a.workers, a.force, a.format)
+    sys.exit(0)
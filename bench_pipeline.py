@@ -0,0 +1,331 @@
+# ================================
+# bench_pipeline.py — FootBot PRO
+# Benchmark bout-en-bout du pipeline quotidien (fixtures sauvegardés + faux serveur API)
+#   python bench_pipeline.py                           → toutes les étapes, contrôle du budget
+#   python bench_pipeline.py --date 2025-11-05 --out avant.json
+#   python bench_pipeline.py --compare avant.json      → écarts vs un run précédent
+#   python bench_pipeline.py --write-budget            → réécrit bench_budget.json (run courant × marge)
+# Chaque étape tourne dans son propre process (RSS de pointe isolé), dans un dossier temporaire :
+# cache SQLite vierge, aucune écriture dans le dépôt, API-Football/Understat servis par bench_stub_api.py.
+# Code retour 1 si une mesure dépasse son budget.
+# ================================
+import os
+import sys
+import copy
+import glob
+import importlib
+import json
+import time
+import shutil
+import argparse
+import resource
+import statistics
+import subprocess
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGET_PATH = os.path.join(BASE_DIR, "bench_budget.json")
+DEFAULT_DATE = "2025-11-02"      # plus grosse journée sauvegardée
+DEFAULT_SCALE = 20               # étapes pures : fixtures du jour répétés (volume mesurable)
+RESULT_TAG = "BENCH_RESULT "
+
+# Seuils IC du run quotidien (cf. main.main)
+BENCH_P = {
+    "RES_C": 0.70, "RES_TC": 0.85,
+    "O15_C": 0.60, "O15_TC": 0.70,
+    "BTTS_C": 0.70, "BTTS_TC": 0.85,
+    "TEAM_C": 0.65, "TEAM_TC": 0.70,
+}
+
+STAGES = ("league_filter", "fixtures", "enrichment", "enrichment_warm", "scoring", "build_html",
+          "analyse_globale", "analyse_globale_warm")
+METRICS = ("wall_s", "rss_mb", "api_calls")
+
+
+def _rss_mb():
+    """RSS de pointe du process courant (ru_maxrss : Ko sous Linux, octets sous macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dump_json(path, obj):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+
+
+def _timed(fn, repeat):
+    """Médiane de `repeat` exécutions (secondes) + résultat de la dernière."""
+    times, res = [], None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        res = fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), res
+
+
+# ----------------------------------------------------
+# Étapes (exécutées dans le process enfant)
+# ----------------------------------------------------
+def _raw_fixtures(date):
+    from snapshot_store import find_snapshot, load_snapshot
+    return load_snapshot(find_snapshot("fixtures_raw", date, BASE_DIR))
+
+
+def _enriched_fixtures(ctx):
+    """
+    Sortie de l'étape enrichment si disponible, sinon enrichissement synthétique seedé,
+    répétée ctx["scale"] fois (copies indépendantes).
+    """
+    path = os.path.join(ctx["workdir"], f"enriched_{ctx['date']}.json")
+    if os.path.exists(path):
+        fixtures = _load_json(path)
+    else:
+        import random
+        from main import is_relevant_league
+        from scoring_batch import _synthetic_enrichment
+        rnd = random.Random(2025)
+        fixtures = [_synthetic_enrichment(fx, rnd) for fx in _raw_fixtures(ctx["date"])
+                    if is_relevant_league(fx.get("country"), fx.get("league_name"))]
+    return [copy.deepcopy(fx) for _ in range(max(1, ctx["scale"])) for fx in fixtures]
+
+
+def stage_league_filter(ctx):
+    """Filtre neuf à chaque répétition : compilation + mémo à froid, comme au lancement de main.py."""
+    from league_filter import LeagueFilter
+    from snapshot_store import iter_snapshot, list_snapshots
+    fixtures = [fx for p in list_snapshots("fixtures_raw", BASE_DIR) for fx in iter_snapshot(p)
+                if isinstance(fx, dict)]
+
+    def run():
+        flt = LeagueFilter()
+        return sum(1 for fx in fixtures if flt.is_relevant_fixture(fx))
+    wall, kept = _timed(run, ctx["repeat"])
+    return wall, {"n_fixtures": len(fixtures), "n_kept": kept, "us_per_call": round(wall / max(len(fixtures), 1) * 1e6, 2)}
+
+
+def stage_fixtures(ctx):
+    """get_fixtures_by_date (mode FIXTURES_FETCH_MODE, cache vierge) puis filtre pertinent."""
+    from api_football_ext import get_fixtures_by_date, FIXTURES_FETCH_MODE
+    from league_filter import LEAGUE_FILTER
+    t0 = time.perf_counter()
+    fixtures = get_fixtures_by_date(ctx["date"])
+    kept = [fx for fx in fixtures if LEAGUE_FILTER.is_relevant_fixture(fx)]
+    wall = time.perf_counter() - t0
+    return wall, {"mode": FIXTURES_FETCH_MODE, "n_fetched": len(fixtures), "n_kept": len(kept),
+                  "json_kb": round(len(json.dumps(fixtures, ensure_ascii=False, indent=2).encode("utf-8")) / 1024, 1)}
+
+
+def stage_enrichment(ctx):
+    from main import is_relevant_league, enrich_with_european_context
+    from enrichment_async import enrich_fixtures
+    import understat_ext
+    fixtures = [fx for fx in _raw_fixtures(ctx["date"]) if is_relevant_league(fx.get("country"), fx.get("league_name"))]
+    t0 = time.perf_counter()
+    counts = enrich_fixtures(fixtures, european_hook=enrich_with_european_context)
+    understat_ext.flush_cache()
+    wall = time.perf_counter() - t0
+    _dump_json(os.path.join(ctx["workdir"], f"enriched_{ctx['date']}.json"), fixtures)
+    return wall, dict(counts, n_fixtures=len(fixtures))
+
+
+def stage_scoring(ctx):
+    """Chemin de main.py (score_fixtures → scoring_batch) ; scalaire vs batch : python scoring_batch.py."""
+    from main import score_fixtures
+    fixtures = _enriched_fixtures(ctx)
+    runs = iter([copy.deepcopy(fixtures) for _ in range(max(1, ctx["repeat"]))])
+
+    def run():
+        batch = next(runs)
+        score_fixtures(batch, BENCH_P)
+        return sum(len(fx["_sigs"]) for fx in batch)
+    wall, n_sigs = _timed(run, ctx["repeat"])
+    return wall, {"n_fixtures": len(fixtures), "n_signals": n_sigs,
+                  "us_per_fixture": round(wall / max(len(fixtures), 1) * 1e6, 2)}
+
+
+def stage_build_html(ctx):
+    from main import build_html, score_fixtures
+    fixtures = _enriched_fixtures(ctx)
+    score_fixtures(fixtures, BENCH_P)
+    out = os.path.join(ctx["workdir"], f"FootBot — Profil Volume — {ctx['date']}.html")
+    wall, _ = _timed(lambda: build_html(out, BENCH_P, fixtures, ctx["date"], send=False), ctx["repeat"])
+    return wall, {"n_fixtures": len(fixtures), "html_kb": round(os.path.getsize(out) / 1024, 1)}
+
+
+def stage_analyse_globale(ctx):
+    """
+    analyse_globale.py est un script (chemins relatifs à son dossier) : copié puis exécuté à part.
+    1er passage : historique vide, tous les rapports relus ; _warm : historique déjà rempli.
+    """
+    import runpy
+    ag_dir = os.path.join(ctx["workdir"], "analyse_globale")
+    if not os.path.isdir(ag_dir):
+        shutil.copytree(os.path.join(BASE_DIR, "rapports_quotidiens"), os.path.join(ag_dir, "rapports_quotidiens"))
+        shutil.copy2(os.path.join(BASE_DIR, "analyse_globale.py"), ag_dir)
+    script = os.path.join(ag_dir, "analyse_globale.py")
+    t0 = time.perf_counter()
+    runpy.run_path(script, run_name="__main__")
+    wall = time.perf_counter() - t0
+    n_reports = len(glob.glob(os.path.join(ag_dir, "rapports_quotidiens", "*.html")))
+    return wall, {"n_reports": n_reports}
+
+
+def run_stage(name, ctx):
+    """Point d'entrée enfant : imports chauds puis étape mesurée ; résultat JSON sur stdout."""
+    if name.startswith("enrichment"):
+        importlib.import_module("enrichment_async")   # imports hors chrono
+    importlib.import_module("main")
+    rss_base = _rss_mb()
+    fn = globals()[f"stage_{name[:-len('_warm')] if name.endswith('_warm') else name}"]
+    wall, info = fn(ctx)
+    rss = _rss_mb()
+    print(RESULT_TAG + json.dumps({
+        "wall_s": round(wall, 4), "rss_mb": round(rss, 1),
+        "rss_stage_mb": round(rss - rss_base, 1), "info": info,
+    }, ensure_ascii=False), flush=True)
+
+
+# ----------------------------------------------------
+# Orchestration (process parent)
+# ----------------------------------------------------
+def _child(name, ctx, env, log):
+    cmd = [sys.executable, os.path.abspath(__file__), "--stage", name, "--date", ctx["date"],
+           "--repeat", str(ctx["repeat"]), "--scale", str(ctx["scale"]), "--workdir", ctx["workdir"]]
+    p = subprocess.run(cmd, cwd=ctx["workdir"], env=env, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    log.write(f"\n===== {name} (code {p.returncode}) =====\n{p.stdout}\n{p.stderr}")
+    for line in reversed(p.stdout.splitlines()):
+        if line.startswith(RESULT_TAG):
+            return json.loads(line[len(RESULT_TAG):])
+    raise RuntimeError(f"étape {name} en échec (code {p.returncode}) :\n{p.stderr[-2000:]}")
+
+
+def run_all(stages, date, repeat, scale, workdir, rate_per_min):
+    from bench_stub_api import StubData, StubServer
+    stub = StubServer(StubData(ref_date=date), rate_per_min=rate_per_min).start()
+    env = dict(os.environ, **stub.env(), FOOTBOT_HTTP_MODE="live", FOOTBOT_DATE=date,
+               FOOTBOT_CACHE_DB=os.path.join(workdir, "footbot_cache.sqlite"),
+               FOOTBOT_LEGACY_CACHE_DIR=os.path.join(workdir, "legacy_cache"),   # cache/*.json du dépôt intacts
+               FOOTBOT_HISTORY_DB=os.path.join(workdir, "signal_history.sqlite"),
+               TELEGRAM_TOKEN="", CHAT_IDS="",      # jamais d'envoi vers les vrais chats (.env)
+               PYTHONIOENCODING="utf-8", PYTHONDONTWRITEBYTECODE="1")
+    ctx = {"date": date, "repeat": repeat, "scale": scale, "workdir": workdir}
+    results = {}
+    try:
+        with open(os.path.join(workdir, "bench.log"), "w", encoding="utf-8") as log:
+            for name in stages:
+                stage_ctx = dict(ctx, repeat=1) if name.startswith(("enrichment", "analyse_globale")) else ctx
+                stub.take_calls()
+                res = _child(name, stage_ctx, env, log)
+                calls = stub.take_calls()
+                res["api_calls"] = sum(calls.values())
+                res["api_by_endpoint"] = dict(sorted(calls.items()))
+                results[name] = res
+                print(f"  {name:<20} {res['wall_s']:>8.3f} s  {res['rss_mb']:>7.1f} Mo  {res['api_calls']:>5} appels")
+    finally:
+        stub.stop()
+    return results
+
+
+def check_budget(results, budget):
+    """Liste des dépassements [(étape, mesure, valeur, budget)]."""
+    over = []
+    for name, res in results.items():
+        for metric, limit in (budget.get(name) or {}).items():
+            if metric in res and limit is not None and res[metric] > limit:
+                over.append((name, metric, res[metric], limit))
+    return over
+
+
+def make_budget(results, margin):
+    """Budget = mesure courante × marge (temps/RSS) ; appels API : +10 % (déterministes)."""
+    out = {"_comment": "Plafonds par étape (bench_pipeline.py). Régénérer : python bench_pipeline.py --write-budget"}
+    for name, res in results.items():
+        out[name] = {
+            "wall_s": round(max(res["wall_s"] * margin, 0.05), 3),
+            "rss_mb": round(res["rss_mb"] * margin, 0),
+            "api_calls": int(res["api_calls"] * 1.1 + 0.999),
+        }
+    return out
+
+
+def print_report(results, baseline=None):
+    print(f"\n{'étape':<20} {'temps (s)':>10} {'RSS (Mo)':>9} {'Δ étape':>8} {'appels':>7}" +
+          ("   vs référence" if baseline else ""))
+    for name, res in results.items():
+        line = (f"{name:<20} {res['wall_s']:>10.3f} {res['rss_mb']:>9.1f} "
+                f"{res.get('rss_stage_mb', 0):>8.1f} {res['api_calls']:>7}")
+        ref = (baseline or {}).get(name)
+        if ref:
+            line += "   " + "  ".join(
+                f"{m} {100 * (res[m] - ref[m]) / ref[m]:+.0f}%" if ref.get(m) else f"{m} {res[m] - ref.get(m, 0):+}"
+                for m in METRICS)
+        print(line)
+        if res.get("api_by_endpoint"):
+            print(f"{'':<20} ↳ " + ", ".join(f"{k} {v}" for k, v in res["api_by_endpoint"].items()))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark du pipeline FootBot (budget de régression).")
+    ap.add_argument("--date", default=DEFAULT_DATE, help="date du snapshot fixtures_raw_<date>.* à rejouer (tous formats)")
+    ap.add_argument("--stages", default=",".join(STAGES), help="étapes, séparées par des virgules")
+    ap.add_argument("--repeat", type=int, default=5, help="répétitions des étapes pures (médiane)")
+    ap.add_argument("--scale", type=int, default=DEFAULT_SCALE, help="volume des étapes pures (× fixtures du jour)")
+    ap.add_argument("--rate-per-min", type=int, default=60000,
+                    help="quota annoncé par le faux serveur (élevé : on mesure le code, pas le limiteur)")
+    ap.add_argument("--budget", default=BUDGET_PATH)
+    ap.add_argument("--write-budget", action="store_true", help="réécrit le budget depuis ce run")
+    ap.add_argument("--margin", type=float, default=2.0, help="marge du budget généré (temps/RSS)")
+    ap.add_argument("--out", help="écrit les mesures JSON (pour --compare plus tard)")
+    ap.add_argument("--compare", help="mesures JSON d'un run précédent")
+    ap.add_argument("--keep", action="store_true", help="conserve le dossier de travail (logs, rapports)")
+    ap.add_argument("--stage", help=argparse.SUPPRESS)
+    ap.add_argument("--workdir", help=argparse.SUPPRESS)
+    a = ap.parse_args(argv)
+
+    if a.stage:
+        return run_stage(a.stage, {"date": a.date, "repeat": a.repeat, "scale": a.scale, "workdir": a.workdir})
+
+    stages = [s.strip() for s in a.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        ap.error(f"étapes inconnues : {', '.join(unknown)} (choix : {', '.join(STAGES)})")
+
+    workdir = tempfile.mkdtemp(prefix="footbot_bench_")
+    print(f"⏱️ Bench pipeline {a.date} — {', '.join(stages)} (dossier : {workdir})")
+    try:
+        results = run_all(stages, a.date, a.repeat, a.scale, workdir, a.rate_per_min)
+    finally:
+        if not a.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results, _load_json(a.compare)["results"] if a.compare else None)
+    if a.out:
+        _dump_json(a.out, {"date": a.date, "repeat": a.repeat, "scale": a.scale, "python": sys.version.split()[0],
+                           "at": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results})
+        print(f"💾 Mesures → {a.out}")
+
+    if a.write_budget:
+        budget = _load_json(a.budget) if os.path.exists(a.budget) else {}
+        budget.update(make_budget(results, a.margin))
+        _dump_json(a.budget, budget)
+        print(f"💾 Budget → {a.budget}")
+        return 0
+
+    if not os.path.exists(a.budget):
+        print("ℹ️ Aucun budget (--write-budget pour en créer un).")
+        return 0
+    over = check_budget(results, _load_json(a.budget))
+    for name, metric, val, limit in over:
+        print(f"❌ {name}.{metric} = {val} > budget {limit}")
+    if not over:
+        print("✅ Budget respecté.")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
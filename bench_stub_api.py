@@ -0,0 +1,319 @@
+# ================================
+# bench_stub_api.py — FootBot PRO
+# Faux serveur API-Football + Understat (local, déterministe) pour les benchs
+#   python bench_stub_api.py [port]   → sert les fixtures_raw_*.json sur 127.0.0.1
+# Les réponses sont synthétiques mais au format réel : forme, H2H, stats, blessures, pages Understat.
+# ================================
+import os
+import sys
+import json
+import random
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+from snapshot_store import list_snapshots, iter_snapshot
+from team_name_map import map_understat_name
+from understat_ext import UNDERSTAT_LEAGUES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEASON_MATCHES = 12        # matchs joués générés par équipe et par ligue
+FAKE_TEAM_BASE = 990000    # adversaires fictifs quand la ligue compte peu d'équipes connues
+
+
+def _seed(*parts):
+    return random.Random("|".join(str(p) for p in parts))
+
+
+def _api_fixture(fid, date, league, home, away, gh, ga, status="FT"):
+    """Item /fixtures au format API-Football (champs lus par api_football_ext)."""
+    played = status == "FT"
+    return {
+        "fixture": {
+            "id": fid, "date": date, "referee": None, "venue": {},
+            "timestamp": int(datetime.fromisoformat(date).timestamp()),
+            "status": {"short": status},
+        },
+        "league": league,
+        "teams": {
+            "home": {"id": home[0], "name": home[1], "winner": (gh > ga) if played else None},
+            "away": {"id": away[0], "name": away[1], "winner": (ga > gh) if played else None},
+        },
+        "goals": {"home": gh if played else None, "away": ga if played else None},
+    }
+
+
+class StubData:
+    """Univers synthétique construit une fois à partir des fixtures sauvegardés."""
+
+    def __init__(self, paths=None, ref_date=None):
+        paths = paths or list_snapshots("fixtures_raw", BASE_DIR)
+        self.by_date = {}
+        self.leagues = {}            # league_id -> {"league": {...}, "teams": {id: name}}
+        self.team_league = {}
+        for p in paths:
+            for fx in iter_snapshot(p):
+                if not fx.get("home_id"):
+                    continue
+                day = (fx.get("date_utc") or "")[:10]
+                self.by_date.setdefault(day, []).append(fx)
+                lg = self.leagues.setdefault(fx["league_id"], {
+                    "league": {"id": fx["league_id"], "name": fx.get("league_name"),
+                               "country": fx.get("country"), "season": fx.get("season")},
+                    "teams": {},
+                })
+                for side in ("home", "away"):
+                    lg["teams"][fx[f"{side}_id"]] = fx[f"{side}_team"]
+                    self.team_league[fx[f"{side}_id"]] = fx["league_id"]
+        self.ref_date = datetime.fromisoformat(ref_date or max(self.by_date or ["2025-11-01"]))
+        self.seasons = {}            # league_id -> [items /fixtures]
+        self.fixture_teams = {}      # fixture_id -> (home_id, away_id)
+        self._lock = threading.Lock()
+
+    # ---------- saison d'une ligue ----------
+    def season(self, league_id):
+        with self._lock:
+            if league_id in self.seasons:
+                return self.seasons[league_id]
+            lg = self.leagues.get(league_id)
+            items = []
+            if lg:
+                rnd = _seed("season", league_id)
+                teams = list(lg["teams"].items())
+                fid = 8_000_000 + league_id * 1000
+                for tid, name in teams:
+                    for k in range(SEASON_MATCHES):
+                        others = [t for t in teams if t[0] != tid]
+                        opp = rnd.choice(others) if len(others) >= 3 else \
+                            (FAKE_TEAM_BASE + rnd.randint(0, 40), f"Adversaire {k}")
+                        home, away = ((tid, name), opp) if k % 2 == 0 else (opp, (tid, name))
+                        date = (self.ref_date - timedelta(days=4 + 7 * k + rnd.randint(0, 2))).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+                        fid += 1
+                        items.append(_api_fixture(fid, date, lg["league"], home, away,
+                                                  min(5, int(rnd.expovariate(0.75))), min(5, int(rnd.expovariate(0.9)))))
+                        self.fixture_teams[fid] = (home[0], away[0])
+            self.seasons[league_id] = items
+            return items
+
+    # ---------- endpoints API-Football ----------
+    def fixtures(self, q):
+        if "date" in q:
+            out = []
+            for fx in self.by_date.get(q["date"], []):
+                if "league" in q and fx["league_id"] != int(q["league"]):
+                    continue
+                lg = self.leagues[fx["league_id"]]["league"]
+                out.append(_api_fixture(fx["id"], fx["date_utc"], lg, (fx["home_id"], fx["home_team"]),
+                                        (fx["away_id"], fx["away_team"]), fx.get("score_home") or 0,
+                                        fx.get("score_away") or 0, fx.get("status") or "NS"))
+            return out
+        league_id = int(q["league"]) if "league" in q else self.team_league.get(int(q.get("team", 0)))
+        items = self.season(league_id) if league_id else []
+        if "team" in q:
+            tid = int(q["team"])
+            items = [it for it in items if tid in (it["teams"]["home"]["id"], it["teams"]["away"]["id"])]
+        if "from" in q:
+            items = [it for it in items if it["fixture"]["date"][:10] >= q["from"]]
+        items = sorted(items, key=lambda it: it["fixture"]["date"], reverse=True)
+        return items[:int(q["last"])] if "last" in q else items
+
+    def league_list(self, q):
+        """/leagues?current=true : ligues connues, saison courante marquée."""
+        return [{
+            "league": {"id": lid, "name": lg["league"]["name"], "type": "League"},
+            "country": {"name": lg["league"]["country"]},
+            "seasons": [{"year": lg["league"]["season"], "current": True}],
+        } for lid, lg in sorted(self.leagues.items())]
+
+    def headtohead(self, q):
+        a, b = (int(x) for x in q["h2h"].split("-"))
+        rnd = _seed("h2h", min(a, b), max(a, b))
+        out = []
+        for k in range(rnd.randint(0, int(q.get("last", 10)))):
+            home, away = ((a, ""), (b, "")) if k % 2 == 0 else ((b, ""), (a, ""))
+            date = (self.ref_date - timedelta(days=200 * (k + 1))).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+            out.append(_api_fixture(7_000_000 + k, date, {}, home, away, rnd.randint(0, 3), rnd.randint(0, 3)))
+        return out
+
+    def fixture_statistics(self, q):
+        fid = int(q["fixture"])
+        teams = self.fixture_teams.get(fid)
+        if not teams:
+            return []
+        rnd = _seed("stats", fid)
+        return [{"team": {"id": tid}, "statistics": [
+            {"type": "Shots on Goal", "value": rnd.randint(1, 9)},
+            {"type": "Total Shots", "value": rnd.randint(6, 20)},
+        ]} for tid in teams]
+
+    def injuries(self, q):
+        if "team" in q:
+            teams = [int(q["team"])]
+        elif "league" in q:
+            teams = list(self.leagues.get(int(q["league"]), {}).get("teams", {}))
+        else:
+            teams = [t for fx in self.by_date.get(q.get("date"), []) for t in (fx["home_id"], fx["away_id"])]
+        rows = []
+        for tid in teams:
+            rnd = _seed("inj", tid)
+            rows += [{"team": {"id": tid}, "player": {"name": f"Joueur {tid}-{i}"}} for i in range(rnd.randint(0, 3))]
+        return rows
+
+    def standings(self, q):
+        lg = self.leagues.get(int(q.get("league", 0)))
+        if not lg:
+            return []
+        rnd = _seed("table", q.get("league"))
+        table = [{"team": {"id": tid, "name": n}, "points": rnd.randint(3, 40)} for tid, n in lg["teams"].items()]
+        return [{"league": dict(lg["league"], standings=[table])}]
+
+    def api(self, path, q):
+        routes = {
+            "/fixtures": self.fixtures,
+            "/leagues": self.league_list,
+            "/fixtures/headtohead": self.headtohead,
+            "/fixtures/statistics": self.fixture_statistics,
+            "/injuries": self.injuries,
+            "/standings": self.standings,
+            "/teams/statistics": lambda q: {"team": {"id": int(q.get("team", 0))}, "fixtures": {}, "goals": {}},
+            "/odds": lambda q: [],
+        }
+        fn = routes.get(path)
+        if fn is None:
+            return None
+        resp = fn(q)
+        return {"get": path.lstrip("/"), "parameters": q, "errors": [],
+                "results": len(resp) if isinstance(resp, list) else 1, "response": resp}
+
+    # ---------- pages Understat ----------
+    def _understat_matches(self, titles, seed, n):
+        rnd = _seed("us", seed)
+        out = []
+        for i in range(n):
+            h, a = rnd.sample(titles, 2) if len(titles) >= 2 else (titles[0], f"Adversaire {i}")
+            out.append({
+                "id": str(i), "isResult": i < n * 0.8,
+                "h": {"title": h}, "a": {"title": a},
+                "goals": {"h": str(rnd.randint(0, 4)), "a": str(rnd.randint(0, 3))},
+                "xG": {"h": f"{rnd.uniform(0.2, 3.0):.6f}", "a": f"{rnd.uniform(0.2, 2.5):.6f}"},
+                "datetime": (self.ref_date - timedelta(days=i * 3)).strftime("%Y-%m-%d 20:00:00"),
+            })
+        return out
+
+    def understat(self, path):
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        if len(parts) < 3:
+            return None
+        if parts[0] == "league":
+            wanted = {key for key, slug in UNDERSTAT_LEAGUES.items() if slug == parts[1]}
+            titles = sorted({map_understat_name(t) for lg in self.leagues.values()
+                             if (lg["league"]["country"], lg["league"]["name"]) in wanted
+                             for t in lg["teams"].values()})
+            if len(titles) < 2:
+                titles += [f"Équipe {i}" for i in range(20)]
+            return "datesData", self._understat_matches(titles, parts[1], 380)
+        if parts[0] == "team":
+            return "matchesData", self._understat_matches([parts[1]], parts[1], 38)
+        return None
+
+
+def _js_payload(obj):
+    """Encodage Understat : JSON.parse('\\xNN...')."""
+    return "".join("\\x%02x" % b for b in json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+
+class StubServer:
+    """ThreadingHTTPServer sur un port libre ; compte les appels par endpoint."""
+
+    def __init__(self, data, rate_per_min=6000, port=0):
+        self.data = data
+        self.rate_per_min = rate_per_min
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = 64 * 1024   # en-têtes + corps en un seul envoi (sinon Nagle/ACK retardé : ~40 ms par requête)
+
+            def log_message(self, *a):
+                pass
+
+            def _send(self, status, body, ctype):
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-RateLimit-Limit", str(stub.rate_per_min))
+                self.send_header("X-RateLimit-Remaining", str(stub.rate_per_min))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                q = dict(parse_qsl(parts.query))
+                if parts.path.startswith("/understat/"):
+                    sub = parts.path[len("/understat"):]
+                    stub.count("understat/" + sub.strip("/").split("/")[0])
+                    page = stub.data.understat(sub)
+                    if page is None:
+                        return self._send(404, b"Not found", "text/plain")
+                    var, obj = page
+                    html = f"<html><body><script>var {var} = JSON.parse('{_js_payload(obj)}');</script></body></html>"
+                    return self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+                stub.count(parts.path)
+                try:
+                    j = stub.data.api(parts.path, q)
+                except Exception as e:
+                    j = {"errors": {"stub": str(e)}, "response": []}
+                if j is None:
+                    return self._send(404, b'{"message":"unknown endpoint"}', "application/json")
+                self._send(200, json.dumps(j).encode("utf-8"), "application/json")
+
+        return Handler
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def take_calls(self):
+        """Compteurs depuis le dernier appel (puis remise à zéro)."""
+        with self._lock:
+            out, self.calls = dict(self.calls), Counter()
+        return out
+
+    def env(self):
+        """Variables à passer aux process benchés pour les brancher sur ce serveur."""
+        return {
+            "API_FOOTBALL_BASE": self.base,
+            "UNDERSTAT_BASE": f"{self.base}/understat",
+            "API_FOOTBALL_KEY": "bench",
+            "API_RATE_PER_MIN": str(self.rate_per_min),
+            "API_RATE_BURST": str(max(10, self.rate_per_min // 60)),
+        }
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    srv = StubServer(StubData(), port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Stub API-Football/Understat sur {srv.base}  (Ctrl+C pour arrêter)")
+    for k, v in srv.env().items():
+        print(f"  {k}={v}")
+    try:
+        srv.httpd.serve_forever()
+    except KeyboardInterrupt:
+        srv.stop()
@@ -0,0 +1,88 @@
+# ================================
+# bench_understat_parse.py — FootBot PRO
+# Micro-benchmark : extraction Understat BeautifulSoup vs scan d'octets
+#   python bench_understat_parse.py [page1.html page2.html ...]
+# Sans argument : page synthétique au format Understat (3 payloads).
+# ================================
+import re
+import sys
+import json
+import time
+import random
+from bs4 import BeautifulSoup
+from understat_parse import KNOWN_VARS, extract_vars
+
+REPEAT = 20
+
+
+def _hex_payload(obj):
+    return "".join("\\x%02x" % b for b in json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+
+def synthetic_page(n_matches=380, n_players=550):
+    """Page ~ taille réelle : blocs HTML + 3 scripts JSON.parse('\\xNN...')."""
+    rnd = random.Random(42)
+    teams = [f"Team {i} Saint-Étienne" if i % 7 == 0 else f"Team {i}" for i in range(20)]
+    matches = []
+    for i in range(n_matches):
+        h, a = rnd.sample(teams, 2)
+        played = i < n_matches * 0.6
+        matches.append({
+            "id": str(i), "isResult": played,
+            "h": {"id": h, "title": h}, "a": {"id": a, "title": a},
+            "goals": {"h": str(rnd.randint(0, 4)), "a": str(rnd.randint(0, 3))} if played else {"h": None, "a": None},
+            "xG": {"h": f"{rnd.random() * 3:.6f}", "a": f"{rnd.random() * 2:.6f}"} if played else {"h": None, "a": None},
+            "datetime": "2025-08-15 19:00:00",
+        })
+    teams_data = {
+        str(i): {"id": str(i), "title": t, "history": [{"h_a": "h", "xG": rnd.random() * 2, "xGA": rnd.random()} for _ in range(10)]}
+        for i, t in enumerate(teams)
+    }
+    players = [{"id": str(i), "player_name": f"Joueur {i}", "xG": f"{rnd.random():.4f}"} for i in range(n_players)]
+    filler = "".join(f"<div class='row'><span>{i}</span><a href='/x/{i}'>lien</a></div>" for i in range(1500))
+    return (
+        "<html><head><title>Understat</title></head><body>" + filler +
+        f"<script>var datesData = JSON.parse('{_hex_payload(matches)}');</script>"
+        f"<script>var teamsData = JSON.parse('{_hex_payload(teams_data)}');</script>"
+        f"<script>var playersData = JSON.parse('{_hex_payload(players)}');</script>"
+        "</body></html>"
+    ).encode("utf-8")
+
+
+def extract_bs(page, names=KNOWN_VARS):
+    """Ancien chemin : arbre html.parser complet, puis découpe du script."""
+    soup = BeautifulSoup(page.decode("utf-8"), "html.parser")
+    out = {}
+    for sc in soup.find_all("script"):
+        js = sc.string or ""
+        for name in names:
+            if name in out or name not in js:
+                continue
+            start = js.index("JSON.parse('", js.index(name)) + len("JSON.parse('")
+            end = js.index("')", start)
+            raw = re.sub(r"\\x([0-9A-Fa-f]{2})", lambda m: chr(int(m.group(1), 16)), js[start:end])
+            out[name] = json.loads(raw.encode("latin-1").decode("utf-8"))
+    return out
+
+
+def _bench(fn, page):
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        res = fn(page)
+    return (time.perf_counter() - t0) / REPEAT * 1000, res
+
+
+def main(paths):
+    pages = [(p, open(p, "rb").read()) for p in paths] or [("synthétique", synthetic_page())]
+    for label, page in pages:
+        t_bs, ref = _bench(extract_bs, page)
+        t_re, new = _bench(extract_vars, page)
+        ok = "✅" if ref == new else "❌"
+        print(f"{label:<30} {len(page) / 1024:>8.0f} Ko  BS: {t_bs:7.1f} ms  octets: {t_re:6.1f} ms  "
+              f"x{t_bs / max(t_re, 1e-9):5.1f}  parité {ok} ({', '.join(sorted(new))})")
+        if ref != new:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -6,10 +6,11 @@
 #   - Injecte: odds_home, odds_draw, odds_away, odds_over_1_5, odds_btts_yes
 # ============================================
 
-import os, re, json, time, unicodedata
+import os, re, time, unicodedata
 from datetime import datetime, timezone, timedelta
 import requests
 from dotenv import load_dotenv
+from cache_store import CACHE
 
 # ---------- ENV ----------
 BASE_DIR = os.path.dirname(__file__)
@@ -36,21 +37,15 @@ _INDEX_BY_DAY_MEM = {}   # date -> index {(home,away): [items]}
 
 
 # ---------- UTILS ----------
+# Anciens fichiers JSON → cache SQLite (namespace "bet365", clé = nom du fichier)
 def _load_json(path, default):
-    try:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return default
+    name = os.path.basename(path)
+    CACHE.import_json_file("bet365", path, key=name)
+    data = CACHE.get("bet365", name)
+    return default if data is None else data
 
 def _save_json(path, data):
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
-    except Exception:
-        pass
+    CACHE.set("bet365", os.path.basename(path), data)
 
 def _norm(s: str) -> str:
     if not s:
@@ -0,0 +1,323 @@
+# ================================
+# cache_store.py — FootBot PRO
+# Cache unifié SQLite (WAL) : namespaces, TTL, compression, éviction
+# ================================
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from config import CACHE_TTL_DAYS
+from metrics import METRICS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ----------------------------------------------------
+# Configuration (.env)
+# ----------------------------------------------------
+CACHE_DB = os.getenv("FOOTBOT_CACHE_DB", os.path.join(BASE_DIR, "cache", "footbot_cache.sqlite"))
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "256"))            # au-delà : éviction LRU
+CACHE_COMPRESS_MIN = int(os.getenv("CACHE_COMPRESS_MIN", "1024"))  # octets JSON avant compression zlib
+CACHE_BUSY_TIMEOUT_MS = int(os.getenv("CACHE_BUSY_TIMEOUT_MS", "10000"))
+EVICT_EVERY = 200          # vérification de taille toutes les N écritures
+TOUCH_EVERY = 3600         # mise à jour de 'accessed' au plus 1 fois/heure par entrée
+
+DAY = 86400.0
+DEFAULT_TTL = CACHE_TTL_DAYS * DAY
+
+# TTL par namespace (secondes) ; None = immuable (jamais expiré)
+NAMESPACE_TTL = {
+    "default": DEFAULT_TTL,
+    "fixture_stats": None,       # stats d'un match terminé
+    "league_fixtures": None,     # fraîcheur gérée par l'appelant (fetched_at)
+    "league_ids": 7 * DAY,       # ligues pertinentes → saison courante (/leagues)
+    "injuries": 12 * 3600.0,
+    "h2h": DAY,
+    "team_form": 6 * 3600.0,
+    "call": 6 * 3600.0,
+    "odds": DAY,
+    "understat": 7 * DAY,
+    "bet365": DEFAULT_TTL,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ns       TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    codec    INTEGER NOT NULL,      -- 0 = JSON brut, 1 = JSON zlib
+    value    BLOB NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    expires  REAL,                  -- NULL = jamais
+    accessed REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_MISSING = object()
+
+
+def ttl_for(ns):
+    return NAMESPACE_TTL.get(ns, DEFAULT_TTL)
+
+
+def _encode(value):
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    if len(raw) >= CACHE_COMPRESS_MIN:
+        return 1, zlib.compress(raw, 6)
+    return 0, raw
+
+
+def _decode(codec, blob):
+    raw = zlib.decompress(blob) if codec == 1 else bytes(blob)
+    return json.loads(raw.decode("utf-8"))
+
+
+class CacheStore:
+    """
+    Cache clé/valeur persistant partagé entre threads et entre process
+    (main.py --refresh, analyse_globale, scheduler, server).
+    Une connexion SQLite par thread (et par process) ; WAL + busy_timeout
+    pour que lecteurs et écrivain ne se bloquent pas.
+    """
+
+    def __init__(self, path=CACHE_DB, max_mb=CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+        self._writes = 0
+
+    # ---------- connexion ----------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=CACHE_BUSY_TIMEOUT_MS / 1000.0, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={CACHE_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.executescript(_SCHEMA)
+                    self._ready = True
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    # ---------- lecture / écriture ----------
+    def get(self, ns, key, default=None, max_age=_MISSING):
+        """
+        Valeur de (ns, key) ou `default` si absente/expirée.
+        max_age (s) : âge max imposé par l'appelant (None = pas de limite) ;
+        sinon l'expiration fixée à l'écriture fait foi.
+        """
+        value = self._lookup(ns, key, max_age)
+        METRICS.inc("cache_lookups", ns=ns, result="miss" if value is _MISSING else "hit")
+        return default if value is _MISSING else value
+
+    def _lookup(self, ns, key, max_age):
+        try:
+            row = self._conn().execute(
+                "SELECT codec, value, created, expires, accessed FROM entries WHERE ns=? AND key=?",
+                (ns, str(key)),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"[⚠️ Cache] lecture {ns}:{key} : {e}")
+            return _MISSING
+        if row is None:
+            return _MISSING
+
+        codec, blob, created, expires, accessed = row
+        now = time.time()
+        if max_age is _MISSING:
+            if expires is not None and now > expires:
+                return _MISSING
+        elif max_age is not None and now - created > max_age:
+            return _MISSING
+
+        if now - accessed > TOUCH_EVERY:
+            try:
+                self._conn().execute("UPDATE entries SET accessed=? WHERE ns=? AND key=?", (now, ns, str(key)))
+            except sqlite3.Error:
+                pass
+        try:
+            return _decode(codec, blob)
+        except Exception:
+            return _MISSING
+
+    def set(self, ns, key, value, ttl=_MISSING, created=None):
+        """
+        Écrit (ns, key). ttl (s) : None = jamais expiré ; défaut = TTL du namespace.
+        created (timestamp) : date d'origine de la donnée si elle est plus ancienne que l'écriture
+        (âge et expiration comptés depuis cette date) ; défaut = maintenant.
+        """
+        if ttl is _MISSING:
+            ttl = ttl_for(ns)
+        try:
+            codec, blob = _encode(value)
+        except (TypeError, ValueError) as e:
+            print(f"[⚠️ Cache] valeur non sérialisable {ns}:{key} : {e}")
+            return
+        now = time.time()
+        created = now if created is None else float(created)
+        expires = None if ttl is None else created + ttl
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO entries (ns, key, codec, value, size, created, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (ns, str(key), codec, sqlite3.Binary(blob), len(blob), created, expires, now),
+            )
+        except sqlite3.Error as e:
+            print(f"[⚠️ Cache] écriture {ns}:{key} : {e}")
+            return
+        self._after_write(1)
+
+    def set_many(self, ns, items, ttl=_MISSING):
+        """Écrit plusieurs (key, value) en une seule transaction."""
+        if ttl is _MISSING:
+            ttl = ttl_for(ns)
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        rows = []
+        for key, value in items:
+            codec, blob = _encode(value)
+            rows.append((ns, str(key), codec, sqlite3.Binary(blob), len(blob), now, expires, now))
+        if not rows:
+            return
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (ns, key, codec, value, size, created, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            print(f"[⚠️ Cache] écriture groupée {ns} : {e}")
+            return
+        self._after_write(len(rows))
+
+    def _after_write(self, n):
+        with self._init_lock:
+            self._writes += n
+            due = self._writes >= EVICT_EVERY
+            if due:
+                self._writes = 0
+        if due:
+            self.evict()
+
+    def delete(self, ns, key):
+        self._conn().execute("DELETE FROM entries WHERE ns=? AND key=?", (ns, str(key)))
+
+    def clear(self, ns=None):
+        if ns is None:
+            self._conn().execute("DELETE FROM entries")
+        else:
+            self._conn().execute("DELETE FROM entries WHERE ns=?", (ns,))
+
+    def items(self, ns):
+        """Toutes les entrées non expirées d'un namespace : {key: value}."""
+        now = time.time()
+        rows = self._conn().execute(
+            "SELECT key, codec, value FROM entries WHERE ns=? AND (expires IS NULL OR expires >= ?)",
+            (ns, now),
+        ).fetchall()
+        out = {}
+        for key, codec, blob in rows:
+            try:
+                out[key] = _decode(codec, blob)
+            except Exception:
+                continue
+        return out
+
+    # ---------- maintenance ----------
+    def evict(self):
+        """Purge les entrées expirées puis les moins récemment lues au-delà de max_bytes."""
+        conn = self._conn()
+        try:
+            conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            target = int(self.max_bytes * 0.9)
+            rows = conn.execute("SELECT ns, key, size FROM entries ORDER BY accessed ASC").fetchall()
+            victims = []
+            for ns, key, size in rows:
+                if total <= target:
+                    break
+                victims.append((ns, key))
+                total -= size
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM entries WHERE ns=? AND key=?", victims)
+            conn.execute("COMMIT")
+            removed = len(victims)
+            print(f"[🧹 Cache] {removed} entrée(s) évincée(s) (limite {self.max_bytes // (1024 * 1024)} Mo)")
+            return removed
+        except sqlite3.Error as e:
+            print(f"[⚠️ Cache] éviction : {e}")
+            return 0
+
+    def stats(self):
+        rows = self._conn().execute(
+            "SELECT ns, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY ns ORDER BY ns"
+        ).fetchall()
+        return {ns: {"entries": n, "bytes": size} for ns, n, size in rows}
+
+    # ---------- migration des anciens fichiers JSON ----------
+    def marked(self, name):
+        """True si le marqueur `name` (table meta) existe déjà."""
+        return self._conn().execute("SELECT 1 FROM meta WHERE name=?", (name,)).fetchone() is not None
+
+    def mark(self, name):
+        self._conn().execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(time.time())))
+
+    def import_json_file(self, ns, path, key=None, ttl=_MISSING):
+        """
+        Importe une seule fois un ancien cache JSON (marqueur dans `meta`).
+        key=None : chaque clé du dict devient une entrée ; sinon tout le fichier sous `key`.
+        """
+        marker = f"imported:{ns}:{os.path.basename(path)}"
+        if self.marked(marker):
+            return 0
+        n = 0
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if key is not None:
+                    if data:
+                        self.set(ns, key, data, ttl=ttl)
+                        n = 1
+                elif isinstance(data, dict):
+                    self.set_many(ns, data.items(), ttl=ttl)
+                    n = len(data)
+        except Exception as e:
+            print(f"[⚠️ Cache] import {path} : {e}")
+        self.mark(marker)
+        if n:
+            print(f"[📦 Cache] {n} entrée(s) importée(s) depuis {os.path.basename(path)} → {ns}")
+        return n
+
+
+# Instance unique du process
+CACHE = CacheStore()
+
+
+if __name__ == "__main__":
+    for ns, st in CACHE.stats().items():
+        print(f"{ns:<16} {st['entries']:>7} entrées  {st['bytes'] / 1024:>10.1f} Ko")
@@ -0,0 +1,172 @@
+# ================================
+# calibration_artifact.py — FootBot PRO
+# Artefact machine de l'analyse globale : seuils optimaux, facteurs de calibration, fourchettes d'IC
+#   écrit par analyse_globale.py (fichier temporaire puis remplacement atomique)
+#   lu une fois au démarrage par main.py, validé (schéma + version + types) → plus de scraping du HTML
+#   python calibration_artifact.py [fichier]  → validation + résumé
+# ================================
+import os
+import sys
+import json
+import math
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ARTIFACT_PATH = os.getenv("FOOTBOT_CALIBRATION_PATH", os.path.join(BASE_DIR, "analyse_globale_footbot.json"))
+ARTIFACT_SCHEMA = "footbot.calibration"
+ARTIFACT_VERSION = 1          # à incrémenter si un champ change de sens ; main refuse une autre version
+
+NUMBER = (int, float)
+
+# Champs par type de pari (tous optionnels : None si non calculable) → type attendu, plage éventuelle
+TYPE_FIELDS = {
+    "matchs":             (int, None),
+    "taux_moy":           (NUMBER, (0, 100)),
+    "ic_moy":             (NUMBER, (0, 100)),
+    "seuil_optimal":      (NUMBER, (0, 100)),     # best_threshold (tableau « Seuil optimal »)
+    "taux_au_seuil":      (NUMBER, (0, 100)),
+    "volume_seuil":       (int, None),
+    "seuil_dynamique":    (NUMBER, (0, 100)),     # find_optimal_threshold (recalibrage par marché)
+    "zone_defaites":      (str, None),
+    "defaites_zone":      (int, None),
+    "part_defaites_zone": (NUMBER, (0, 100)),
+}
+
+BUCKET_FIELDS = {
+    "type":          (str, None),
+    "fourchette":    (str, None),
+    "matchs":        (int, None),
+    "taux_reussite": (NUMBER, (0, 100)),
+    "part_du_total": (NUMBER, (0, 100)),
+}
+
+
+def _clean(v):
+    """numpy / pandas → types JSON natifs ; NaN → None."""
+    if v is None:
+        return None
+    if hasattr(v, "item"):                     # np.int64, np.float64, np.bool_
+        v = v.item()
+    if isinstance(v, float) and not math.isfinite(v):
+        return None
+    return v
+
+
+def _check(where, record, fields):
+    if not isinstance(record, dict):
+        raise ValueError(f"{where} : objet attendu")
+    for name, value in record.items():
+        if name not in fields:
+            raise ValueError(f"{where}.{name} : champ inconnu")
+        kind, bounds = fields[name]
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, kind):
+            raise ValueError(f"{where}.{name} : type {type(value).__name__} invalide")
+        if bounds and not (bounds[0] <= value <= bounds[1]):
+            raise ValueError(f"{where}.{name} : {value} hors de [{bounds[0]} ; {bounds[1]}]")
+
+
+def validate_artifact(data):
+    """Lève ValueError au premier écart (schéma, version, types, plages) ; retourne data sinon."""
+    if not isinstance(data, dict):
+        raise ValueError("racine : objet attendu")
+    if data.get("schema") != ARTIFACT_SCHEMA:
+        raise ValueError(f"schema {data.get('schema')!r} ≠ {ARTIFACT_SCHEMA!r}")
+    if data.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"version {data.get('version')!r} non supportée (attendu {ARTIFACT_VERSION})")
+    try:
+        datetime.fromisoformat(data["generated_at"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("generated_at : horodatage ISO 8601 attendu")
+    if not isinstance(data.get("n_signals"), int) or isinstance(data.get("n_signals"), bool):
+        raise ValueError("n_signals : entier attendu")
+
+    calibration = data.get("calibration")
+    if not isinstance(calibration, dict):
+        raise ValueError("calibration : objet attendu")
+    for k, v in calibration.items():
+        if isinstance(v, bool) or not isinstance(v, NUMBER) or not (0 < v < 10):
+            raise ValueError(f"calibration.{k} : facteur {v!r} invalide")
+
+    types = data.get("types")
+    if not isinstance(types, dict):
+        raise ValueError("types : objet attendu")
+    for t, record in types.items():
+        _check(f"types[{t}]", record, TYPE_FIELDS)
+
+    buckets = data.get("buckets")
+    if not isinstance(buckets, list):
+        raise ValueError("buckets : liste attendue")
+    for i, record in enumerate(buckets):
+        _check(f"buckets[{i}]", record, BUCKET_FIELDS)
+    return data
+
+
+# ----------------------------------------------------
+# Écriture (analyse_globale)
+# ----------------------------------------------------
+def build_artifact(period, n_signals, calibration, types, buckets):
+    """Assemble et valide l'artefact (un artefact invalide n'est jamais écrit)."""
+    return validate_artifact({
+        "schema": ARTIFACT_SCHEMA,
+        "version": ARTIFACT_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "period": period,
+        "n_signals": int(n_signals),
+        "calibration": {str(k): _clean(v) for k, v in calibration.items()},
+        "types": {str(t): {f: _clean(v) for f, v in rec.items()} for t, rec in types.items()},
+        "buckets": [{f: _clean(v) for f, v in rec.items()} for rec in buckets],
+    })
+
+
+def write_artifact(artifact, path=ARTIFACT_PATH):
+    """Fichier temporaire puis os.replace : main.py lit l'ancien ou le nouvel artefact, jamais un mélange."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+# ----------------------------------------------------
+# Lecture (main)
+# ----------------------------------------------------
+def load_artifact(path=ARTIFACT_PATH):
+    """Artefact validé, ou None (absent / illisible / invalide : avertissement, jamais d'exception)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return validate_artifact(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"[⚠️ Calibration] {os.path.basename(path)} ignoré : {e}")
+        return None
+
+
+def optimal_thresholds(artifact):
+    """{Type -> Seuil_optimal} (types sans seuil omis) ; {} sans artefact."""
+    if not artifact:
+        return {}
+    return {t: rec["seuil_optimal"] for t, rec in artifact["types"].items()
+            if rec.get("seuil_optimal") is not None}
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else ARTIFACT_PATH
+    art = load_artifact(path)
+    if art is None:
+        print(f"❌ Aucun artefact valide : {path}")
+        sys.exit(1)
+    print(f"✅ {path} — v{art['version']} généré le {art['generated_at']} · {art['period']} · "
+          f"{art['n_signals']} signaux")
+    for t, rec in art["types"].items():
+        print(f"  {t:<15} seuil {rec.get('seuil_optimal')!s:>5} · dynamique {rec.get('seuil_dynamique')!s:>5} · "
+              f"k {art['calibration'].get(t.lower(), '—')}")
+    sys.exit(0)
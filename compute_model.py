@@ -1,5 +1,5 @@
-import math
-from utils import logistic, normalize_implied_probs, poisson_over
+from utils import logistic, normalize_implied_probs
+from scoreline import fixture_markets, top_scores
 
 # Poids & seuils
 W_FORM, W_XG, W_H2H, W_DEF, W_BOOK = 0.35, 0.25, 0.15, 0.15, 0.10
@@ -68,11 +68,11 @@ def analyze_fixture(fx: dict):
     if missing >= 2:
         IC, signal = "NoSignal", "LOWDATA"
 
-    # Over/BTTS
-    lam_total = xg_home + xg_away
-    p_over_1_5 = poisson_over(lam_total, 1.5)
-    p_over_2_5 = poisson_over(lam_total, 2.5)
-    p_BTTS = 1 - math.exp(-xg_home) - math.exp(-xg_away) + math.exp(-(xg_home + xg_away))
+    # Over/BTTS/score exact : une seule matrice des scores (Dixon-Coles si DIXON_COLES_RHO ≠ 0)
+    mk = fixture_markets(xg_home, xg_away)
+    p_over_1_5 = float(mk["over_1.5"][0])
+    p_over_2_5 = float(mk["over_2.5"][0])
+    p_BTTS = float(mk["btts_yes"][0])
 
     suggest_over_1_5 = "Très conservateur (YES)" if p_over_1_5 >= 0.80 else ("Conservateur (YES)" if p_over_1_5 >= 0.70 else "NO")
     suggest_over_2_5 = "Très conservateur (YES)" if p_over_2_5 >= 0.80 else ("Conservateur (YES)" if p_over_2_5 >= 0.70 else "NO")
@@ -93,6 +93,10 @@ def analyze_fixture(fx: dict):
         "suggest_over_2_5": suggest_over_2_5,
         "p_BTTS": round(p_BTTS,3),
         "suggest_BTTS": suggest_BTTS,
+        "p_over_3_5": round(float(mk["over_3.5"][0]), 3),
+        "p_home_scores": round(float(mk["home_scores"][0]), 3),
+        "p_away_scores": round(float(mk["away_scores"][0]), 3),
+        "top_scores": [(sc, round(p, 3)) for sc, p in top_scores(mk["correct_score"])[0]],
         "corroboration_votes": votes,
         "notes": f"N={N_matches},H2H={H2H_count},injury={F_injury}"
     }
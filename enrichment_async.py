@@ -0,0 +1,142 @@
+# ================================
+# enrichment_async.py — FootBot PRO
+# Enrichissement concurrent des fixtures (asyncio)
+# ================================
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from api_football_ext import add_injuries_influents, get_btts_h2h, get_recent_form, get_team_expected
+from understat_ext import get_team_splits
+from metrics import METRICS
+
+# Nombre max d'appels réseau simultanés (tous fixtures confondus)
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "16"))
+
+
+def merge_xg(us_val, api_val):
+    """Fusion xG Understat (70 %) / API-Football (30 %)."""
+    if us_val and api_val:
+        return round(0.7 * us_val + 0.3 * api_val, 2)
+    return round(us_val or api_val or 1.2, 2)
+
+
+async def _run(sem, executor, fn, *args):
+    """Exécute un appel bloquant (client HTTP partagé) sous le plafond global."""
+    async with sem:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, fn, *args)
+
+
+async def _enrich_one(fx, sem, executor, european_hook=None):
+    """
+    Enrichit un fixture : blessures, forme home/away, xG API, splits Understat, H2H.
+    Tous les appels indépendants du match partent en même temps.
+    Retourne "understat" ou "api" selon la source xG retenue.
+    """
+    league_id, season = fx["league_id"], fx["season"]
+
+    tasks = [
+        _run(sem, executor, add_injuries_influents, fx),
+        _run(sem, executor, get_recent_form, fx["home_id"], league_id, season, "home"),
+        _run(sem, executor, get_recent_form, fx["away_id"], league_id, season, "away"),
+        _run(sem, executor, get_team_expected, fx["home_id"], league_id, season),
+        _run(sem, executor, get_team_expected, fx["away_id"], league_id, season),
+        _run(sem, executor, get_team_splits, fx["home_team"], season, fx.get("league_name"), fx.get("country")),
+        _run(sem, executor, get_team_splits, fx["away_team"], season, fx.get("league_name"), fx.get("country")),
+        _run(sem, executor, get_btts_h2h, fx["home_id"], fx["away_id"]),
+    ]
+    _, home_form, away_form, api_home, api_away, us_home, us_away, h2h = await asyncio.gather(
+        *tasks, return_exceptions=True
+    )
+    fx["_h2h"] = {} if isinstance(h2h, BaseException) else h2h
+
+    for res in (home_form, away_form, api_home, api_away):
+        if isinstance(res, BaseException):
+            raise res
+    fx["home_form"] = home_form
+    fx["away_form"] = away_form
+
+    if isinstance(us_home, BaseException) or isinstance(us_away, BaseException):
+        print(f"[⚠️] Understat indisponible pour {fx['home_team']} ou {fx['away_team']}")
+        us_home = us_away = {}
+
+    # Contexte européen : dépend de la forme, donc après le gather
+    if european_hook is not None:
+        await _run(sem, executor, european_hook, fx)
+
+    fx["xg_home"] = merge_xg(us_home.get("xg_overall", 0), api_home.get("xg_for", 0))
+    fx["xga_home"] = merge_xg(us_home.get("xga_overall", 0), api_home.get("xga", 0))
+    fx["xg_away"] = merge_xg(us_away.get("xg_overall", 0), api_away.get("xg_for", 0))
+    fx["xga_away"] = merge_xg(us_away.get("xga_overall", 0), api_away.get("xga", 0))
+
+    print(f"[⚙️ Fusion xG] {fx['home_team']} {fx['xg_home']}/{fx['xga_home']}  vs  {fx['away_team']} {fx['xg_away']}/{fx['xga_away']}")
+
+    if (
+        (us_home and us_home.get("xg_overall", 0) > 0)
+        or (us_away and us_away.get("xg_overall", 0) > 0)
+    ):
+        return "understat"
+    return "api"
+
+
+async def _enrich_timed(fx, sem, executor, european_hook):
+    """_enrich_one chronométré par ligue (attente du sémaphore comprise)."""
+    with METRICS.timer("enrich_fixture_s", league=fx.get("league_name")):
+        return await _enrich_one(fx, sem, executor, european_hook)
+
+
+async def _enrich_all(fixtures, max_concurrency, european_hook):
+    sem = asyncio.Semaphore(max_concurrency)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = await asyncio.gather(
+            *[_enrich_timed(fx, sem, executor, european_hook) for fx in fixtures],
+            return_exceptions=True,
+        )
+
+    counts = {"understat": 0, "api": 0, "errors": 0}
+    for fx, res in zip(fixtures, results):
+        if isinstance(res, BaseException):
+            print(f"[❌ Enrichissement] {fx.get('home_team')} vs {fx.get('away_team')} : {res}")
+            counts["errors"] += 1
+            continue
+        counts[res] += 1
+    return counts
+
+
+def enrich_fixtures(fixtures, max_concurrency=ENRICH_CONCURRENCY, european_hook=None):
+    """
+    Enrichit tous les fixtures en parallèle (plafond global = max_concurrency).
+    Mêmes champs que la boucle séquentielle : injuries, home_form, away_form,
+    xg_home, xga_home, xg_away, xga_away — plus _h2h (lu par scoring.py).
+    european_hook(fx) : ajustement optionnel appelé une fois la forme connue.
+    Retourne {"understat": n, "api": n, "errors": n}.
+    """
+    if not fixtures:
+        return {"understat": 0, "api": 0, "errors": 0}
+    return asyncio.run(_enrich_all(fixtures, max(1, int(max_concurrency)), european_hook))
+
+
+# ----------------------------------------------------
+# Préchargement H2H (avant scoring, pour les fixtures non enrichis)
+# ----------------------------------------------------
+async def _prefetch_h2h_all(fixtures, max_concurrency):
+    sem = asyncio.Semaphore(max_concurrency)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = await asyncio.gather(
+            *[_run(sem, executor, get_btts_h2h, fx["home_id"], fx["away_id"]) for fx in fixtures],
+            return_exceptions=True,
+        )
+    for fx, res in zip(fixtures, results):
+        fx["_h2h"] = {} if isinstance(res, BaseException) else res
+
+
+def prefetch_h2h(fixtures, max_concurrency=ENRICH_CONCURRENCY):
+    """
+    Attache fx["_h2h"] (get_btts_h2h) à chaque fixture qui ne l'a pas encore,
+    pour que compute_signals_for_profile reste sans réseau. Retourne le nombre chargé.
+    """
+    todo = [fx for fx in fixtures if "_h2h" not in fx and fx.get("home_id") and fx.get("away_id")]
+    if todo:
+        asyncio.run(_prefetch_h2h_all(todo, max(1, int(max_concurrency))))
+    return len(todo)
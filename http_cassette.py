@@ -0,0 +1,113 @@
+# ================================
+# http_cassette.py — FootBot PRO
+# Enregistrement / rejeu des réponses HTTP (runs hors-ligne, benchs reproductibles)
+# ================================
+import os
+import gzip
+import json
+import time
+import base64
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# FOOTBOT_HTTP_MODE : "live" (défaut), "record" (réseau + écriture), "replay" (cassettes seules)
+# Run hors-ligne reproductible : même date, même API_FOOTBALL_BASE, et un FOOTBOT_CACHE_DB vierge
+# (sinon le cache SQLite court-circuite une partie des requêtes enregistrées).
+HTTP_MODE = os.getenv("FOOTBOT_HTTP_MODE", "live").strip().lower()
+CASSETTE_DIR = os.getenv(
+    "FOOTBOT_CASSETTE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes"),
+)
+REPLAY_LATENCY_MS = float(os.getenv("FOOTBOT_REPLAY_LATENCY_MS", "0"))   # latence simulée par réponse
+
+# Statuts jamais enregistrés (transitoires : le rejeu doit refléter un run sain)
+_SKIP_STATUS = (429, 500, 502, 503, 504)
+
+
+def fingerprint(method, url):
+    """Empreinte stable d'une requête : méthode + hôte + chemin + paramètres triés (sans clé API)."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    raw = f"{method.upper()} {parts.netloc}{parts.path}?{query}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest(), raw
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Adapter requests : en "record", délègue au réseau puis écrit la réponse
+    (cassettes/<sha1>.json.gz) ; en "replay", sert la cassette sans réseau.
+    """
+
+    def __init__(self, mode=HTTP_MODE, cassette_dir=CASSETTE_DIR, latency_ms=REPLAY_LATENCY_MS, **kw):
+        super().__init__(**kw)
+        self.mode = mode
+        self.cassette_dir = cassette_dir
+        self.latency = max(0.0, latency_ms) / 1000.0
+        self.stats = {"recorded": 0, "replayed": 0, "missing": 0}
+        self._lock = threading.Lock()
+        os.makedirs(cassette_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cassette_dir, f"{key}.json.gz")
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    # ---------- enregistrement ----------
+    def _record(self, request, response):
+        key, raw = fingerprint(request.method, request.url)
+        entry = {
+            "request": raw,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "body": base64.b64encode(response.content).decode("ascii"),
+            "recorded_at": time.time(),
+        }
+        tmp = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self._path(key))  # écriture atomique
+        self._count("recorded")
+
+    # ---------- rejeu ----------
+    def _replay(self, request):
+        key, raw = fingerprint(request.method, request.url)
+        path = self._path(key)
+        if not os.path.exists(path):
+            self._count("missing")
+            raise requests.exceptions.ConnectionError(f"[replay] cassette absente : {raw}", request=request)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+        if self.latency:
+            time.sleep(self.latency)
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.reason = entry.get("reason")
+        resp.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        resp.headers.pop("Content-Encoding", None)   # corps déjà décompressé à l'enregistrement
+        resp._content = base64.b64decode(entry["body"])
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        self._count("replayed")
+        return resp
+
+    def send(self, request, **kwargs):
+        if self.mode == "replay":
+            return self._replay(request)
+        response = super().send(request, **kwargs)
+        if self.mode == "record" and response.status_code not in _SKIP_STATUS:
+            try:
+                self._record(request, response)
+            except Exception as e:
+                print(f"[⚠️ Cassette] {request.url} : {e}")
+        return response
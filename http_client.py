@@ -0,0 +1,138 @@
+# ================================
+# http_client.py — FootBot PRO
+# Client HTTP partagé (pool keep-alive + retries)
+# ================================
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from rate_limiter import API_FOOTBALL_LIMITER, UNDERSTAT_LIMITER
+from http_cassette import HTTP_MODE, CassetteAdapter
+from metrics import METRICS
+
+# ----------------------------------------------------
+# Configuration (.env) — lu par main.py via dotenv
+# ----------------------------------------------------
+API_BASE = os.getenv("API_FOOTBALL_BASE", "https://v3.football.api-sports.io").rstrip("/")
+DEFAULT_TIMEOUT = 12
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))     # connexions max par hôte
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))          # 2 retries = 3 tentatives
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))      # 0.5s, 1s, 2s...
+
+HTTP_RATE_LIMIT_RETRIES = int(os.getenv("HTTP_RATE_LIMIT_RETRIES", "3"))
+
+# 429 exclu : géré par le limiteur (pour qu'un retry repasse aussi par le seau)
+RETRY_STATUS = (500, 502, 503, 504)
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _build_session():
+    """Session unique : TLS réutilisé, pool partagé entre threads, retries urllib3."""
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    pool = dict(
+        pool_connections=8,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry,
+        pool_block=True,   # au-delà du pool, on attend une connexion libre au lieu d'en ouvrir une jetable
+    )
+    # FOOTBOT_HTTP_MODE=record|replay : cassettes sous l'adapter (cf. http_cassette.py)
+    adapter = CassetteAdapter(**pool) if HTTP_MODE in ("record", "replay") else HTTPAdapter(**pool)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({"User-Agent": "Mozilla/5.0"})
+    return s
+
+
+def get_session():
+    """Retourne la session partagée (créée à la première utilisation)."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = _build_session()
+    return _SESSION
+
+
+def http_get(url: str, params=None, headers=None, timeout=DEFAULT_TIMEOUT):
+    """GET brut via la session partagée (ne lève pas sur les codes HTTP)."""
+    return get_session().get(url, params=params, headers=headers, timeout=timeout)
+
+
+def understat_get(url: str, timeout=DEFAULT_TIMEOUT):
+    """GET understat.com via la session partagée ; un jeton de UNDERSTAT_LIMITER par requête (hors replay)."""
+    if HTTP_MODE != "replay":
+        with METRICS.timer("understat_limiter_wait_s"):
+            UNDERSTAT_LIMITER.acquire()
+    return http_get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=timeout)
+
+
+def _api_headers():
+    key = os.getenv("API_FOOTBALL_KEY", "").strip()
+    if not key and HTTP_MODE == "replay":
+        key = "replay"
+    if not key:
+        raise RuntimeError("API_FOOTBALL_KEY manquant dans .env")
+    return {"x-apisports-key": key, "Accept": "application/json"}
+
+
+def _retry_after(r):
+    try:
+        return float(r.headers.get("Retry-After"))
+    except Exception:
+        return None
+
+
+def _is_rate_limited(r, j):
+    if r.status_code == 429:
+        return True
+    # API-Football peut répondre 200 avec {"errors": {"rateLimit": "..."}}
+    errors = j.get("errors") if isinstance(j, dict) else None
+    return isinstance(errors, dict) and "rateLimit" in errors
+
+
+def api_football_get(path: str, params=None, timeout=DEFAULT_TIMEOUT):
+    """
+    GET API-Football → JSON complet ({"results":..., "response":[...]}).
+    Chaque tentative passe par le token bucket partagé (quota adapté aux en-têtes).
+    Retries/backoff réseau gérés par l'adapter ; lève une exception si l'appel échoue.
+    """
+    headers = _api_headers()
+    endpoint = path if path.startswith("/") else f"/{path}"
+    url = API_BASE + endpoint
+    for attempt in range(HTTP_RATE_LIMIT_RETRIES + 1):
+        if HTTP_MODE != "replay":   # hors-ligne : aucun quota à respecter
+            with METRICS.timer("api_limiter_wait_s"):
+                API_FOOTBALL_LIMITER.acquire()
+        t0 = time.perf_counter()
+        try:
+            r = http_get(url, params=params, headers=headers, timeout=timeout)
+        except Exception:
+            METRICS.inc("api_errors", endpoint=endpoint)
+            raise
+        METRICS.observe("api_latency_s", time.perf_counter() - t0, endpoint=endpoint)
+        METRICS.inc("api_calls", endpoint=endpoint, status=r.status_code)
+        API_FOOTBALL_LIMITER.update_from_headers(r.headers)
+        j = None
+        if r.status_code != 429:
+            r.raise_for_status()
+            j = r.json()
+        if not _is_rate_limited(r, j):
+            return j
+        METRICS.inc("api_rate_limited", endpoint=endpoint)
+        API_FOOTBALL_LIMITER.penalize(_retry_after(r))
+    raise RuntimeError(f"API-Football: quota dépassé sur {path} après {HTTP_RATE_LIMIT_RETRIES + 1} tentatives")
@@ -0,0 +1,109 @@
+# ================================
+# league_filter.py — FootBot PRO
+# Filtre "ligue pertinente" compilé une fois (set exact + regex d'exclusion) et mémoïsé
+#   python league_filter.py   → contrôle de parité vs l'ancien algorithme sur tous les snapshots fixtures_raw_*
+# ================================
+import re
+import sys
+import threading
+
+from leagues_list import MAJOR_LEAGUES, EXCLUDED
+
+
+def _alternation(words):
+    """Une seule regex 'a|b|c' (entrées minuscules, plus longues d'abord) ; None si vide."""
+    words = sorted({w.lower() for w in words if w}, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, words))) if words else None
+
+
+def reference_is_relevant(country, league_name, excluded=EXCLUDED, major=MAJOR_LEAGUES):
+    """Algorithme d'origine (main.is_relevant_league) : oracle du contrôle de parité."""
+    if not league_name:
+        return False
+    lname = league_name.lower()
+    if "qualification" in lname and "world cup" in lname:
+        return "europe" in lname
+    if any(x.lower() in lname for x in excluded):
+        return False
+    for item in major:
+        if isinstance(item, tuple):
+            if country == item[0] and league_name == item[1]:
+                return True
+        elif isinstance(item, str) and item.lower() in lname:
+            return True
+    return False
+
+
+class LeagueFilter:
+    """
+    Mêmes règles que l'ancien is_relevant_league, dans le même ordre :
+      1. qualifications Coupe du Monde : Europe seulement ;
+      2. exclusions (sous-chaînes) : une regex compilée ;
+      3. (pays, ligue) exact : set ; puis noms génériques (sous-chaînes) : une regex.
+    Résultat mémoïsé par league_id (ou par (pays, ligue) sans id).
+    """
+
+    def __init__(self, major=MAJOR_LEAGUES, excluded=EXCLUDED):
+        self.exact = {item for item in major if isinstance(item, tuple)}
+        self.excluded_re = _alternation(excluded)
+        self.generic_re = _alternation(item for item in major if isinstance(item, str))
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def _decide(self, country, league_name):
+        if not league_name:
+            return False
+        lname = league_name.lower()
+        if "qualification" in lname and "world cup" in lname:
+            return "europe" in lname
+        if self.excluded_re is not None and self.excluded_re.search(lname):
+            return False
+        if (country, league_name) in self.exact:
+            return True
+        return bool(self.generic_re is not None and self.generic_re.search(lname))
+
+    def is_relevant(self, country, league_name, league_id=None):
+        key = league_id if league_id is not None else (country, league_name)
+        hit = self._memo.get(key)
+        if hit is None:
+            hit = self._decide(country, league_name)
+            with self._lock:
+                self._memo[key] = hit
+        return hit
+
+    def is_relevant_fixture(self, fx):
+        return self.is_relevant(fx.get("country"), fx.get("league_name"), fx.get("league_id"))
+
+
+# Instance unique (listes de leagues_list.py compilées à l'import)
+LEAGUE_FILTER = LeagueFilter()
+
+
+def _parity_check(paths=None):
+    """Compilé vs algorithme d'origine sur les fixtures sauvegardés (même liste EXCLUDED)."""
+    from snapshot_store import list_snapshots, iter_snapshot
+    paths = paths or list_snapshots("fixtures_raw")
+    fixtures = [fx for p in paths for fx in iter_snapshot(p)]
+
+    flt = LeagueFilter()
+    bad = [fx for fx in fixtures
+           if flt.is_relevant_fixture(fx) != reference_is_relevant(fx.get("country"), fx.get("league_name"))]
+    n_ok = sum(flt.is_relevant_fixture(fx) for fx in fixtures)
+    print(f"{len(fixtures)} fixtures ({len(paths)} fichiers), {n_ok} pertinents, "
+          f"{len(flt._memo)} ligues mémoïsées | écarts : {len(bad)}")
+    for fx in bad[:10]:
+        print(f"  ❌ {fx.get('league_id')} {fx.get('country')} / {fx.get('league_name')}")
+
+    # Info : décisions modifiées par la correction des virgules manquantes de l'ancienne liste
+    legacy = (set(EXCLUDED) - {"women", "Liga MX", "copa", "Copa Argentina"}) | {"womenLiga MX", "copaCopa Argentina"}
+    changed = sorted({(fx.get("country"), fx.get("league_name")) for fx in fixtures
+                      if reference_is_relevant(fx.get("country"), fx.get("league_name"), excluded=legacy)
+                      != reference_is_relevant(fx.get("country"), fx.get("league_name"))})
+    print(f"ℹ️ Ligues dont la décision change avec la liste EXCLUDED corrigée : {len(changed)}")
+    for country, name in changed:
+        print(f"     {country} / {name}")
+    return not bad
+
+
+if __name__ == "__main__":
+    sys.exit(0 if _parity_check(sys.argv[1:] or None) else 1)
@@ -103,3 +103,65 @@ MAJOR_LEAGUES = [
 
 
 ]
+
+
+# -----------------------
+# Exclusions (sous-chaînes, insensibles à la casse) — prioritaires sur MAJOR_LEAGUES
+# -----------------------
+EXCLUDED = set([
+  
+    # 🌍 Féminines
+    "Damallsvenskan", "FA WSL", "Women Super League", "Division 1 Féminine",
+    "Primera Division Women", "Bundesliga Women", "Serie A Women",
+    "NWSL", "Liga MX Femenil", "Brasileirao Feminino", "UEFA Nations League - Women", "women",
+
+    # 🌍 Amérique latine
+    "Liga MX", 
+
+    # 👶 Réserves / jeunes
+    "U19", "U20", "U21", "U23", "Youth League", "MLS Next Pro",
+    "Premier League 2", "Primavera", "Reserves", "B teams",
+
+    # 🏆 Coupes nationales / Super Cups
+    "Cup", "Super Cup", "Trophy", "Community Shield", "Taça", "coupe",
+    "Copa del Rey", "Coupe de France", "Copa do Brasil", "copa",
+    "Copa Argentina", "US Open Cup", "Emperor’s Cup", "supercopa", "EFL Cup", "FA Cup", "DFB Pokal",
+
+    # 🌐 Internationales non-club
+    "Friendly", "Friendlies", "International Champions Cup",
+    "Club Friendlies", "National Team", "Uefa Youth", "CONMEBOL U20",
+    "Euro U21", "Euro U19", "World Cup Women", "World Cup U20",
+    "World Cup U17", "Olympics", "Asian Cup", "African Cup of Nations",
+    "Concacaf Nations League", "CAF Champions League",
+
+    # 🇺🇸 compétitions inférieures
+    "USL Championship", "USL League One", "USL League Two", "NISA", "Ligue 2", "Championship",
+
+    # 🇲🇽 divisions inférieures
+    "Liga de Expansión MX",
+
+    # 🇧🇷 divisions inférieures
+    "Serie B", "Serie C", "Serie D",
+
+    # 🇦🇷 divisions inférieures
+    "Primera Nacional", "Primera B Metropolitana",
+
+    # 🇪🇸 divisions inférieures
+    "Segunda Federación", "Primera Federación", "Tercera División",
+
+    # 🇮🇹 divisions inférieures
+    "Serie C", "Serie D",
+
+    # 🇫🇷 divisions inférieures
+    "National 1", "National 2", "National 3",
+
+    # 🇩🇪 divisions inférieures
+    "3. Liga", "Regionalliga",
+
+    # 🇬🇧 divisions inférieures
+    "League One", "League Two", "National League", "FA Trophy", "EFL Trophy",
+
+    # 🌏 Ligues asiatiques à exclure
+    "AFC Champions League",
+    "AGCFF Gulf Champions League",
+])
@@ -7,13 +7,15 @@ import argparse
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--refresh", action="store_true", help="Met à jour les scores sans refaire l'analyse complète")
-args = parser.parse_args()
+parser.add_argument("--dump-all", action="store_true",
+                    help="Debug : sauvegarde aussi tous les matchs du jour (monde entier) dans fixtures_world_<date>.json")
+# Arguments et date lus seulement en exécution directe : `import main` (benchs, scripts) reste sans effet de bord
+args = argparse.Namespace(refresh=False, dump_all=False)
 
 import os, sys, json, math, time
 from datetime import datetime
 today = datetime.now().strftime("%Y-%m-%d")
 
-from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 
@@ -47,34 +49,25 @@ def send_telegram_report(file_path: str):
 
 
 # --- Modules internes
-from leagues_list import MAJOR_LEAGUES
+from league_filter import LEAGUE_FILTER
 from api_football_ext import (
     get_fixtures_by_date,
-    enrich_with_odds_and_markets,
+    league_seasons_of,
+    enrich_with_odds_and_markets,   # vérifié par preflight_check
     get_recent_form,
-    add_injuries_influents,
-    implied_probs_1x2,
-    implied_prob_from_over,
-    implied_prob_from_btts,
     get_btts_h2h,
-    get_table_strength,
-    get_shots_on_target_avgs,
-    get_days_since_last_match,
-    get_travel_penalty,
-    get_referee_context,
-    get_team_expected,
-    get_understat_xg_v2,
 )
 
-from understat_ext import get_team_splits
-
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from enrichment_async import enrich_fixtures, prefetch_h2h
+from http_cassette import HTTP_MODE
+from metrics import METRICS, METRICS_DIR
+from snapshot_store import find_snapshot, iter_snapshot, save_snapshot
+from signal_history import SIGNAL_HISTORY, file_sha1, to_float
 
 # ======================
 # OPTIMISATION FootBot PRO
 # ======================
 DEBUG = False  # passer à True pour revoir les prints
-POOL = ThreadPoolExecutor(max_workers=20)
 
 # --- Calibration IC (dérivée du dernier analyse_globale) ---
 CALIB = {
@@ -89,24 +82,33 @@ def _apply_calib(prob: float, bet_type: str) -> float:
     k = CALIB.get(bet_type.lower(), {}).get("k", 1.0)
     return max(0.01, min(0.99, float(prob) * k))
 
-import json
+from calibration_artifact import load_artifact, optimal_thresholds
+
+# Artefact de analyse_globale (seuils optimaux + calibration), validé et lu une seule fois au démarrage
+CALIBRATION_ARTIFACT = load_artifact()
 
 def _load_latest_calibration():
-    """Charge les coefficients IC recalculés automatiquement."""
-    path = os.path.join(BASE_DIR, "calibration_auto.json")
-    if not os.path.exists(path):
-        return CALIB
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        for k, v in data.items():
-            if k in CALIB:
-                CALIB[k]["k"] = float(v)
-        print("✅ Calibration IC mise à jour depuis analyse_globale.")
-    except Exception as e:
-        print(f"⚠️ Erreur chargement calibration_auto.json : {e}")
+    """Charge les coefficients IC recalculés automatiquement (artefact, sinon calibration_auto.json)."""
+    if CALIBRATION_ARTIFACT:
+        data = CALIBRATION_ARTIFACT["calibration"]
+    else:
+        path = os.path.join(BASE_DIR, "calibration_auto.json")
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Erreur chargement calibration_auto.json : {e}")
+            return {}
+    for k, v in data.items():
+        if k in CALIB:
+            CALIB[k]["k"] = float(v)
+    print("✅ Calibration IC mise à jour depuis analyse_globale.")
+    return data
 
-_load_latest_calibration()
+# Facteurs bruts {type: k} (encart "Calibration active" du rapport)
+CALIB_FACTORS = _load_latest_calibration()
 
 # -----------------------
 # Initialisation
@@ -161,103 +163,19 @@ def get_run_date():
     print(f"📅 Date auto : {today}")
     return today
 
-TODAY = get_run_date()
-
-
-
-# -----------------------
-# Exclusions & ligues valides
-# -----------------------
-EXCLUDED = set([
-  
-    # 🌍 Féminines
-    "Damallsvenskan", "FA WSL", "Women Super League", "Division 1 Féminine",
-    "Primera Division Women", "Bundesliga Women", "Serie A Women",
-    "NWSL", "Liga MX Femenil", "Brasileirao Feminino", "UEFA Nations League - Women", "women"
-
-    # 🌍 Amérique latine
-    "Liga MX", 
-
-    # 👶 Réserves / jeunes
-    "U19", "U20", "U21", "U23", "Youth League", "MLS Next Pro",
-    "Premier League 2", "Primavera", "Reserves", "B teams",
-
-    # 🏆 Coupes nationales / Super Cups
-    "Cup", "Super Cup", "Trophy", "Community Shield", "Taça", "coupe",
-    "Copa del Rey", "Coupe de France", "Copa do Brasil", "copa"
-    "Copa Argentina", "US Open Cup", "Emperor’s Cup", "supercopa", "EFL Cup", "FA Cup", "DFB Pokal",
-
-    # 🌐 Internationales non-club
-    "Friendly", "Friendlies", "International Champions Cup",
-    "Club Friendlies", "National Team", "Uefa Youth", "CONMEBOL U20",
-    "Euro U21", "Euro U19", "World Cup Women", "World Cup U20",
-    "World Cup U17", "Olympics", "Asian Cup", "African Cup of Nations",
-    "Concacaf Nations League", "CAF Champions League",
-
-    # 🇺🇸 compétitions inférieures
-    "USL Championship", "USL League One", "USL League Two", "NISA", "Ligue 2", "Championship",
-
-    # 🇲🇽 divisions inférieures
-    "Liga de Expansión MX",
-
-    # 🇧🇷 divisions inférieures
-    "Serie B", "Serie C", "Serie D",
-
-    # 🇦🇷 divisions inférieures
-    "Primera Nacional", "Primera B Metropolitana",
-
-    # 🇪🇸 divisions inférieures
-    "Segunda Federación", "Primera Federación", "Tercera División",
-
-    # 🇮🇹 divisions inférieures
-    "Serie C", "Serie D",
-
-    # 🇫🇷 divisions inférieures
-    "National 1", "National 2", "National 3",
+TODAY = None   # fixé par get_run_date() au lancement (cf. point d'entrée)
 
-    # 🇩🇪 divisions inférieures
-    "3. Liga", "Regionalliga",
 
-    # 🇬🇧 divisions inférieures
-    "League One", "League Two", "National League", "FA Trophy", "EFL Trophy",
 
-    # 🌏 Ligues asiatiques à exclure
-    "AFC Champions League",
-    "AGCFF Gulf Champions League",
-])
 
 
 # -----------------------
-# Ligues valides = celles de leagues_list.py
+# Ligues valides = celles de leagues_list.py (MAJOR_LEAGUES / EXCLUDED)
 # -----------------------
 
-def is_relevant_league(country, league_name):
-    if not league_name:
-        return False
-
-    lname = league_name.lower()  # ✅ définition manquante
-
-    # ✅ Exception : garder uniquement les qualifications Coupe du Monde Europe
-    if "qualification" in lname and "world cup" in lname:
-        if "europe" in lname:
-            return True       # 👍 garder Europe uniquement
-        else:
-            return False      # ❌ ignorer Afrique, Asie, AmSud, etc.
-
-    # Ignorer ligues explicitement exclues
-    if any(x.lower() in lname for x in EXCLUDED):
-        return False
-
-    # Vérifie si la ligue (pays, nom) est dans MAJOR_LEAGUES
-    for item in MAJOR_LEAGUES:
-        if isinstance(item, tuple):
-            ctry, lig = item
-            if country == ctry and league_name == lig:
-                return True
-        elif isinstance(item, str) and item.lower() in lname:
-            return True
-
-    return False
+def is_relevant_league(country, league_name, league_id=None):
+    """Ligue à analyser ? (filtre compilé de league_filter.py, règles inchangées)"""
+    return LEAGUE_FILTER.is_relevant(country, league_name, league_id)
 
 
 # -----------------------
@@ -270,18 +188,11 @@ def map_understat_name(name): return TEAM_NAME_MAP.get(name, name)
 # Utilitaires
 # -----------------------
 def zscore(x, mu, sigma): return 0.0 if sigma<=1e-9 else (x-mu)/sigma
-def sigmoid(x): import math; return 1/(1+math.exp(-x))
+def sigmoid(x): return 1/(1+math.exp(-x))
 def normalize3(a,b,c): s=a+b+c; return (a/s,b/s,c/s) if s>0 else (1/3,1/3,1/3)
 
 ROWS, SUMMARY_ROWS = [], []
 
-STATS = {
-    "n_matches": 0,
-    "n_understat": 0,
-    "n_api": 0,
-    "exec_time": 0.0
-}
-
 # ===========================================================
 # 🎯 MODULE — Analyse spéciale compétitions européennes (EuropeMix)
 # ===========================================================
@@ -374,9 +285,9 @@ def enrich_with_european_context(fx):
     fx["home_form"]["xg_against"] = _merge(home_dom.get("xg_against"), home_eur.get("xg_against"))
     fx["away_form"]["xg_against"] = _merge(away_dom.get("xg_against"), away_eur.get("xg_against"))
 
-    # 5️⃣ H2H (complémentaire, jamais exclusif)
+    # 5️⃣ H2H (complémentaire, jamais exclusif) — déjà préchargé par l'enrichissement
     try:
-        h2h = get_btts_h2h(home_id, away_id)
+        h2h = fx.get("_h2h") or get_btts_h2h(home_id, away_id)
         fx["h2h_score"] = h2h.get("score_h2h", 0.0)
         fx["btts_pct_h2h"] = h2h.get("btts_pct", 0.0)
     except Exception:
@@ -401,377 +312,24 @@ def enrich_with_european_context(fx):
 
 
 # ---------------------------------------------------------
-# Cœur modèle : calcule IC + signaux pour un fixture donné
+# Cœur modèle : compute_signals_for_profile → scoring.py (pur, sans réseau)
+# Tous les passages de scoring utilisent la version vectorisée (scoring_batch.py, même résultat)
 # ---------------------------------------------------------
-# ===================== PATCH BTTS + xG + HTML =====================
-# (1) Remplacement de compute_signals_for_profile : BTTS recalibré + pondération H2H
-def compute_signals_for_profile(fx, P):
-    sigs = []
-    btts_h2h = 0.0
-
-    # --- Ajustement spécial compétitions européennes (IC)
-    ic_adj = fx.get("_ic_adj", 1.0)
-
-    # --- Probabilités implicites (marché)
-    p_home_odds, _, p_away_odds = implied_probs_1x2(fx)
-    p_over15_odds = implied_prob_from_over(fx.get("odds_over_1_5") or 0)
-    p_btts_odds = implied_prob_from_btts(fx.get("odds_btts_yes") or 0)
-
-    # --- Forme récente (5–10) + xG proxies
-    hf, af = fx.get("home_form", {}), fx.get("away_form", {})
-    n_h, n_a = hf.get("n", 1), af.get("n", 1)
-
-    # ✅ Moyennes corrigées : pas de double division
-    def _per_match(val, n):
-        try:
-            v = float(val)
-        except Exception:
-            return 0.0
-        if v <= 3.0:
-            return v  # déjà une moyenne (API-Football)
-        return v / max(n or 1, 1)
-
-    gf_home = _per_match(hf.get("goals_for", hf.get("gf", 0)), n_h)
-    ga_home = _per_match(hf.get("goals_against", hf.get("ga", 0)), n_h)
-    gf_away = _per_match(af.get("goals_for", af.get("gf", 0)), n_a)
-    ga_away = _per_match(af.get("goals_against", af.get("ga", 0)), n_a)
-
-    xg_home = fx.get("xg_home") or max(0.2, float(hf.get("xg_for", 1.2)))
-    xg_away = fx.get("xg_away") or max(0.2, float(af.get("xg_for", 1.1)))
-
-    hw = hf.get("wins", 0) / (n_h or 1)
-    aw = af.get("wins", 0) / (n_a or 1)
-
-    # --- 1X2 (fusion simple marché + forme)
-    ph_raw = 0.35 * p_home_odds + 0.65 * hw
-    pa_raw = 0.35 * p_away_odds + 0.65 * aw
-    s = (ph_raw + pa_raw) or 1.0
-    ph, pa = ph_raw / s, pa_raw / s
-    chosen_side = "home" if ph >= pa else "away"
-    p_res = max(ph, pa)
-
-    # --- H2H (unique appel)
-    h2h_data = {}
-    try:
-        h2h_data = get_btts_h2h(fx["home_id"], fx["away_id"]) or {}
-        btts_h2h = float(h2h_data.get("score_h2h", 0.0) or 0.0)
-        home_win_pct = float(h2h_data.get("home_win_pct", 0.0) or 0.0)
-        away_win_pct = float(h2h_data.get("away_win_pct", 0.0) or 0.0)
-    except Exception:
-        btts_h2h = 0.0
-        home_win_pct = away_win_pct = 0.0
-
-    # --- Bonus H2H Résultat
-    if chosen_side == "home":
-        if home_win_pct >= 0.8:   p_res = min(0.97, p_res + 0.05)
-        elif home_win_pct >= 0.7: p_res = min(0.97, p_res + 0.04)
-        elif home_win_pct >= 0.6: p_res = min(0.97, p_res + 0.02)
-    else:
-        if away_win_pct >= 0.8:   p_res = min(0.97, p_res + 0.05)
-        elif away_win_pct >= 0.7: p_res = min(0.97, p_res + 0.04)
-        elif away_win_pct >= 0.6: p_res = min(0.97, p_res + 0.02)
-
-    # ---------- Application du facteur IC EuropeMix AVANT fusion des probabilités ----------
-    # p_res = _apply_calib(p_res, "Résultat")
-
-    if ic_adj != 1.0:
-        p_res *= ic_adj
-        if p_over15_odds:
-            p_over15_odds *= ic_adj
-        if p_btts_odds:
-            p_btts_odds *= ic_adj
-
-    
-
-
-
-
-    # --- Sous-fonction locale pour ajouter un signal ---
-    def _add_signal(subtype, suggestion, p_model, odd):
-        """
-        Ajoute un signal dans la liste sigs avec sa proba, son IC et sa couleur.
-        """
-        try:
-            odd = float(odd) if odd and float(odd) > 1.0 else 2.0
-        except Exception:
-            odd = 2.0
-
-        res = "pending"
-        color = "#bdc3c7"
-        result_text = fx.get("result_display", "—")
-
-        sigs.append([
-            subtype,                     # Type (Résultat / Over / BTTS / Équipe marque)
-            suggestion,                  # Texte du signal
-            "IC",                        # Placeholder pour la colonne IC
-            round(100 * p_model, 1),     # Probabilité %
-            "Fusion",                    # Source
-            res,                         # Statut (pending, correct, wrong)
-            color,                       # Couleur
-            result_text                  # Score si dispo
-        ])
-
-# ---------- Over 1.5 révisé : forme prioritaire + ajustements contextuels ----------
-    odd_over = fx.get("odds_over_1_5")
-    p_over15_odds = implied_prob_from_over(odd_over)
-    lam = max(0.15, xg_home) + max(0.15, xg_away)
-
-    # Modèle Poisson basé sur les xG cumulés
-    try:
-        p_over15_poisson = 1.0 - math.exp(-lam) * (1.0 + lam)
-    except Exception:
-        p_over15_poisson = 0.65
-
-    # Moyennes récentes de buts marqués et encaissés
-    gf_avg = (gf_home + gf_away) / 2
-    ga_avg = (ga_home + ga_away) / 2
-
-    # 🔸 Fusion pondérée : la forme compte plus que le marché
-    if p_over15_odds is not None:
-        p_over15 = (
-            0.20 * p_over15_odds +       # Marché → 20 %
-            0.40 * p_over15_poisson +    # Modèle xG → 40 %
-            0.40 * ((gf_avg + ga_avg) / 2.2)  # Forme (buts marqués/encaissés) → 40 %
-        )
-    else:
-        p_over15 = 0.60 * p_over15_poisson + 0.40 * ((gf_avg + ga_avg) / 2.2)
-
-    # 🔸 Ajustements contextuels : renforce la logique de forme récente
-    # Bonus si les deux équipes marquent souvent
-    if gf_home > 1.4 and gf_away > 1.4:
-        p_over15 += 0.04
-    # Pénalité si défenses très solides
-    if ga_home < 0.7 and ga_away < 0.7:
-        p_over15 -= 0.03
-
-    # 🔸 Ajustement selon la projection xG totale (match ouvert ou fermé)
-    if (xg_home + xg_away) > 2.3:
-        p_over15 += 0.03
-    elif (xg_home + xg_away) < 1.8:
-        p_over15 -= 0.04
-
-    # Clamp pour garder la proba dans des bornes réalistes
-    p_over15 = max(0.05, min(0.98, p_over15))
-
-    # 🔸 Application du filtre de sélectivité avant ajout du signal
-    # p_over15 = _apply_calib(p_over15, "Over 1.5")
-
-    if p_over15 >= P["O15_C"] and (xg_home + xg_away) > 2:
-        _add_signal("Over 1.5", f"Over 1.5 buts (cote {fx.get('odds_over_1_5')})", p_over15, fx.get("odds_over_1_5"))
-
-
-
-    # ---------- BTTS robuste (pondérations + garde-fous défensifs) ----------
-    home_attack_vs_away_def = (gf_home + ga_away) / 2.0
-    away_attack_vs_home_def = (gf_away + ga_home) / 2.0
-    xg_dual_intensity = min(1.0, 0.5 * (xg_home / 1.7) + 0.5 * (xg_away / 1.7))
-
-    w_odds, w_buts, w_xg, w_h2h = 0.30, 0.25, 0.20, 0.25
-    if not btts_h2h:
-        w_buts += 0.05; w_xg += 0.05; w_h2h = 0.05
-    else:
-        w_h2h = 0.20
-        w_buts = 0.30
-        w_xg = 0.15 
-
-    def clamp01(v, lo=0.30, hi=0.95):
-        return max(lo, min(hi, float(v)))
-
-    comp_buts = clamp01((home_attack_vs_away_def + away_attack_vs_home_def) / 2.0)
-    comp_xg   = clamp01(xg_dual_intensity)
-
-    p_btts_raw = (
-        w_odds * (p_btts_odds or 0.60) +
-        w_buts * comp_buts +
-        w_xg   * comp_xg +
-        w_h2h  * (btts_h2h or 0.0)
-    )
-
-    # 🛡️ Garde-fous défensifs
-    def defense_cap(ga_h, ga_a):
-         if ga_h < 0.70 and ga_a < 0.70:
-             return 0.55   # défenses d'acier
-         if ga_h < 0.80 and ga_a < 0.80:
-             return 0.65
-         if ga_h < 0.90 or ga_a < 0.90:
-             return 0.75
-         return 0.90
-
-
-    cap = defense_cap(ga_home, ga_away)
-    if (xg_home >= 1.35 and xg_away >= 1.35) and (ga_home >= 0.75 or ga_away >= 0.75):
-        cap = max(cap, 0.75)
-
-    symmetry_bonus = 0.0
-    if abs(xg_home - xg_away) <= 0.25 and (xg_home + xg_away) / 2 >= 1.35:
-          symmetry_bonus = 0.01
-
-
-    p_btts = min(cap, clamp01(p_btts_raw + symmetry_bonus, lo=0.35, hi=0.97))
-
-    # ⚠️ pénalité si match déséquilibré (asymétrie forte)
-    if abs(xg_home - xg_away) > 0.6:
-        p_btts = max(0.35, p_btts - 0.10)
-
-    # ✅ Conditions d’affichage BTTS révisées
-    ok_def = (ga_home >= 1.00 and ga_away >= 1.00)
-    ok_att = (gf_home >= 1.00 and gf_away >= 1.00)
-    ok_xg  = (xg_home >= 1.10 and xg_away >= 1.10)
-
-
-    # 🚫 Anti-faux positifs : si les deux défenses encaissent très peu
-    if (ga_home < 0.9 and ga_away < 0.9):
-      return sigs  # trop solides défensivement, on ne propose pas BTTS
-
-    #p_btts = _apply_calib(p_btts, "BTTS")
-
-    if p_btts >= P["BTTS_C"] and ok_def and ok_att and ok_xg:
-     _add_signal(
-         "BTTS",
-            f"Les deux équipes marquent (cote {fx.get('odds_btts_yes')})",
-         p_btts,
-          fx.get("odds_btts_yes")
-    )
-
-
-    # ---------- Équipe marque ----------
-    try:
-        home_condition = (gf_home >= 0.9 and ga_away >= 0.9 and xg_home >= 1.0)
-        away_condition = (gf_away >= 0.9 and ga_home >= 0.9 and xg_away >= 1.0)
-
-        if home_condition:
-            p_team_home = min(0.95, (
-                0.55*(xg_home/1.6) +
-                0.20*gf_home +
-                0.15*(btts_h2h or 0.0) +
-                0.10*(1 - (1/(1+ga_away)))
-            ))
-            # p_team_home = _apply_calib(p_team_home, "Équipe marque")
-            if p_team_home >= P["TEAM_C"]:
-                _add_signal("Équipe marque", f"{fx['home_team']} marque", p_team_home, fx.get("cote_home"))
-
-        if away_condition:
-            p_team_away = min(0.95, (
-                0.55*(xg_away/1.6) +
-                0.20*gf_away +
-                0.15*(btts_h2h or 0.0) +
-                0.10*(1 - (1/(1+ga_home)))
-            ))
-            # p_team_away = _apply_calib(p_team_away, "Équipe marque")
-            if p_team_away >= P["TEAM_C"]:
-                _add_signal("Équipe marque", f"{fx['away_team']} marque", p_team_away, fx.get("cote_away"))
-    except Exception as e:
-        if DEBUG:
-            print(f"[DEBUG] Erreur calcul équipe marque: {e}")
-
-    # ---------- Application finale IC EuropeMix ----------
-    if ic_adj != 1.0:
-        p_res *= ic_adj
-        p_over15 *= ic_adj
-        p_btts *= ic_adj
-
-    # ---------- Ajout des signaux principaux ----------
-    if p_res >= (P["RES_C"] + 0.05):
-        odd = fx.get("cote_home") if chosen_side == "home" else fx.get("cote_away")
-        label = "Victoire Domicile" if chosen_side == "home" else "Victoire Extérieure"
-        _add_signal("Résultat", f"{label} (cote {odd})", p_res, odd)
-
-    fx["_xg_home_display"] = round(xg_home, 2)
-    fx["_xg_away_display"] = round(xg_away, 2)
-
-        # --- Attribution du résultat réel (pour le calcul des ratios) ---
-    sh, sa = fx.get("score_home"), fx.get("score_away")
-
-    def _eval_result(subtype, suggestion):
-        """Détermine si le prono est correct, faux ou en attente."""
-        if sh is None or sa is None:
-            return "pending", "#bdc3c7"
-
-        # --- Résultat 1X2
-        if subtype == "Résultat":
-            if chosen_side == "home" and sh > sa:
-                return "correct", "#2ecc71"
-            if chosen_side == "away" and sa > sh:
-                return "correct", "#2ecc71"
-            return "wrong", "#e74c3c"
-
-        # --- Over 1.5
-        if subtype == "Over 1.5":
-            return ("correct", "#2ecc71") if (sh + sa) > 1.5 else ("wrong", "#e74c3c")
-
-        # --- BTTS
-        if subtype == "BTTS":
-            return ("correct", "#2ecc71") if (sh > 0 and sa > 0) else ("wrong", "#e74c3c")
-
-        # --- Équipe marque
-        if subtype == "Équipe marque":
-            if fx['home_team'] in suggestion and sh > 0:
-                return "correct", "#2ecc71"
-            if fx['away_team'] in suggestion and sa > 0:
-                return "correct", "#2ecc71"
-            return "wrong", "#e74c3c"
-
-        return "pending", "#bdc3c7"
-
-    # --- Mise à jour des signaux avec résultat réel ---
-    for i, sig in enumerate(sigs):
-        typ, sug, ic, probpct, src, _, _, _ = sig
-        res, color = _eval_result(typ, sug)
-        result_text = f"{sh}-{sa}" if (sh is not None and sa is not None) else "—"
-        sigs[i] = [typ, sug, ic, probpct, src, res, color, result_text]
-
-    return sigs
-
-
-# ----------------------------------------------------------
-# Lecture des seuils optimaux (issus de l’analyse globale)
-# ----------------------------------------------------------
-from bs4 import BeautifulSoup
-
-def _load_optimal_thresholds_from_global():
-    """
-    Ouvre analyse_globale_footbot.html et récupère {Type -> Seuil_optimal}.
-    Fallback sur None si absent.
-    """
-    try:
-        base = os.path.dirname(__file__)
-        path = os.path.join(base, "analyse_globale_footbot.html")
-        if not os.path.exists(path):
-            return {}
-        with open(path, "r", encoding="utf-8") as f:
-            html = f.read()
-        soup = BeautifulSoup(html, "html.parser")
-        table = soup.find("table", {"id": "tbl_summary"})
-        if not table: 
-            return {}
-        # pandas to_html => 1ère ligne = headers <th>
-        headers = [th.get_text(strip=True).lower() for th in table.find_all("th")]
-        rows = []
-        for tr in table.find_all("tr")[1:]:
-            tds = [td.get_text(strip=True) for td in tr.find_all("td")]
-            if len(tds) != len(headers): 
-                continue
-            rows.append(dict(zip(headers, tds)))
-
-        out = {}
-        for r in rows:
-            typ = r.get("type", "")
-            seuil = r.get("seuil optimal (%)") or r.get("seuil_optimal") or r.get("seuil optimal")
-            if typ and seuil:
-                try:
-                    out[typ] = float(str(seuil).replace(",", ".").replace("%","").strip())
-                except:
-                    pass
-        return out
-    except Exception:
-        return {}
+from scoring import compute_signals_for_profile
+from scoring_batch import compute_signals_batch
 
 
+def score_fixtures(fixtures, P):
+    """fx["_sigs"] pour chaque fixture ; un fixture en erreur est signalé et reçoit [] (les autres continuent)."""
+    def _log(f, e):
+        print(f"[❌ Signal] {f.get('home_team')} vs {f.get('away_team')} : {e}")
+    for fx, sigs in zip(fixtures, compute_signals_batch(fixtures, P, on_error=_log)):
+        fx["_sigs"] = sigs
 
 
 # (2) Remplacement du bloc "Analyse & Stats" -> lignes + HTML avec xG_home/xG_away + style "papier"
-def build_html(path_out, P, fixtures, today):
-    """Construit le rapport HTML complet (style du 23/10, ratios + filtres + tri)."""
+def build_html(path_out, P, fixtures, today, send=True):
+    """Construit le rapport HTML complet (style du 23/10, ratios + filtres + tri) ; send=False : pas d'envoi Telegram."""
 
     stats = {"analysed": 0, "signals": 0, "correct": 0, "wrong": 0}
     types = {
@@ -782,6 +340,7 @@ def build_html(path_out, P, fixtures, today):
     }
 
     rows_html = ""
+    history_rows = []          # mêmes signaux, structurés → signal_history (analyse_globale)
     current_league = None
 
     for fx in fixtures:
@@ -895,6 +454,13 @@ def build_html(path_out, P, fixtures, today):
                 f"<td style='{color}'>{result_display}</td>"
                 f"</tr>"
             )
+            history_rows.append({
+                "league": fx.get("league_name", ""),
+                "match": f"{fx.get('home_team','')} – {fx.get('away_team','')}",
+                "type": typ, "suggestion": sug, "odds": to_float(fx_odds),
+                "ic_label": ic, "proba": to_float(probpct), "source": src, "result": result_display,
+                "xg_home": to_float(fx.get("_xg_home_display", 0)), "xg_away": to_float(fx.get("_xg_away_display", 0)),
+            })
 
 
     # --- Calcul des ratios
@@ -992,22 +558,17 @@ window.addEventListener("load", function() {{ sortTable(11); }});
 </script>
 """
 
-    # Seuils optimaux depuis l'analyse globale (si disponible)
-    SEUILS_OPT = _load_optimal_thresholds_from_global()
+    # Seuils optimaux depuis l'analyse globale (artefact lu au démarrage, {} si absent)
+    SEUILS_OPT = optimal_thresholds(CALIBRATION_ARTIFACT)
 
     # === Encart de calibration automatique ===
-    import json
-
-    def _load_calibration_factors():
-        """Lit calibration_auto.json et retourne un texte de synthèse."""
+    def _calibration_summary():
+        """Texte de synthèse des facteurs de calibration chargés au démarrage."""
+        if not CALIB_FACTORS:
+            return "Calibration non trouvée."
         try:
-            path = os.path.join(BASE_DIR, "calibration_auto.json")
-            if not os.path.exists(path):
-                return "Calibration non trouvée."
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
             txt_parts = []
-            for k, v in data.items():
+            for k, v in CALIB_FACTORS.items():
                 delta = round((v - 1) * 100, 1)
                 symb = "+" if delta > 0 else ""
                 txt_parts.append(f"{k.upper()} {symb}{delta}%")
@@ -1015,7 +576,7 @@ window.addEventListener("load", function() {{ sortTable(11); }});
         except Exception as e:
             return f"Erreur calibration : {e}"
 
-    CALIB_INFO = _load_calibration_factors()
+    CALIB_INFO = _calibration_summary()
 
     calibration_html = f"""
 <div class='note' style='margin-top:10px; text-align:center;'>
@@ -1366,9 +927,12 @@ function resetFilters() {{
 
     with open(path_out, "w", encoding="utf-8") as f:
         f.write(html)
+    SIGNAL_HISTORY.record_day(today, history_rows, "build_html", sha1=file_sha1(path_out),
+                              taux_global=to_float(ratios["global"]))
 
     print(f"✅ Rapport HTML généré → {path_out}")
-    send_telegram_report(path_out)
+    if send:
+        send_telegram_report(path_out)
     
 
 def main():
@@ -1378,24 +942,24 @@ def main():
     print(f"📅 Date: {TODAY}")
 
     # --- Auto-détection du mode refresh (si le JSON du jour existe déjà)
-    fixtures_json = os.path.join(BASE_DIR, f"fixtures_raw_{TODAY}.json")
-    if os.path.exists(fixtures_json) and not args.refresh:
+    fixtures_json = find_snapshot("fixtures_raw", TODAY)
+    if fixtures_json and not args.refresh:
         print(f"♻️ Fichier détecté ({fixtures_json}) → passage automatique en mode refresh.")
         args.refresh = True
 
 
     if args.refresh:
         print("♻️ Mode rafraîchissement activé — lecture fixtures sauvegardés")
-        path = os.path.join(BASE_DIR, f"fixtures_raw_{TODAY}.json")
-        if not os.path.exists(path):
+        path = find_snapshot("fixtures_raw", TODAY)   # .jsonl.gz / .parquet / ancien .json
+        if not path:
             print("⚠️ Aucun fichier fixtures sauvegardé trouvé.")
             return
-        with open(path, "r", encoding="utf-8") as f:
-            fixtures = json.load(f)
 
-        # Mise à jour uniquement des scores
-        live_data = get_fixtures_by_date(TODAY)
-        live_map = {fx2["fixture_id"]: fx2 for fx2 in live_data if fx2.get("score_home") is not None}
+        # Mise à jour uniquement des scores : seules les ligues présentes dans le snapshot sont rappelées
+        fixtures = list(iter_snapshot(path))
+        with METRICS.timer("stage_s", stage="score_refresh"):
+            live_data = get_fixtures_by_date(TODAY, leagues=league_seasons_of(fixtures))
+        live_map = {fx2["id"]: fx2 for fx2 in live_data if fx2.get("score_home") is not None}
         updated = 0
         for fx in fixtures:
             fid = fx.get("fixture_id") or fx.get("id") or fx.get("fixture", {}).get("id")
@@ -1416,12 +980,16 @@ def main():
             "TEAM_C": 0.65, "TEAM_TC": 0.70
         }
 
-        # ♻️ Recalcule signaux et génère HTML post-match
-        for fx in fixtures:
-            fx["_sigs"] = compute_signals_for_profile(fx, P)
+        # ♻️ Recalcule signaux et génère HTML post-match (H2H préchargé, scoring sans réseau)
+        with METRICS.timer("stage_s", stage="h2h_prefetch"):
+            prefetch_h2h(fixtures)
+        with METRICS.timer("stage_s", stage="scoring"):
+            score_fixtures(fixtures, P)
+        count_signals(fixtures)
 
         out_name = f"FootBot — Profil Volume — {TODAY} (post-match).html"
-        build_html(os.path.join(BASE_DIR, out_name), P, fixtures, TODAY)
+        with METRICS.timer("stage_s", stage="build_html"):
+            build_html(os.path.join(BASE_DIR, out_name), P, fixtures, TODAY)
 
         #  ✅ Copie automatique du rapport dans le dossier rapports_quotidiens/
         RAPPORTS_DIR = os.path.join(BASE_DIR, "rapports_quotidiens")
@@ -1439,18 +1007,25 @@ def main():
     else:
         # 1️⃣ Chargement des matchs du jour
         print(f"\n🔎 Chargement des matchs du {TODAY} ...")
-        fixtures = get_fixtures_by_date(TODAY)
+        with METRICS.timer("stage_s", stage="fixtures"):
+            fixtures = get_fixtures_by_date(TODAY)   # ligues pertinentes seulement (FIXTURES_FETCH_MODE)
         
-        with open(f"fixtures_raw_{TODAY}.json", "w", encoding="utf-8") as f:
-            json.dump(fixtures, f, ensure_ascii=False, indent=2)
-        print(f"💾 Fixtures sauvegardés → fixtures_raw_{TODAY}.json")
+        raw_path, _ = save_snapshot("fixtures_raw", TODAY, fixtures)   # FOOTBOT_SNAPSHOT_FORMAT
+        print(f"💾 Fixtures sauvegardés → {os.path.basename(raw_path)}")
+
+        if args.dump_all or os.getenv("FOOTBOT_DUMP_ALL_FIXTURES", "").lower() in ("1", "true"):
+            world = get_fixtures_by_date(TODAY, mode="all")
+            world_path, _ = save_snapshot("fixtures_world", TODAY, world)
+            print(f"💾 Debug : {len(world)} matchs du monde → {os.path.basename(world_path)}")
 
         print(f"📦 {len(fixtures)} matchs récupérés pour la date {TODAY}")
 
         # 2️⃣ Filtrage des ligues pertinentes
-        fixtures = [fx for fx in fixtures if is_relevant_league(fx.get("country"), fx.get("league_name"))]
-        STATS["n_matches"] = len(fixtures)
-        print(f"🏆 Ligues pertinentes : {STATS['n_matches']}")
+        METRICS.inc("fixtures", len(fixtures), stage="fetched")
+        with METRICS.timer("stage_s", stage="league_filter"):
+            fixtures = [fx for fx in fixtures if LEAGUE_FILTER.is_relevant_fixture(fx)]
+        METRICS.inc("fixtures", len(fixtures), stage="relevant")
+        print(f"🏆 Ligues pertinentes : {len(fixtures)}")
         if not fixtures:
             print("⚠️ Aucun match pertinent trouvé.")
             return
@@ -1484,7 +1059,8 @@ def main():
 
         # ✅ Récupération des cotes sur tous les matchs
         print("🔎 Récupération des cotes du jour via API-Football...")
-        odds_map = fetch_odds_for_date(TODAY)
+        with METRICS.timer("stage_s", stage="odds"):
+            odds_map = fetch_odds_for_date(TODAY)
         print(f"✅ {len(odds_map)} matchs ont des cotes")
 
         fixtures = merge_odds(fixtures, odds_map)
@@ -1500,50 +1076,11 @@ def main():
 
 
 
-        for fx in fixtures:
-            add_injuries_influents(fx)
-            fx["home_form"] = get_recent_form(fx["home_id"], fx["league_id"], fx["season"], "home")
-            fx["away_form"] = get_recent_form(fx["away_id"], fx["league_id"], fx["season"], "away")
-
-            if is_european_competition(fx.get("league_name", "")):
-                fx = enrich_with_european_context(fx)
-
-            with ThreadPoolExecutor(max_workers=2) as pool:
-                results = list(pool.map(
-                    lambda args: get_team_expected(*args),
-                    [
-                        (fx["home_id"], fx["league_id"], fx["season"]),
-                        (fx["away_id"], fx["league_id"], fx["season"])
-                    ]
-                ))
-            api_home, api_away = results
-
-            try:
-                us_home = get_team_splits(fx["home_team"], fx["season"])
-                us_away = get_team_splits(fx["away_team"], fx["season"])
-            except Exception as e:
-                print(f"[⚠️] Understat indisponible pour {fx['home_team']} ou {fx['away_team']}: {e}")
-                us_home = us_away = {}
-
-            def merge_xg(us_val, api_val):
-                if us_val and api_val:
-                    return round(0.7 * us_val + 0.3 * api_val, 2)
-                return round(us_val or api_val or 1.2, 2)
-
-            fx["xg_home"] = merge_xg(us_home.get("xg_overall", 0), api_home.get("xg_for", 0))
-            fx["xga_home"] = merge_xg(us_home.get("xga_overall", 0), api_home.get("xga", 0))
-            fx["xg_away"] = merge_xg(us_away.get("xg_overall", 0), api_away.get("xg_for", 0))
-            fx["xga_away"] = merge_xg(us_away.get("xga_overall", 0), api_away.get("xga", 0))
-
-            print(f"[⚙️ Fusion xG] {fx['home_team']} {fx['xg_home']}/{fx['xga_home']}  vs  {fx['away_team']} {fx['xg_away']}/{fx['xga_away']}")
-
-            if (
-                (us_home and us_home.get("xg_overall", 0) > 0)
-                or (us_away and us_away.get("xg_overall", 0) > 0)
-            ):
-                STATS["n_understat"] += 1
-            else:
-                STATS["n_api"] += 1
+        # 4️⃣ Enrichissement concurrent (blessures, forme, xG API + Understat)
+        with METRICS.timer("stage_s", stage="enrichment"):
+            counts = enrich_fixtures(fixtures, european_hook=enrich_with_european_context)
+        for src, n in counts.items():
+            METRICS.inc("fixtures_enriched", n, xg=src)
 
         # 5️⃣ Seuils IC
         P = {
@@ -1553,20 +1090,13 @@ def main():
             "TEAM_C": 0.65, "TEAM_TC": 0.70
         }
 
-        # 6️⃣ Calcul des signaux
-        def safe_compute(f):
-            try:
-                sigs = compute_signals_for_profile(f, P)
-                f["_sigs"] = sigs
-                return sigs
-            except Exception as e:
-                print(f"[❌ Signal] {f.get('home_team')} vs {f.get('away_team')} : {e}")
-                f["_sigs"] = []
-                return []
+        # 6️⃣ Calcul des signaux (pur : H2H déjà dans fx["_h2h"])
+        with METRICS.timer("stage_s", stage="h2h_prefetch"):
+            prefetch_h2h(fixtures)  # no-op pour les fixtures déjà enrichis
 
         print("⚙️ Calcul des signaux...")
-        with ThreadPoolExecutor(max_workers=20) as ex:
-            list(ex.map(safe_compute, fixtures))
+        with METRICS.timer("stage_s", stage="scoring"):
+            score_fixtures(fixtures, P)
 
         # 7️⃣ Génération du rapport HTML
         out_name = f"FootBot — Profil Volume — {TODAY}.html"
@@ -1576,7 +1106,8 @@ def main():
         print("🔄 Mise à jour des scores finaux...")
         try:
             updated = 0
-            live_data = get_fixtures_by_date(TODAY)
+            with METRICS.timer("stage_s", stage="score_refresh"):
+                live_data = get_fixtures_by_date(TODAY, leagues=league_seasons_of(fixtures))
 
             live_map = {}
             for fx2 in live_data:
@@ -1599,19 +1130,40 @@ def main():
             print(f"[⚠️] Erreur lors du rafraîchissement des scores : {e}")
 
         print("♻️ Recalcul des signaux avec scores finaux...")
-        for fx in fixtures:
-            fx["_sigs"] = compute_signals_for_profile(fx, P)
+        with METRICS.timer("stage_s", stage="rescoring"):
+            score_fixtures(fixtures, P)
+        count_signals(fixtures)
 
-        build_html(out_path, P, fixtures, TODAY)
+        with METRICS.timer("stage_s", stage="build_html"):
+            build_html(out_path, P, fixtures, TODAY)
 
         print(f"✅ {len(fixtures)} matchs analysés | "
-              f"{STATS['n_understat']} Understat | "
-              f"{STATS['n_api']} API-Football | "
+              f"{METRICS.get('fixtures_enriched', xg='understat')} Understat | "
+              f"{METRICS.get('fixtures_enriched', xg='api')} API-Football | "
+              f"{METRICS.get('api_calls')} appels API | "
               f"{round(time.time() - START_TIME, 2)}s")
         print(f"📁 Rapport généré : {out_path}")
 
 
 
+def count_signals(fixtures):
+    """Compteur signals{type, league} sur les signaux finaux du run."""
+    for fx in fixtures:
+        for s in fx.get("_sigs") or []:
+            METRICS.inc("signals", type=s[0], league=fx.get("league_name"))
+
+
+def report_metrics():
+    """Fin de run : métriques en JSON (metrics/run_<date>_<heure>.json) + résumé console."""
+    path = os.path.join(METRICS_DIR, f"run_{TODAY}_{datetime.now().strftime('%H%M%S')}.json")
+    try:
+        METRICS.dump(path)
+        print("\n" + METRICS.summary())
+        print(f"📁 Métriques : {path}")
+    except Exception as e:
+        print(f"⚠️ Erreur export métriques : {e}")
+
+
 # ===================== TEST DE COHÉRENCE AVANT EXECUTION =====================
 def preflight_check():
     """
@@ -1642,7 +1194,7 @@ def preflight_check():
         sys.exit(1)
 
     # Vérifie les variables .env essentielles
-    env_keys = ["API_FOOTBALL_KEY"]
+    env_keys = ["API_FOOTBALL_KEY"] if HTTP_MODE != "replay" else []  # rejeu : aucune clé requise
     for k in env_keys:
         if not os.getenv(k):
             print(f"⚠️ Variable d'environnement manquante : {k}")
@@ -1681,7 +1233,13 @@ def preflight_check():
 
 # === POINT D’ENTRÉE ===
 if __name__ == "__main__":
+    args = parser.parse_args()
+    TODAY = get_run_date()
     preflight_check()   # 🔍 test rapide avant appels API
-    main()
+    try:
+        with METRICS.timer("stage_s", stage="total"):
+            main()
+    finally:
+        report_metrics()
 
 
@@ -0,0 +1,199 @@
+# ================================
+# metrics.py — FootBot PRO
+# Registre de métriques du run : compteurs, histogrammes, chronos (avec labels)
+#   METRICS.inc("api_calls", endpoint="/fixtures")
+#   with METRICS.timer("stage_s", stage="enrichment"): ...
+#   METRICS.dump(path) → JSON ; METRICS.summary() → résumé lisible
+# ================================
+import os
+import json
+import time
+import random
+import threading
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv("FOOTBOT_METRICS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics"))
+HIST_MAX_SAMPLES = 5000    # échantillons gardés par série (réservoir) pour les percentiles
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _fmt_labels(labels):
+    return ",".join(f"{k}={v}" for k, v in labels)
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "min", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.samples = []
+
+    def add(self, v, rnd):
+        self.count += 1
+        self.total += v
+        self.min = v if self.min is None else min(self.min, v)
+        self.max = v if self.max is None else max(self.max, v)
+        if len(self.samples) < HIST_MAX_SAMPLES:
+            self.samples.append(v)
+        else:
+            j = rnd.randrange(self.count)
+            if j < HIST_MAX_SAMPLES:
+                self.samples[j] = v
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        s = sorted(self.samples)
+        return s[min(len(s) - 1, int(q * len(s)))]
+
+    def as_dict(self):
+        return {
+            "count": self.count, "sum": round(self.total, 6),
+            "min": self.min, "max": self.max,
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.50), "p95": self.quantile(0.95),
+        }
+
+
+class MetricsRegistry:
+    """
+    Métriques process-wide, sûres entre threads.
+    Une série = nom + labels (endpoint, ns, result, stage, league...).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rnd = random.Random(0)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._hists = {}
+            self.started = time.time()
+
+    # ---------- écriture ----------
+    def inc(self, name, value=1, **labels):
+        k = _key(name, labels)
+        with self._lock:
+            self._counters[k] = self._counters.get(k, 0) + value
+
+    def observe(self, name, value, **labels):
+        k = _key(name, labels)
+        with self._lock:
+            h = self._hists.get(k)
+            if h is None:
+                h = self._hists[k] = _Histogram()
+            h.add(float(value), self._rnd)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Chrono (secondes) enregistré dans l'histogramme `name`, même si le bloc lève."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    # ---------- lecture ----------
+    def get(self, name, **labels):
+        """Valeur d'un compteur ; sans labels : somme de toutes ses séries."""
+        with self._lock:
+            if labels:
+                return self._counters.get(_key(name, labels), 0)
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    def snapshot(self):
+        with self._lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self._counters.items())]
+            hists = [dict({"name": n, "labels": dict(l)}, **h.as_dict()) for (n, l), h in sorted(self._hists.items())]
+        return {
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "elapsed_s": round(time.time() - self.started, 3),
+            "counters": counters,
+            "histograms": hists,
+        }
+
+    def dump(self, path):
+        """Écrit le snapshot JSON (écriture atomique) et retourne le chemin."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        return path
+
+    def summary(self):
+        """Résumé texte : étapes (temps), API par endpoint, cache par namespace, puis le reste."""
+        snap = self.snapshot()
+        hists = {}
+        for h in snap["histograms"]:
+            hists.setdefault(h["name"], []).append(h)
+        counters = {}
+        for c in snap["counters"]:
+            counters.setdefault(c["name"], []).append(c)
+        lines = [f"📈 Métriques du run ({snap['elapsed_s']:.1f}s)"]
+
+        stages = sorted(hists.pop("stage_s", []), key=lambda h: -h["sum"])
+        if stages:
+            lines.append("  ⏱️ Étapes :")
+            for h in stages:
+                lines.append(f"     {h['labels'].get('stage', '?'):<18} {h['sum']:8.2f}s"
+                             + (f"  ({h['count']}×)" if h["count"] > 1 else ""))
+
+        api = hists.pop("api_latency_s", [])
+        if api:
+            lines.append("  🌐 API-Football (appels | total | p50 | p95) :")
+            for h in sorted(api, key=lambda h: -h["count"]):
+                lines.append(f"     {h['labels'].get('endpoint', '?'):<22} {h['count']:>5} | {h['sum']:7.2f}s | "
+                             f"{1000 * h['p50']:6.0f} ms | {1000 * h['p95']:6.0f} ms")
+        counters.pop("api_calls", None)          # détail par statut : dans le JSON
+        wait = hists.pop("api_limiter_wait_s", [])
+        if wait:
+            lines.append(f"     attente quota (token bucket, cumulée sur les threads) : "
+                         f"{sum(h['sum'] for h in wait):.2f}s")
+
+        cache = counters.pop("cache_lookups", [])
+        if cache:
+            by_ns = {}
+            for c in cache:
+                d = by_ns.setdefault(c["labels"].get("ns", "?"), {"hit": 0, "miss": 0})
+                d[c["labels"].get("result", "miss")] += c["value"]
+            lines.append("  💾 Cache (hits / lectures) :")
+            for ns, d in sorted(by_ns.items(), key=lambda x: -(x[1]["hit"] + x[1]["miss"])):
+                n = d["hit"] + d["miss"]
+                lines.append(f"     {ns:<18} {d['hit']:>5} / {n:<5} ({100 * d['hit'] / n:.0f} %)")
+
+        signals = counters.pop("signals", [])
+        if signals:
+            by_type = {}
+            for c in signals:
+                t = c["labels"].get("type", "?")
+                by_type[t] = by_type.get(t, 0) + c["value"]
+            lines.append("  🎯 Signaux : " + " | ".join(f"{t} {n}" for t, n in sorted(by_type.items(), key=lambda x: -x[1]))
+                         + "  (détail par ligue dans le JSON)")
+
+        rest_c = [c for cs in counters.values() for c in cs]
+        if rest_c:
+            lines.append("  🔢 Compteurs :")
+            for c in rest_c:
+                lbl = _fmt_labels(sorted(c["labels"].items()))
+                lines.append(f"     {c['name']}{'{' + lbl + '}' if lbl else ''} = {c['value']}")
+        rest_h = [h for hs in hists.values() for h in hs]
+        if rest_h:
+            lines.append("  📊 Durées (n | total | p95) :")
+            for h in sorted(rest_h, key=lambda h: -h["sum"])[:15]:
+                lbl = _fmt_labels(sorted(h["labels"].items()))
+                lines.append(f"     {h['name']}{'{' + lbl + '}' if lbl else ''} : "
+                             f"{h['count']} | {h['sum']:.2f}s | {h['p95']:.3f}s")
+        return "\n".join(lines)
+
+
+# Instance unique du process (importée par tous les modules instrumentés)
+METRICS = MetricsRegistry()
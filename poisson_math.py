@@ -0,0 +1,153 @@
+# ================================
+# poisson_math.py — FootBot PRO
+# Poisson / Skellam légers (math + NumPy), sans scipy
+#   python poisson_math.py   → validation vs scipy.stats (si installé) + temps d'import
+# ================================
+import math
+import numpy as np
+
+SKELLAM_MAX_GOALS = 40     # troncature de la convolution (λ de football << 10)
+
+
+def _out(x, scalar):
+    return float(x[0]) if scalar else x
+
+
+def pmf_table(lam, max_k, tail=False):
+    """
+    Tableau (n, max_k+1) de P(X=k), k = 0..max_k, pour chaque λ.
+    tail=True : la dernière colonne porte toute la queue P(X >= max_k).
+    """
+    lam = np.maximum(0.0, np.atleast_1d(np.asarray(lam, dtype=np.float64)))
+    k = np.arange(max_k + 1)
+    log_fact = np.cumsum(np.log(np.maximum(k, 1)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logp = k * np.log(lam[:, None]) - lam[:, None] - log_fact
+    pmf = np.exp(logp)
+    pmf[lam == 0] = (k == 0)
+    if tail:
+        pmf[:, -1] += np.maximum(0.0, 1.0 - pmf.sum(axis=1))
+    return pmf
+
+
+def poisson_pmf(k, lam):
+    """P(X = k) — scalaires ou tableaux (diffusion NumPy)."""
+    if np.isscalar(k) and np.isscalar(lam):
+        k = int(k)
+        if k < 0:
+            return 0.0
+        if lam <= 0:
+            return 1.0 if k == 0 else 0.0
+        return math.exp(k * math.log(lam) - lam - math.lgamma(k + 1))
+    k, lam = np.broadcast_arrays(np.asarray(k), np.asarray(lam, dtype=np.float64))
+    kf = np.floor(k).astype(np.int64)
+    out = np.zeros(kf.shape)
+    ok = kf >= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logp = kf * np.log(lam) - lam - np.vectorize(math.lgamma)(np.maximum(kf, 0) + 1.0)
+    out[ok] = np.exp(logp[ok])
+    zero = ok & (lam <= 0)
+    out[zero] = (kf[zero] == 0)
+    return out
+
+
+def poisson_cdf(k, lam):
+    """P(X <= k) — k réel arrondi vers le bas (comme scipy), scalaires ou tableaux."""
+    if np.isscalar(k) and np.isscalar(lam):
+        k = math.floor(k)
+        if k < 0:
+            return 0.0
+        if lam <= 0:
+            return 1.0
+        # somme des termes par récurrence : p_i = p_{i-1} · λ / i
+        term = math.exp(-lam)
+        total = term
+        for i in range(1, k + 1):
+            term *= lam / i
+            total += term
+        return min(1.0, total)
+    k, lam = np.broadcast_arrays(np.asarray(k), np.asarray(lam, dtype=np.float64))
+    kf = np.floor(k).astype(np.int64)
+    kmax = int(max(0, kf.max())) if kf.size else 0
+    cum = np.cumsum(pmf_table(lam.ravel(), kmax), axis=1)
+    idx = np.clip(kf.ravel(), 0, kmax)
+    out = cum[np.arange(idx.size), idx]
+    out[kf.ravel() < 0] = 0.0
+    return np.minimum(1.0, out).reshape(kf.shape)
+
+
+def poisson_sf(k, lam):
+    """P(X > k)."""
+    return 1.0 - poisson_cdf(k, lam)
+
+
+def poisson_over(lam_total, line):
+    """P(total > line) pour une ligne Over (1.5, 2.5...)."""
+    return poisson_sf(math.floor(line) if np.isscalar(line) else np.floor(line), lam_total)
+
+
+def skellam_pmf(d, mu1, mu2, max_goals=SKELLAM_MAX_GOALS):
+    """P(X1 - X2 = d), X1 ~ P(mu1), X2 ~ P(mu2) indépendants (convolution tronquée)."""
+    scalar = np.isscalar(d) and np.isscalar(mu1) and np.isscalar(mu2)
+    d, mu1, mu2 = np.broadcast_arrays(np.atleast_1d(d), np.atleast_1d(mu1), np.atleast_1d(mu2))
+    p1 = pmf_table(mu1.ravel(), max_goals)
+    p2 = pmf_table(mu2.ravel(), max_goals)
+    dd = d.ravel().astype(np.int64)
+    k = np.arange(max_goals + 1)
+    j = k[None, :] + dd[:, None]                 # X1 = X2 + d
+    valid = (j >= 0) & (j <= max_goals)
+    p1_shift = np.take_along_axis(p1, np.clip(j, 0, max_goals), axis=1) * valid
+    out = (p1_shift * p2).sum(axis=1).reshape(d.shape)
+    return _out(out.ravel(), scalar) if scalar else out
+
+
+def skellam_cdf(d, mu1, mu2, max_goals=SKELLAM_MAX_GOALS):
+    """P(X1 - X2 <= d) — utile pour handicaps / victoire (1 - cdf(0)) / nul."""
+    scalar = np.isscalar(d) and np.isscalar(mu1) and np.isscalar(mu2)
+    d, mu1, mu2 = np.broadcast_arrays(np.atleast_1d(d), np.atleast_1d(mu1), np.atleast_1d(mu2))
+    p1 = pmf_table(mu1.ravel(), max_goals)
+    p2 = pmf_table(mu2.ravel(), max_goals)
+    # distribution complète de l'écart : d = i - j ∈ [-G, G]
+    n, g = p1.shape[0], max_goals
+    diff = np.zeros((n, 2 * g + 1))
+    for j in range(g + 1):
+        diff[:, g - j: 2 * g + 1 - j] += p1 * p2[:, j:j + 1]
+    cum = np.cumsum(diff, axis=1)
+    idx = np.clip(np.floor(d.ravel()).astype(np.int64) + g, -1, 2 * g)
+    out = np.where(idx < 0, 0.0, cum[np.arange(n), np.maximum(idx, 0)])
+    out = out.reshape(d.shape)
+    return _out(out.ravel(), scalar) if scalar else out
+
+
+if __name__ == "__main__":
+    import time
+    import importlib
+
+    rnd = np.random.default_rng(11)
+    lam = rnd.uniform(0.1, 6.0, 2000)
+    mu1, mu2 = rnd.uniform(0.2, 3.0, 2000), rnd.uniform(0.2, 2.5, 2000)
+
+    t0 = time.perf_counter()
+    for x in lam[:500]:
+        poisson_over(float(x), 1.5)
+    t_scalar = (time.perf_counter() - t0) / 500 * 1e6
+    print(f"poisson_over scalaire : {t_scalar:.2f} µs/appel")
+
+    try:
+        t0 = time.perf_counter()
+        stats = importlib.import_module("scipy.stats")
+        print(f"import scipy.stats : {1000 * (time.perf_counter() - t0):.0f} ms")
+    except ImportError:
+        print("scipy absent : validation croisée ignorée (dépendance optionnelle).")
+        raise SystemExit(0)
+
+    errs = {
+        "cdf": max(abs(poisson_cdf(k, float(x)) - stats.poisson.cdf(k, x)) for x in lam[:300] for k in range(8)),
+        "cdf[]": float(np.abs(poisson_cdf(2, lam) - stats.poisson.cdf(2, lam)).max()),
+        "pmf[]": float(np.abs(poisson_pmf(3, lam) - stats.poisson.pmf(3, lam)).max()),
+        "skellam_pmf": float(np.abs(skellam_pmf(1, mu1, mu2) - stats.skellam.pmf(1, mu1, mu2)).max()),
+        "skellam_cdf": float(np.abs(skellam_cdf(0, mu1, mu2) - stats.skellam.cdf(0, mu1, mu2)).max()),
+    }
+    for name, e in errs.items():
+        print(f"{name:<12} écart max {e:.2e} {'✅' if e < 1e-9 else '❌'}")
+    raise SystemExit(0 if all(e < 1e-9 for e in errs.values()) else 1)
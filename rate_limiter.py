@@ -0,0 +1,107 @@
+# ================================
+# rate_limiter.py — FootBot PRO
+# Token buckets process-wide (API-Football, Understat), partagés entre threads
+# ================================
+import os
+import time
+import threading
+
+# Débit initial (avant le 1er en-tête reçu) et taille de rafale max
+API_RATE_PER_MIN = float(os.getenv("API_RATE_PER_MIN", "300"))
+API_RATE_BURST = float(os.getenv("API_RATE_BURST", "10"))
+# Understat (pas d'en-tête de quota) : débit fixe, remplace l'ancienne pause de 0.2 s après chaque requête
+UNDERSTAT_RATE_PER_MIN = float(os.getenv("UNDERSTAT_RATE_PER_MIN", "300"))
+UNDERSTAT_RATE_BURST = float(os.getenv("UNDERSTAT_RATE_BURST", "5"))
+
+
+def _header_int(headers, name):
+    try:
+        v = headers.get(name)
+        return int(float(v)) if v is not None else None
+    except Exception:
+        return None
+
+
+class TokenBucket:
+    """
+    Seau à jetons : `rate` jetons/seconde, au plus `capacity` en réserve.
+    acquire() bloque le thread appelant jusqu'à obtenir un jeton.
+    Le débit s'ajuste sur les en-têtes de quota renvoyés par l'API.
+    """
+
+    def __init__(self, rate_per_min=API_RATE_PER_MIN, burst=API_RATE_BURST):
+        self._lock = threading.Lock()
+        self.rate = max(rate_per_min, 1.0) / 60.0
+        self.capacity = max(1.0, min(burst, rate_per_min))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.daily_remaining = None
+
+    # ---------- cœur ----------
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def _try_take(self):
+        """Prend un jeton si possible ; sinon renvoie le délai d'attente (s)."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            self._refill(now)
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    # ---------- adaptation aux quotas ----------
+    def update_from_headers(self, headers):
+        """
+        API-Football renvoie :
+          X-RateLimit-Limit / X-RateLimit-Remaining            → quota par minute
+          x-ratelimit-requests-limit / -requests-remaining     → quota journalier
+        """
+        if not headers:
+            return
+        per_min = _header_int(headers, "X-RateLimit-Limit")
+        per_min_left = _header_int(headers, "X-RateLimit-Remaining")
+        day_left = _header_int(headers, "x-ratelimit-requests-remaining")
+
+        with self._lock:
+            self._refill(time.monotonic())
+            if per_min and per_min > 0:
+                self.rate = per_min / 60.0
+                self.capacity = max(1.0, min(API_RATE_BURST, float(per_min)))
+                self.tokens = min(self.tokens, self.capacity)
+            if per_min_left is not None:
+                # le serveur fait foi : jamais plus de jetons que ce qu'il reste dans sa fenêtre
+                self.tokens = min(self.tokens, float(per_min_left))
+            if day_left is not None:
+                self.daily_remaining = day_left
+
+        if day_left is not None and day_left <= 0:
+            print("[⚠️ Quota] Quota journalier API-Football épuisé.")
+
+    def penalize(self, retry_after=None):
+        """Après un 429 : vide le seau et bloque jusqu'à Retry-After (ou 1 jeton)."""
+        with self._lock:
+            now = time.monotonic()
+            delay = retry_after if retry_after and retry_after > 0 else 1.0 / self.rate
+            self.tokens = 0.0
+            self.updated = now
+            self.blocked_until = max(self.blocked_until, now + delay)
+
+
+# Instances uniques partagées par tous les appels du process
+API_FOOTBALL_LIMITER = TokenBucket()
+UNDERSTAT_LIMITER = TokenBucket(UNDERSTAT_RATE_PER_MIN, UNDERSTAT_RATE_BURST)
@@ -0,0 +1,337 @@
+# ================================
+# scoring.py — FootBot PRO
+# Cœur modèle : calcule IC + signaux pour un fixture donné (sans I/O)
+# ================================
+from api_football_ext import (
+    implied_probs_1x2,
+    implied_prob_from_over,
+    implied_prob_from_btts,
+)
+from scoreline import fixture_markets
+
+DEBUG = False  # passer à True pour revoir les prints
+
+
+# ===================== PATCH BTTS + xG + HTML =====================
+# (1) Remplacement de compute_signals_for_profile : BTTS recalibré + pondération H2H
+def compute_signals_for_profile(fx, P):
+    """
+    Calcule les signaux (Résultat / Over 1.5 / BTTS / Équipe marque) d'un fixture enrichi.
+    Fonction pure : ne lit que fx et P (H2H attendu dans fx["_h2h"]), aucun accès réseau.
+    Écrit fx["_xg_home_display"] / fx["_xg_away_display"] comme avant.
+    """
+    sigs = []
+    btts_h2h = 0.0
+
+    # --- Ajustement spécial compétitions européennes (IC)
+    ic_adj = fx.get("_ic_adj", 1.0)
+
+    # --- Probabilités implicites (marché)
+    p_home_odds, _, p_away_odds = implied_probs_1x2(fx)
+    p_over15_odds = implied_prob_from_over(fx.get("odds_over_1_5") or 0)
+    p_btts_odds = implied_prob_from_btts(fx.get("odds_btts_yes") or 0)
+
+    # --- Forme récente (5–10) + xG proxies
+    hf, af = fx.get("home_form", {}), fx.get("away_form", {})
+    n_h, n_a = hf.get("n", 1), af.get("n", 1)
+
+    # ✅ Moyennes corrigées : pas de double division
+    def _per_match(val, n):
+        try:
+            v = float(val)
+        except Exception:
+            return 0.0
+        if v <= 3.0:
+            return v  # déjà une moyenne (API-Football)
+        return v / max(n or 1, 1)
+
+    gf_home = _per_match(hf.get("goals_for", hf.get("gf", 0)), n_h)
+    ga_home = _per_match(hf.get("goals_against", hf.get("ga", 0)), n_h)
+    gf_away = _per_match(af.get("goals_for", af.get("gf", 0)), n_a)
+    ga_away = _per_match(af.get("goals_against", af.get("ga", 0)), n_a)
+
+    xg_home = fx.get("xg_home") or max(0.2, float(hf.get("xg_for", 1.2)))
+    xg_away = fx.get("xg_away") or max(0.2, float(af.get("xg_for", 1.1)))
+
+    hw = hf.get("wins", 0) / (n_h or 1)
+    aw = af.get("wins", 0) / (n_a or 1)
+
+    # --- 1X2 (fusion simple marché + forme)
+    ph_raw = 0.35 * p_home_odds + 0.65 * hw
+    pa_raw = 0.35 * p_away_odds + 0.65 * aw
+    s = (ph_raw + pa_raw) or 1.0
+    ph, pa = ph_raw / s, pa_raw / s
+    chosen_side = "home" if ph >= pa else "away"
+    p_res = max(ph, pa)
+
+    # --- H2H (préchargé dans fx["_h2h"] par enrichment_async, aucun appel réseau ici)
+    h2h_data = {}
+    try:
+        h2h_data = fx.get("_h2h") or {}
+        btts_h2h = float(h2h_data.get("score_h2h", 0.0) or 0.0)
+        home_win_pct = float(h2h_data.get("home_win_pct", 0.0) or 0.0)
+        away_win_pct = float(h2h_data.get("away_win_pct", 0.0) or 0.0)
+    except Exception:
+        btts_h2h = 0.0
+        home_win_pct = away_win_pct = 0.0
+
+    # --- Bonus H2H Résultat
+    if chosen_side == "home":
+        if home_win_pct >= 0.8:   p_res = min(0.97, p_res + 0.05)
+        elif home_win_pct >= 0.7: p_res = min(0.97, p_res + 0.04)
+        elif home_win_pct >= 0.6: p_res = min(0.97, p_res + 0.02)
+    else:
+        if away_win_pct >= 0.8:   p_res = min(0.97, p_res + 0.05)
+        elif away_win_pct >= 0.7: p_res = min(0.97, p_res + 0.04)
+        elif away_win_pct >= 0.6: p_res = min(0.97, p_res + 0.02)
+
+    # ---------- Application du facteur IC EuropeMix AVANT fusion des probabilités ----------
+    # p_res = _apply_calib(p_res, "Résultat")
+
+    if ic_adj != 1.0:
+        p_res *= ic_adj
+        if p_over15_odds:
+            p_over15_odds *= ic_adj
+        if p_btts_odds:
+            p_btts_odds *= ic_adj
+
+    
+
+
+
+
+    # --- Sous-fonction locale pour ajouter un signal ---
+    def _add_signal(subtype, suggestion, p_model, odd):
+        """
+        Ajoute un signal dans la liste sigs avec sa proba, son IC et sa couleur.
+        """
+        try:
+            odd = float(odd) if odd and float(odd) > 1.0 else 2.0
+        except Exception:
+            odd = 2.0
+
+        res = "pending"
+        color = "#bdc3c7"
+        result_text = fx.get("result_display", "—")
+
+        sigs.append([
+            subtype,                     # Type (Résultat / Over / BTTS / Équipe marque)
+            suggestion,                  # Texte du signal
+            "IC",                        # Placeholder pour la colonne IC
+            round(100 * p_model, 1),     # Probabilité %
+            "Fusion",                    # Source
+            res,                         # Statut (pending, correct, wrong)
+            color,                       # Couleur
+            result_text                  # Score si dispo
+        ])
+
+# ---------- Over 1.5 révisé : forme prioritaire + ajustements contextuels ----------
+    odd_over = fx.get("odds_over_1_5")
+    p_over15_odds = implied_prob_from_over(odd_over)
+    lam_home, lam_away = max(0.15, xg_home), max(0.15, xg_away)
+
+    # Modèle Poisson basé sur les xG : lu dans la matrice des scores (scoreline.py)
+    try:
+        p_over15_poisson = float(fixture_markets(lam_home, lam_away, ou_lines=(1.5,), ah_lines=())["over_1.5"][0])
+    except Exception:
+        p_over15_poisson = 0.65
+
+    # Moyennes récentes de buts marqués et encaissés
+    gf_avg = (gf_home + gf_away) / 2
+    ga_avg = (ga_home + ga_away) / 2
+
+    # 🔸 Fusion pondérée : la forme compte plus que le marché
+    if p_over15_odds is not None:
+        p_over15 = (
+            0.20 * p_over15_odds +       # Marché → 20 %
+            0.40 * p_over15_poisson +    # Modèle xG → 40 %
+            0.40 * ((gf_avg + ga_avg) / 2.2)  # Forme (buts marqués/encaissés) → 40 %
+        )
+    else:
+        p_over15 = 0.60 * p_over15_poisson + 0.40 * ((gf_avg + ga_avg) / 2.2)
+
+    # 🔸 Ajustements contextuels : renforce la logique de forme récente
+    # Bonus si les deux équipes marquent souvent
+    if gf_home > 1.4 and gf_away > 1.4:
+        p_over15 += 0.04
+    # Pénalité si défenses très solides
+    if ga_home < 0.7 and ga_away < 0.7:
+        p_over15 -= 0.03
+
+    # 🔸 Ajustement selon la projection xG totale (match ouvert ou fermé)
+    if (xg_home + xg_away) > 2.3:
+        p_over15 += 0.03
+    elif (xg_home + xg_away) < 1.8:
+        p_over15 -= 0.04
+
+    # Clamp pour garder la proba dans des bornes réalistes
+    p_over15 = max(0.05, min(0.98, p_over15))
+
+    # 🔸 Application du filtre de sélectivité avant ajout du signal
+    # p_over15 = _apply_calib(p_over15, "Over 1.5")
+
+    if p_over15 >= P["O15_C"] and (xg_home + xg_away) > 2:
+        _add_signal("Over 1.5", f"Over 1.5 buts (cote {fx.get('odds_over_1_5')})", p_over15, fx.get("odds_over_1_5"))
+
+
+
+    # ---------- BTTS robuste (pondérations + garde-fous défensifs) ----------
+    home_attack_vs_away_def = (gf_home + ga_away) / 2.0
+    away_attack_vs_home_def = (gf_away + ga_home) / 2.0
+    xg_dual_intensity = min(1.0, 0.5 * (xg_home / 1.7) + 0.5 * (xg_away / 1.7))
+
+    w_odds, w_buts, w_xg, w_h2h = 0.30, 0.25, 0.20, 0.25
+    if not btts_h2h:
+        w_buts += 0.05; w_xg += 0.05; w_h2h = 0.05
+    else:
+        w_h2h = 0.20
+        w_buts = 0.30
+        w_xg = 0.15 
+
+    def clamp01(v, lo=0.30, hi=0.95):
+        return max(lo, min(hi, float(v)))
+
+    comp_buts = clamp01((home_attack_vs_away_def + away_attack_vs_home_def) / 2.0)
+    comp_xg   = clamp01(xg_dual_intensity)
+
+    p_btts_raw = (
+        w_odds * (p_btts_odds or 0.60) +
+        w_buts * comp_buts +
+        w_xg   * comp_xg +
+        w_h2h  * (btts_h2h or 0.0)
+    )
+
+    # 🛡️ Garde-fous défensifs
+    def defense_cap(ga_h, ga_a):
+         if ga_h < 0.70 and ga_a < 0.70:
+             return 0.55   # défenses d'acier
+         if ga_h < 0.80 and ga_a < 0.80:
+             return 0.65
+         if ga_h < 0.90 or ga_a < 0.90:
+             return 0.75
+         return 0.90
+
+
+    cap = defense_cap(ga_home, ga_away)
+    if (xg_home >= 1.35 and xg_away >= 1.35) and (ga_home >= 0.75 or ga_away >= 0.75):
+        cap = max(cap, 0.75)
+
+    symmetry_bonus = 0.0
+    if abs(xg_home - xg_away) <= 0.25 and (xg_home + xg_away) / 2 >= 1.35:
+          symmetry_bonus = 0.01
+
+
+    p_btts = min(cap, clamp01(p_btts_raw + symmetry_bonus, lo=0.35, hi=0.97))
+
+    # ⚠️ pénalité si match déséquilibré (asymétrie forte)
+    if abs(xg_home - xg_away) > 0.6:
+        p_btts = max(0.35, p_btts - 0.10)
+
+    # ✅ Conditions d’affichage BTTS révisées
+    ok_def = (ga_home >= 1.00 and ga_away >= 1.00)
+    ok_att = (gf_home >= 1.00 and gf_away >= 1.00)
+    ok_xg  = (xg_home >= 1.10 and xg_away >= 1.10)
+
+
+    # 🚫 Anti-faux positifs : si les deux défenses encaissent très peu
+    if (ga_home < 0.9 and ga_away < 0.9):
+      return sigs  # trop solides défensivement, on ne propose pas BTTS
+
+    #p_btts = _apply_calib(p_btts, "BTTS")
+
+    if p_btts >= P["BTTS_C"] and ok_def and ok_att and ok_xg:
+     _add_signal(
+         "BTTS",
+            f"Les deux équipes marquent (cote {fx.get('odds_btts_yes')})",
+         p_btts,
+          fx.get("odds_btts_yes")
+    )
+
+
+    # ---------- Équipe marque ----------
+    try:
+        home_condition = (gf_home >= 0.9 and ga_away >= 0.9 and xg_home >= 1.0)
+        away_condition = (gf_away >= 0.9 and ga_home >= 0.9 and xg_away >= 1.0)
+
+        if home_condition:
+            p_team_home = min(0.95, (
+                0.55*(xg_home/1.6) +
+                0.20*gf_home +
+                0.15*(btts_h2h or 0.0) +
+                0.10*(1 - (1/(1+ga_away)))
+            ))
+            # p_team_home = _apply_calib(p_team_home, "Équipe marque")
+            if p_team_home >= P["TEAM_C"]:
+                _add_signal("Équipe marque", f"{fx['home_team']} marque", p_team_home, fx.get("cote_home"))
+
+        if away_condition:
+            p_team_away = min(0.95, (
+                0.55*(xg_away/1.6) +
+                0.20*gf_away +
+                0.15*(btts_h2h or 0.0) +
+                0.10*(1 - (1/(1+ga_home)))
+            ))
+            # p_team_away = _apply_calib(p_team_away, "Équipe marque")
+            if p_team_away >= P["TEAM_C"]:
+                _add_signal("Équipe marque", f"{fx['away_team']} marque", p_team_away, fx.get("cote_away"))
+    except Exception as e:
+        if DEBUG:
+            print(f"[DEBUG] Erreur calcul équipe marque: {e}")
+
+    # ---------- Application finale IC EuropeMix ----------
+    if ic_adj != 1.0:
+        p_res *= ic_adj
+        p_over15 *= ic_adj
+        p_btts *= ic_adj
+
+    # ---------- Ajout des signaux principaux ----------
+    if p_res >= (P["RES_C"] + 0.05):
+        odd = fx.get("cote_home") if chosen_side == "home" else fx.get("cote_away")
+        label = "Victoire Domicile" if chosen_side == "home" else "Victoire Extérieure"
+        _add_signal("Résultat", f"{label} (cote {odd})", p_res, odd)
+
+    fx["_xg_home_display"] = round(xg_home, 2)
+    fx["_xg_away_display"] = round(xg_away, 2)
+
+        # --- Attribution du résultat réel (pour le calcul des ratios) ---
+    sh, sa = fx.get("score_home"), fx.get("score_away")
+
+    def _eval_result(subtype, suggestion):
+        """Détermine si le prono est correct, faux ou en attente."""
+        if sh is None or sa is None:
+            return "pending", "#bdc3c7"
+
+        # --- Résultat 1X2
+        if subtype == "Résultat":
+            if chosen_side == "home" and sh > sa:
+                return "correct", "#2ecc71"
+            if chosen_side == "away" and sa > sh:
+                return "correct", "#2ecc71"
+            return "wrong", "#e74c3c"
+
+        # --- Over 1.5
+        if subtype == "Over 1.5":
+            return ("correct", "#2ecc71") if (sh + sa) > 1.5 else ("wrong", "#e74c3c")
+
+        # --- BTTS
+        if subtype == "BTTS":
+            return ("correct", "#2ecc71") if (sh > 0 and sa > 0) else ("wrong", "#e74c3c")
+
+        # --- Équipe marque
+        if subtype == "Équipe marque":
+            if fx['home_team'] in suggestion and sh > 0:
+                return "correct", "#2ecc71"
+            if fx['away_team'] in suggestion and sa > 0:
+                return "correct", "#2ecc71"
+            return "wrong", "#e74c3c"
+
+        return "pending", "#bdc3c7"
+
+    # --- Mise à jour des signaux avec résultat réel ---
+    for i, sig in enumerate(sigs):
+        typ, sug, ic, probpct, src, _, _, _ = sig
+        res, color = _eval_result(typ, sug)
+        result_text = f"{sh}-{sa}" if (sh is not None and sa is not None) else "—"
+        sigs[i] = [typ, sug, ic, probpct, src, res, color, result_text]
+
+    return sigs
@@ -0,0 +1,353 @@
+# ================================
+# scoring_batch.py — FootBot PRO
+# Scoring vectorisé (NumPy) de tous les fixtures d'une journée / d'un backtest
+#   python scoring_batch.py            → contrôle de parité sur les snapshots fixtures_raw_*
+# ================================
+import os
+import sys
+import copy
+import time
+import random
+import numpy as np
+
+from api_football_ext import implied_probs_1x2, implied_prob_from_over, implied_prob_from_btts
+from scoring import compute_signals_for_profile
+from scoreline import fixture_markets
+from snapshot_store import list_snapshots, iter_snapshot
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+COLOR_PENDING, COLOR_OK, COLOR_KO = "#bdc3c7", "#2ecc71", "#e74c3c"
+
+# Poids BTTS (mêmes expressions que scoring.py, évaluées une fois)
+_W_ODDS = 0.30
+_W_NO_H2H = (0.25 + 0.05, 0.20 + 0.05, 0.05)   # (buts, xG, H2H) si pas de H2H
+_W_H2H = (0.30, 0.15, 0.20)
+
+
+# ----------------------------------------------------
+# 1) Fixtures → colonnes
+# ----------------------------------------------------
+def _per_match(val, n):
+    try:
+        v = float(val)
+    except Exception:
+        return 0.0
+    if v <= 3.0:
+        return v  # déjà une moyenne (API-Football)
+    return v / max(n or 1, 1)
+
+
+def _row(fx):
+    """Lecture d'un fixture, mêmes règles (et mêmes `or`) que compute_signals_for_profile."""
+    p_home_odds, _, p_away_odds = implied_probs_1x2(fx)
+    hf, af = fx.get("home_form", {}), fx.get("away_form", {})
+    n_h, n_a = hf.get("n", 1), af.get("n", 1)
+
+    h2h = fx.get("_h2h") or {}
+    try:
+        btts_h2h = float(h2h.get("score_h2h", 0.0) or 0.0)
+        home_win_pct = float(h2h.get("home_win_pct", 0.0) or 0.0)
+        away_win_pct = float(h2h.get("away_win_pct", 0.0) or 0.0)
+    except Exception:
+        btts_h2h = home_win_pct = away_win_pct = 0.0
+
+    return (
+        p_home_odds,
+        p_away_odds,
+        implied_prob_from_over(fx.get("odds_over_1_5")),
+        implied_prob_from_btts(fx.get("odds_btts_yes") or 0),
+        _per_match(hf.get("goals_for", hf.get("gf", 0)), n_h),
+        _per_match(hf.get("goals_against", hf.get("ga", 0)), n_h),
+        _per_match(af.get("goals_for", af.get("gf", 0)), n_a),
+        _per_match(af.get("goals_against", af.get("ga", 0)), n_a),
+        float(fx.get("xg_home") or max(0.2, float(hf.get("xg_for", 1.2)))),
+        float(fx.get("xg_away") or max(0.2, float(af.get("xg_for", 1.1)))),
+        hf.get("wins", 0) / (n_h or 1),
+        af.get("wins", 0) / (n_a or 1),
+        btts_h2h,
+        home_win_pct,
+        away_win_pct,
+        float(fx.get("_ic_adj", 1.0)),
+    )
+
+
+COLUMNS = (
+    "p_home_odds", "p_away_odds", "p_over15_odds", "p_btts_odds",
+    "gf_home", "ga_home", "gf_away", "ga_away",
+    "xg_home", "xg_away", "hw", "aw",
+    "btts_h2h", "home_win_pct", "away_win_pct", "ic_adj",
+)
+
+
+def to_columns(fixtures):
+    """
+    Retourne (cols, ok) : cols = {nom: np.ndarray float64} pour les fixtures lisibles,
+    ok = indices (dans `fixtures`) correspondants. Les autres passent par le chemin scalaire.
+    """
+    rows, ok = [], []
+    for i, fx in enumerate(fixtures):
+        try:
+            rows.append(_row(fx))
+            ok.append(i)
+        except Exception:
+            continue
+    arr = np.array(rows, dtype=np.float64).reshape(len(rows), len(COLUMNS))
+    return {name: arr[:, j] for j, name in enumerate(COLUMNS)}, ok
+
+
+# ----------------------------------------------------
+# 2) Probabilités + masques de seuils (vectorisé)
+# ----------------------------------------------------
+def score_columns(c, P):
+    """Probabilités Résultat / Over 1.5 / BTTS / Équipe marque et masques d'affichage."""
+    gf_home, ga_home, gf_away, ga_away = c["gf_home"], c["ga_home"], c["gf_away"], c["ga_away"]
+    xg_home, xg_away = c["xg_home"], c["xg_away"]
+    btts_h2h, ic = c["btts_h2h"], c["ic_adj"]
+
+    # --- 1X2 (fusion simple marché + forme)
+    ph_raw = 0.35 * c["p_home_odds"] + 0.65 * c["hw"]
+    pa_raw = 0.35 * c["p_away_odds"] + 0.65 * c["aw"]
+    s = ph_raw + pa_raw
+    s = np.where(s == 0, 1.0, s)
+    ph, pa = ph_raw / s, pa_raw / s
+    home_side = ph >= pa
+    p_res = np.maximum(ph, pa)
+
+    # --- Bonus H2H Résultat
+    win_pct = np.where(home_side, c["home_win_pct"], c["away_win_pct"])
+    bonus = np.select([win_pct >= 0.8, win_pct >= 0.7, win_pct >= 0.6], [0.05, 0.04, 0.02], 0.0)
+    p_res = np.where(bonus > 0, np.minimum(0.97, p_res + bonus), p_res)
+
+    # --- IC EuropeMix (avant fusion)
+    p_res = p_res * ic
+    p_btts_odds = c["p_btts_odds"] * ic
+
+    # --- Over 1.5
+    xg_sum = xg_home + xg_away
+    p_over15_poisson = fixture_markets(np.maximum(0.15, xg_home), np.maximum(0.15, xg_away),
+                                       ou_lines=(1.5,), ah_lines=())["over_1.5"]
+    gf_avg = (gf_home + gf_away) / 2
+    ga_avg = (ga_home + ga_away) / 2
+    p_over15 = (
+        0.20 * c["p_over15_odds"] +
+        0.40 * p_over15_poisson +
+        0.40 * ((gf_avg + ga_avg) / 2.2)
+    )
+    p_over15 = np.where((gf_home > 1.4) & (gf_away > 1.4), p_over15 + 0.04, p_over15)
+    p_over15 = np.where((ga_home < 0.7) & (ga_away < 0.7), p_over15 - 0.03, p_over15)
+    p_over15 = np.where(xg_sum > 2.3, p_over15 + 0.03, np.where(xg_sum < 1.8, p_over15 - 0.04, p_over15))
+    p_over15 = np.maximum(0.05, np.minimum(0.98, p_over15))
+    show_over = (p_over15 >= P["O15_C"]) & (xg_sum > 2)
+
+    # --- BTTS
+    home_attack_vs_away_def = (gf_home + ga_away) / 2.0
+    away_attack_vs_home_def = (gf_away + ga_home) / 2.0
+    xg_dual_intensity = np.minimum(1.0, 0.5 * (xg_home / 1.7) + 0.5 * (xg_away / 1.7))
+
+    has_h2h = btts_h2h != 0
+    w_buts = np.where(has_h2h, _W_H2H[0], _W_NO_H2H[0])
+    w_xg = np.where(has_h2h, _W_H2H[1], _W_NO_H2H[1])
+    w_h2h = np.where(has_h2h, _W_H2H[2], _W_NO_H2H[2])
+
+    def clamp01(v, lo=0.30, hi=0.95):
+        return np.maximum(lo, np.minimum(hi, v))
+
+    comp_buts = clamp01((home_attack_vs_away_def + away_attack_vs_home_def) / 2.0)
+    comp_xg = clamp01(xg_dual_intensity)
+    p_btts_raw = (
+        _W_ODDS * np.where(p_btts_odds != 0, p_btts_odds, 0.60) +
+        w_buts * comp_buts +
+        w_xg * comp_xg +
+        w_h2h * btts_h2h
+    )
+
+    cap = np.select(
+        [(ga_home < 0.70) & (ga_away < 0.70), (ga_home < 0.80) & (ga_away < 0.80), (ga_home < 0.90) | (ga_away < 0.90)],
+        [0.55, 0.65, 0.75],
+        0.90,
+    )
+    open_game = (xg_home >= 1.35) & (xg_away >= 1.35) & ((ga_home >= 0.75) | (ga_away >= 0.75))
+    cap = np.where(open_game, np.maximum(cap, 0.75), cap)
+    symmetry_bonus = np.where((np.abs(xg_home - xg_away) <= 0.25) & (xg_sum / 2 >= 1.35), 0.01, 0.0)
+
+    p_btts = np.minimum(cap, clamp01(p_btts_raw + symmetry_bonus, lo=0.35, hi=0.97))
+    p_btts = np.where(np.abs(xg_home - xg_away) > 0.6, np.maximum(0.35, p_btts - 0.10), p_btts)
+
+    ok_def = (ga_home >= 1.00) & (ga_away >= 1.00)
+    ok_att = (gf_home >= 1.00) & (gf_away >= 1.00)
+    ok_xg = (xg_home >= 1.10) & (xg_away >= 1.10)
+
+    # 🚫 Anti-faux positifs : le scalaire s'arrête ici (pas d'Équipe marque / Résultat)
+    stop = (ga_home < 0.9) & (ga_away < 0.9)
+    show_btts = ~stop & (p_btts >= P["BTTS_C"]) & ok_def & ok_att & ok_xg
+
+    # --- Équipe marque
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_team_home = np.minimum(0.95, (
+            0.55 * (xg_home / 1.6) +
+            0.20 * gf_home +
+            0.15 * btts_h2h +
+            0.10 * (1 - (1 / (1 + ga_away)))
+        ))
+        p_team_away = np.minimum(0.95, (
+            0.55 * (xg_away / 1.6) +
+            0.20 * gf_away +
+            0.15 * btts_h2h +
+            0.10 * (1 - (1 / (1 + ga_home)))
+        ))
+    home_condition = (gf_home >= 0.9) & (ga_away >= 0.9) & (xg_home >= 1.0)
+    away_condition = (gf_away >= 0.9) & (ga_home >= 0.9) & (xg_away >= 1.0)
+    # ZeroDivisionError côté scalaire : le calcul s'interrompt à l'équipe fautive
+    home_err = home_condition & (1 + ga_away == 0)
+    away_err = away_condition & (1 + ga_home == 0)
+    show_team_home = ~stop & home_condition & ~home_err & (p_team_home >= P["TEAM_C"])
+    show_team_away = ~stop & away_condition & ~home_err & ~away_err & (p_team_away >= P["TEAM_C"])
+
+    # --- IC EuropeMix final + Résultat
+    p_res = p_res * ic
+    show_res = ~stop & (p_res >= (P["RES_C"] + 0.05))
+
+    return {
+        "home_side": home_side, "stop": stop,
+        "p_res": p_res, "p_over15": p_over15, "p_btts": p_btts,
+        "p_team_home": p_team_home, "p_team_away": p_team_away,
+        "show_res": show_res, "show_over": show_over, "show_btts": show_btts,
+        "show_team_home": show_team_home, "show_team_away": show_team_away,
+    }
+
+
+# ----------------------------------------------------
+# 3) Colonnes → listes _sigs (format build_html)
+# ----------------------------------------------------
+def _eval_result(fx, subtype, suggestion, home_side, sh, sa):
+    if sh is None or sa is None:
+        return "pending", COLOR_PENDING
+    if subtype == "Résultat":
+        return ("correct", COLOR_OK) if (sh > sa if home_side else sa > sh) else ("wrong", COLOR_KO)
+    if subtype == "Over 1.5":
+        return ("correct", COLOR_OK) if (sh + sa) > 1.5 else ("wrong", COLOR_KO)
+    if subtype == "BTTS":
+        return ("correct", COLOR_OK) if (sh > 0 and sa > 0) else ("wrong", COLOR_KO)
+    if subtype == "Équipe marque":
+        if fx["home_team"] in suggestion and sh > 0:
+            return "correct", COLOR_OK
+        if fx["away_team"] in suggestion and sa > 0:
+            return "correct", COLOR_OK
+        return "wrong", COLOR_KO
+    return "pending", COLOR_PENDING
+
+
+def _signals_for(fx, r, i):
+    out = []
+    if r["show_over"][i]:
+        out.append(("Over 1.5", f"Over 1.5 buts (cote {fx.get('odds_over_1_5')})", r["p_over15"][i]))
+    if r["show_btts"][i]:
+        out.append(("BTTS", f"Les deux équipes marquent (cote {fx.get('odds_btts_yes')})", r["p_btts"][i]))
+    if r["show_team_home"][i]:
+        out.append(("Équipe marque", f"{fx['home_team']} marque", r["p_team_home"][i]))
+    if r["show_team_away"][i]:
+        out.append(("Équipe marque", f"{fx['away_team']} marque", r["p_team_away"][i]))
+    if r["show_res"][i]:
+        home_side = bool(r["home_side"][i])
+        odd = fx.get("cote_home") if home_side else fx.get("cote_away")
+        label = "Victoire Domicile" if home_side else "Victoire Extérieure"
+        out.append(("Résultat", f"{label} (cote {odd})", r["p_res"][i]))
+
+    sigs = []
+    if r["stop"][i]:
+        # sortie anticipée du scalaire : signaux laissés "pending", pas d'affichage xG
+        result_text = fx.get("result_display", "—")
+        for typ, sug, p in out:
+            sigs.append([typ, sug, "IC", round(100 * float(p), 1), "Fusion", "pending", COLOR_PENDING, result_text])
+        return sigs
+
+    fx["_xg_home_display"] = round(float(r["xg_home"][i]), 2)
+    fx["_xg_away_display"] = round(float(r["xg_away"][i]), 2)
+    sh, sa = fx.get("score_home"), fx.get("score_away")
+    result_text = f"{sh}-{sa}" if (sh is not None and sa is not None) else "—"
+    for typ, sug, p in out:
+        res, color = _eval_result(fx, typ, sug, bool(r["home_side"][i]), sh, sa)
+        sigs.append([typ, sug, "IC", round(100 * float(p), 1), "Fusion", res, color, result_text])
+    return sigs
+
+
+def compute_signals_batch(fixtures, P, on_error=None):
+    """
+    Équivalent vectorisé de [compute_signals_for_profile(fx, P) for fx in fixtures].
+    Mêmes effets de bord (_xg_home_display / _xg_away_display) ; les fixtures illisibles
+    passent par la fonction scalaire, qui lève la même exception qu'avant.
+    on_error(fx, exc) : si fourni, l'exception est transmise et le fixture reçoit [] (les autres sont scorés).
+    """
+    if not fixtures:
+        return []
+    cols, ok = to_columns(fixtures)
+    out = [None] * len(fixtures)
+    if ok:
+        r = score_columns(cols, P)
+        r["xg_home"], r["xg_away"] = cols["xg_home"], cols["xg_away"]
+        for j, i in enumerate(ok):
+            out[i] = _signals_for(fixtures[i], r, j)
+    for i, sigs in enumerate(out):
+        if sigs is None:
+            try:
+                out[i] = compute_signals_for_profile(fixtures[i], P)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(fixtures[i], e)
+                out[i] = []
+    return out
+
+
+# ----------------------------------------------------
+# Contrôle de parité (fixtures sauvegardés)
+# ----------------------------------------------------
+def _synthetic_enrichment(fx, rnd):
+    """Les fixtures_raw_* sont bruts (avant enrichissement) : forme/xG/H2H tirés au hasard, seedés."""
+    if not fx.get("home_form"):
+        fx["home_form"] = {"n": rnd.choice([0, 3, 5, 10]), "wins": rnd.randint(0, 5),
+                           "goals_for": round(rnd.uniform(0, 14), 2), "goals_against": round(rnd.uniform(0, 12), 2),
+                           "xg_for": round(rnd.uniform(0.3, 2.5), 2)}
+    if not fx.get("away_form"):
+        fx["away_form"] = {"n": rnd.choice([0, 3, 5, 10]), "wins": rnd.randint(0, 5),
+                           "goals_for": round(rnd.uniform(0, 3), 2), "goals_against": round(rnd.uniform(0, 3), 2),
+                           "xg_for": round(rnd.uniform(0.3, 2.5), 2)}
+    if rnd.random() < 0.8:
+        fx.setdefault("xg_home", round(rnd.uniform(0.3, 2.8), 2))
+        fx.setdefault("xg_away", round(rnd.uniform(0.3, 2.5), 2))
+    for k, lo, hi in (("odds_over_1_5", 1.05, 2.2), ("odds_btts_yes", 1.4, 2.8),
+                      ("odds_home", 1.2, 6.0), ("odds_draw", 2.8, 5.0), ("odds_away", 1.3, 8.0)):
+        if fx.get(k) is None and rnd.random() < 0.85:
+            fx[k] = round(rnd.uniform(lo, hi), 2)
+    if rnd.random() < 0.15:
+        fx["_ic_adj"] = rnd.choice([0.90, 0.95])
+    fx.setdefault("_h2h", {"n": 0, "score_h2h": 0.0} if rnd.random() < 0.4 else
+                  {"n": rnd.randint(1, 10), "score_h2h": round(rnd.uniform(0, 1.6), 2)})
+    return fx
+
+
+def parity_check(paths=None, P=None):
+    P = P or {"RES_C": 0.70, "O15_C": 0.60, "BTTS_C": 0.70, "TEAM_C": 0.65}
+    paths = paths or list_snapshots("fixtures_raw", BASE_DIR)
+    rnd = random.Random(2025)
+    fixtures = [_synthetic_enrichment(fx, rnd) for p in paths for fx in iter_snapshot(p)]
+
+    ref_fx, new_fx = copy.deepcopy(fixtures), copy.deepcopy(fixtures)
+    t0 = time.perf_counter()
+    ref = [compute_signals_for_profile(fx, P) for fx in ref_fx]
+    t1 = time.perf_counter()
+    new = compute_signals_batch(new_fx, P)
+    t2 = time.perf_counter()
+
+    bad = [i for i in range(len(fixtures)) if ref[i] != new[i] or ref_fx[i] != new_fx[i]]
+    n_sigs = sum(len(s) for s in ref)
+    print(f"{len(fixtures)} fixtures, {n_sigs} signaux | scalaire {1000 * (t1 - t0):.1f} ms | "
+          f"batch {1000 * (t2 - t1):.1f} ms | écarts : {len(bad)}")
+    for i in bad[:5]:
+        print(f"  ❌ {fixtures[i].get('home_team')} vs {fixtures[i].get('away_team')}\n     ref={ref[i]}\n     new={new[i]}")
+    return not bad
+
+
+if __name__ == "__main__":
+    sys.exit(0 if parity_check(sys.argv[1:] or None) else 1)
@@ -0,0 +1,226 @@
+# ================================
+# signal_eval.py — FootBot PRO
+# Évaluation gagné / perdu des signaux, vectorisée (pandas / numpy)
+#   evaluate_won(df) ≡ df.apply(is_won, axis=1) sur les colonnes Type, Suggestion, Match, Resultat
+#   python signal_eval.py [N]  → parité vs is_won sur les rapports + chrono sur l'historique ×N
+# ================================
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Marchés (catégories de Type), dans l'ordre de priorité des tests de is_won
+MARKETS = ("Résultat", "Over 1.5", "BTTS", "Équipe marque")
+
+# Score "2–1" / "1-0" / "3:2" : exactement un séparateur, deux entiers (espaces tolérés, comme int())
+_SCORE_RE = r"^\s*(\+?\d+(?:_\d+)*)\s*[–\-:]\s*(\+?\d+(?:_\d+)*)\s*$"
+
+
+# ----------------------------------------------------
+# Référence ligne à ligne (ancienne version de analyse_globale) : oracle du contrôle de parité
+# ----------------------------------------------------
+def parse_score(score):
+    """Extrait buts domicile / extérieur à partir du texte de score ('2–1', '1-0', etc.)"""
+    if isinstance(score, str):
+        parts = re.split(r"[–\-:]", score)
+        if len(parts) == 2:
+            try:
+                return int(parts[0].strip()), int(parts[1].strip())
+            except ValueError:
+                return None, None
+    return None, None
+
+
+def is_won(row):
+    """Retourne True si le pari est gagnant selon le type et le score final."""
+    sh, sa = parse_score(row.get("Resultat"))
+    if sh is None:
+        return None  # match non joué ou score vide
+
+    t = str(row.get("Type") or "").lower().strip()
+    sugg = str(row.get("Suggestion") or "").lower()
+
+    # Résultat
+    if "résultat" in t or "result" in t:
+        if sh > sa and ("domicile" in sugg or "home" in sugg):
+            return True
+        if sa > sh and ("extérieur" in sugg or "away" in sugg):
+            return True
+        if sh == sa and ("nul" in sugg or "draw" in sugg):
+            return True
+        return False
+
+    # Over 1.5
+    if "over" in t and "1.5" in t:
+        return (sh + sa) > 1.5
+
+    # BTTS
+    if "btts" in t or "deux" in t or "both" in t:
+        return (sh > 0 and sa > 0)
+
+    # Équipe marque
+    if "équipe marque" in t or "equipe marque" in t:
+        home_team = str(row.get("Match")).split("–")[0].strip().lower()
+        away_team = str(row.get("Match")).split("–")[-1].strip().lower()
+        if home_team in sugg and sh > 0:
+            return True
+        if away_team in sugg and sa > 0:
+            return True
+        return False
+
+    return None
+
+
+# ----------------------------------------------------
+# Version vectorisée : règles évaluées une fois par valeur distincte, puis diffusées (numpy)
+# ----------------------------------------------------
+def _factorize(s, n):
+    """(codes, valeurs distinctes) ; chaque valeur manquante garde sa propre entrée (str(None) ≠ str(NaN))."""
+    if s is None:
+        return np.zeros(n, dtype=np.intp), [None]
+    codes, uniques = pd.factorize(s)
+    uniques = list(uniques)
+    missing = np.flatnonzero(codes == -1)
+    if len(missing):
+        codes = codes.copy()
+        codes[missing] = np.arange(len(uniques), len(uniques) + len(missing))
+        uniques.extend(pd.Series(s).iloc[missing].tolist())
+    return codes, uniques
+
+
+def _market(t):
+    t = str(t or "").lower().strip()
+    if "résultat" in t or "result" in t:
+        return 0
+    if "over" in t and "1.5" in t:
+        return 1
+    if "btts" in t or "deux" in t or "both" in t:
+        return 2
+    if "équipe marque" in t or "equipe marque" in t:
+        return 3
+    return -1
+
+
+def classify_market(types, n=None):
+    """Type (texte libre) → Categorical MARKETS (NaN si non reconnu), mêmes règles que is_won."""
+    codes, uniques = _factorize(types, len(types) if n is None else n)
+    return pd.Categorical.from_codes(np.array([_market(t) for t in uniques], dtype=np.int8)[codes],
+                                     categories=list(MARKETS))
+
+
+def parse_scores(results, n=None):
+    """Resultat → (buts domicile, buts extérieur) en float, NaN si pas de score (parse_score par valeur)."""
+    codes, uniques = _factorize(results, len(results) if n is None else n)
+    goals = np.array([parse_score(r) for r in uniques], dtype=float).reshape(-1, 2)   # None → NaN
+    return goals[codes, 0], goals[codes, 1]
+
+
+def evaluate_won(df):
+    """
+    Colonne 'won' (True / False / None), identique à df.apply(is_won, axis=1) :
+    score parsé une fois par valeur distincte, Type classé en Categorical, mots-clés de
+    la suggestion par valeur distincte, puis opérations booléennes par marché.
+    """
+    n = len(df)
+    if n == 0:
+        return pd.Series([], index=df.index, dtype=object)
+    col = lambda name: df[name] if name in df else None
+    sh, sa = parse_scores(col("Resultat"), n)
+    market = classify_market(col("Type"), n).codes
+
+    played = ~np.isnan(sh)
+    won = np.full(n, None, dtype=object)
+    res = played & (market == 0)
+    team = played & (market == 3)
+
+    # suggestion : seulement là où elle compte (Résultat, Équipe marque)
+    need = res | team
+    s_codes = np.zeros(n, dtype=np.intp)
+    s_codes[need], s_uniques = _factorize(None if col("Suggestion") is None else col("Suggestion")[need],
+                                          int(need.sum()))
+    s_text = [str(x or "").lower() for x in s_uniques] or [""]   # aucune ligne concernée : s_codes = 0
+    kw = lambda *words: np.array([any(w in t for w in words) for t in s_text], dtype=bool)[s_codes]
+
+    won[res] = ((sh > sa) & kw("domicile", "home") | (sa > sh) & kw("extérieur", "away")
+                | (sh == sa) & kw("nul", "draw"))[res].astype(object)
+
+    o15 = played & (market == 1)
+    won[o15] = (sh + sa > 1.5)[o15].astype(object)
+
+    btts = played & (market == 2)
+    won[btts] = ((sh > 0) & (sa > 0))[btts].astype(object)
+
+    if team.any():
+        # équipe citée dans la suggestion : un test par couple (match, suggestion) distinct
+        m_codes, m_uniques = _factorize(None if col("Match") is None else col("Match")[team], int(team.sum()))
+        sides = [str(m).split("–") for m in m_uniques]
+        home_u = [p[0].strip().lower() for p in sides]
+        away_u = [p[-1].strip().lower() for p in sides]
+        pairs = m_codes.astype(np.int64) * len(s_text) + s_codes[team]
+        pair_u, inv = np.unique(pairs, return_inverse=True)
+        pm, ps = np.divmod(pair_u, len(s_text))
+        home_in = np.array([home_u[m] in s_text[x] for m, x in zip(pm, ps)], dtype=bool)[inv]
+        away_in = np.array([away_u[m] in s_text[x] for m, x in zip(pm, ps)], dtype=bool)[inv]
+        won[team] = (home_in & (sh[team] > 0) | away_in & (sa[team] > 0)).astype(object)
+
+    # même dtype que df.apply : bool si aucun None, sinon object
+    out = pd.Series(won, index=df.index)
+    return out.astype(bool) if not (won == None).any() else out  # noqa: E711
+
+
+# ----------------------------------------------------
+# Contrôle de parité + chrono
+# ----------------------------------------------------
+_EDGE_CASES = [
+    ("Résultat", "Victoire domicile", "A – B", "2–1"), ("Résultat", "Victoire extérieure", "A – B", "0 - 3"),
+    ("Résultat", "Match nul", "A – B", "1:1"), ("Result", "Home win", "A – B", "1–1"),
+    ("Over 1.5", "Over 1.5 buts", "A – B", "1–0"), ("Over 1.5", "Over 1.5 buts", "A – B", " 2 – 0 "),
+    ("BTTS", "Les deux équipes marquent", "A – B", "1–0"), ("BTTS", "BTTS oui", "A – B", "+1–1_0"),
+    ("Équipe marque", "A marque", "A – B", "0–2"), ("Équipe marque", "B marque", "A – B", "0–2"),
+    ("Equipe marque", "b marque", "A – B", "1–0"), ("Équipe marque", "X marque", None, "1–1"),
+    ("Équipe marque", "X marque", "– B", "1–0"), ("Corners", "Over 9.5", "A – B", "2–1"),
+    ("BTTS", None, "A – B", "2–1"), ("BTTS", "oui", "A – B", "—"), ("BTTS", "oui", "A – B", None),
+    ("BTTS", "oui", "A – B", float("nan")), ("BTTS", "oui", "A – B", "1-2-3"), ("BTTS", "oui", "A – B", "a–1"),
+    (None, "oui", "A – B", "2–1"), ("Over 1.5", float("nan"), "A – B", "٣–1"), ("  RÉSULTAT ", "DOMICILE", "A – B", "3–1"),
+]
+
+
+def _history_frame():
+    """Signaux des rapports existants (parsing lxml de backfill_history), colonnes de analyse_globale."""
+    import glob
+    import os
+    from backfill_history import RAPPORTS_DIR, REPORT_GLOB, parse_report
+    rows = [r for p in sorted(glob.glob(os.path.join(glob.escape(RAPPORTS_DIR), REPORT_GLOB)))
+            for r in parse_report(p)["rows"]]
+    return pd.DataFrame(rows).rename(columns={"type": "Type", "suggestion": "Suggestion", "match": "Match",
+                                               "result": "Resultat"})
+
+
+def parity_check(scale=100):
+    edge = pd.DataFrame(_EDGE_CASES, columns=["Type", "Suggestion", "Match", "Resultat"])
+    hist = _history_frame()
+    ok = True
+    for name, df in (("cas limites", edge), ("rapports", hist)):
+        ref = df.apply(is_won, axis=1)
+        new = evaluate_won(df)
+        bad = [(i, ref[i], new[i]) for i in df.index if ref[i] is not new[i] and ref[i] != new[i]]
+        ok &= not bad and ref.dtype == new.dtype
+        print(f"{name:<12} {len(df):>7} lignes | écarts : {len(bad)} | dtype {ref.dtype} / {new.dtype}")
+        for i, r, v in bad[:10]:
+            print(f"  ❌ {df.loc[i].to_dict()} → is_won={r} evaluate_won={v}")
+
+    big = pd.concat([hist] * scale, ignore_index=True)
+    t0 = time.perf_counter()
+    big.apply(is_won, axis=1)
+    t1 = time.perf_counter()
+    evaluate_won(big)
+    t2 = time.perf_counter()
+    print(f"historique ×{scale} ({len(big)} lignes) : apply(is_won) {t1 - t0:.2f}s | "
+          f"evaluate_won {t2 - t1:.3f}s | ×{(t1 - t0) / max(t2 - t1, 1e-9):.0f}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if parity_check(int(sys.argv[1]) if len(sys.argv) > 1 else 100) else 1)
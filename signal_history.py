@@ -0,0 +1,211 @@
+# ================================
+# signal_history.py — FootBot PRO
+# Historique des signaux (SQLite) : une ligne par signal publié, un enregistrement par rapport
+#   écrit par main.build_html à chaque rapport, complété par analyse_globale pour les
+#   rapports HTML inconnus ou modifiés (hash) → plus de re-parsing de tout l'historique
+#   python signal_history.py   → résumé de la base (jours, signaux, origine)
+# ================================
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HISTORY_DB = os.getenv("FOOTBOT_HISTORY_DB", os.path.join(BASE_DIR, "cache", "signal_history.sqlite"))
+HISTORY_BUSY_TIMEOUT_MS = int(os.getenv("HISTORY_BUSY_TIMEOUT_MS", "10000"))
+
+# Colonnes d'un signal (ordre = colonnes SQL après day, seq)
+SIGNAL_COLUMNS = ("league", "match", "type", "suggestion", "odds", "ic_label", "proba",
+                  "source", "result", "xg_home", "xg_away")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    day        TEXT NOT NULL,        -- date du rapport (YYYY-MM-DD)
+    seq        INTEGER NOT NULL,     -- ordre dans le rapport
+    league     TEXT,
+    match      TEXT,                 -- "Domicile – Extérieur"
+    type       TEXT,                 -- Résultat / Over 1.5 / BTTS / Équipe marque
+    suggestion TEXT,
+    odds       REAL,
+    ic_label   TEXT,
+    proba      REAL,                 -- probabilité affichée (%)
+    source     TEXT,
+    result     TEXT,                 -- score affiché ("2–1") ou "—"
+    xg_home    REAL,
+    xg_away    REAL,
+    PRIMARY KEY (day, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reports (
+    day         TEXT PRIMARY KEY,
+    origin      TEXT NOT NULL,       -- "build_html" (écrit à la génération) ou "html" (rapport relu)
+    sha1        TEXT,                -- hash du fichier HTML dont viennent les lignes
+    file_name   TEXT,                -- rapport de rapports_quotidiens/ rattaché (si vu)
+    file_size   INTEGER,
+    file_mtime  INTEGER,             -- st_mtime_ns
+    taux_global REAL,
+    n_signals   INTEGER NOT NULL,
+    updated     REAL NOT NULL
+);
+"""
+
+
+# En-têtes du tableau #signalsTable (rapports HTML) → colonnes standard (règles de analyse_globale)
+def standard_column(header):
+    lc = str(header).strip().lower()
+    if "type" in lc:
+        return "Type"
+    if "ligue" in lc or "league" in lc:
+        return "Ligue"
+    if "prob" in lc:             # "Probabilité"
+        return "Probabilite"
+    if lc == "ic":
+        return "IC_label"        # le libellé "IC" n'est pas un nombre
+    if "résultat" in lc or "result" in lc:
+        return "Resultat"
+    return header
+
+
+# Colonnes qui peuvent porter la probabilité numérique (la 1re à ≥ 30 % de nombres gagne)
+PROBA_CANDIDATES = ("Probabilite", "IC", "Proba", "Confidence", "Score")
+
+# Colonnes standard → colonnes de l'historique ("IC" = probabilité numérique retenue)
+HTML_TO_HISTORY = {
+    "Ligue": "league", "Match": "match", "Type": "type", "Suggestion": "suggestion",
+    "Cote": "odds", "IC_label": "ic_label", "IC": "proba", "Source": "source",
+    "Resultat": "result", "xG Home": "xg_home", "xG Away": "xg_away",
+}
+NUMERIC_HISTORY = ("odds", "proba", "xg_home", "xg_away")
+
+
+def report_day(path):
+    """Date du rapport d'après son nom (« … — 2025-11-02.html ») ; sinon le nom du fichier."""
+    m = re.search(r"(\d{4}-\d{2}-\d{2})", os.path.basename(path))
+    return m.group(1) if m else os.path.basename(path)
+
+
+def file_sha1(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def to_float(v):
+    """'72.5%' / '1,85' / 1.85 → float ; None si non numérique (— , vide, NaN)."""
+    try:
+        x = float(str(v).replace(",", ".").replace("%", "").strip())
+    except (TypeError, ValueError):
+        return None
+    return None if x != x else x
+
+
+class SignalHistory:
+    """
+    Base SQLite des signaux publiés, partagée entre main.py et analyse_globale.py.
+    Chaque jour est écrit en une transaction : un rapport régénéré (post-match)
+    remplace les lignes de son jour, les autres jours ne sont jamais réécrits.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    # ---------- connexion ----------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=HISTORY_BUSY_TIMEOUT_MS / 1000.0, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={HISTORY_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.executescript(_SCHEMA)
+                    self._ready = True
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    # ---------- écriture ----------
+    def record_day(self, day, rows, origin, sha1=None, taux_global=None, file_name=None,
+                   file_size=None, file_mtime=None):
+        """Remplace les signaux du jour par `rows` (dicts SIGNAL_COLUMNS) et met à jour son rapport."""
+        values = [(day, i) + tuple(r.get(c) for c in SIGNAL_COLUMNS) for i, r in enumerate(rows)]
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM signals WHERE day=?", (day,))
+            conn.executemany(
+                f"INSERT INTO signals (day, seq, {', '.join(SIGNAL_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(SIGNAL_COLUMNS) + 2))})",
+                values,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (day, origin, sha1, file_name, file_size, file_mtime, "
+                "taux_global, n_signals, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (day, origin, sha1, file_name, file_size, file_mtime, taux_global, len(values), time.time()),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass            # BEGIN lui-même a échoué (base verrouillée) : aucune transaction ouverte
+            print(f"[⚠️ Historique] écriture {day} : {e}")
+            return False
+        return True
+
+    def attach_file(self, day, file_name, file_size, file_mtime):
+        """Rattache un rapport de rapports_quotidiens/ au jour (lignes déjà présentes, même hash)."""
+        self._conn().execute(
+            "UPDATE reports SET file_name=?, file_size=?, file_mtime=? WHERE day=?",
+            (file_name, file_size, file_mtime, day),
+        )
+
+    # ---------- lecture ----------
+    def report(self, day):
+        row = self._conn().execute(
+            "SELECT day, origin, sha1, file_name, file_size, file_mtime, taux_global, n_signals, updated "
+            "FROM reports WHERE day=?", (day,),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("day", "origin", "sha1", "file_name", "file_size", "file_mtime",
+                         "taux_global", "n_signals", "updated"), row))
+
+    def signals(self, days=None):
+        """(colonnes, lignes) des signaux — tous ou seulement `days` — avec taux_global et file_name du jour."""
+        cols = ("day", "seq") + SIGNAL_COLUMNS + ("taux_global", "file_name")
+        sql = (f"SELECT {', '.join('s.' + c for c in cols[:-2])}, r.taux_global, r.file_name "
+               "FROM signals s JOIN reports r ON r.day = s.day")
+        conn = self._conn()
+        if days is None:
+            return cols, conn.execute(sql + " ORDER BY s.day, s.seq").fetchall()
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_days (day TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM wanted_days")
+        conn.executemany("INSERT OR IGNORE INTO wanted_days VALUES (?)", [(d,) for d in days])
+        return cols, conn.execute(sql + " JOIN wanted_days w ON w.day = s.day ORDER BY s.day, s.seq").fetchall()
+
+    def stats(self):
+        return self._conn().execute(
+            "SELECT origin, COUNT(*), SUM(n_signals), MIN(day), MAX(day) FROM reports GROUP BY origin"
+        ).fetchall()
+
+
+# Instance unique du process
+SIGNAL_HISTORY = SignalHistory()
+
+
+if __name__ == "__main__":
+    print(f"📚 {HISTORY_DB}")
+    for origin, n_days, n_sigs, d0, d1 in SIGNAL_HISTORY.stats():
+        print(f"  {origin:<10} {n_days:>4} jours | {n_sigs or 0:>6} signaux | {d0} → {d1}")
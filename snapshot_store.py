@@ -0,0 +1,272 @@
+# ================================
+# snapshot_store.py — FootBot PRO
+# Snapshots journaliers (fixtures_raw_<date>.*) : format enfichable + lecture en flux
+#   jsonl      → 1 fixture par ligne, JSON compact
+#   jsonl.gz   → idem gzip (défaut, stdlib)
+#   jsonl.zst  → idem zstd (module zstandard, optionnel)
+#   parquet    → colonnes (pyarrow, optionnel) ; champs imbriqués stockés en texte JSON
+#   json       → ancien format (liste indentée), toujours lisible
+#   python snapshot_store.py stats  [fichiers]            → taille / temps de lecture par format
+#   python snapshot_store.py convert [fichiers] [format]  → réécrit les anciens .json
+# ================================
+import os
+import io
+import sys
+import glob
+import gzip
+import json
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SNAPSHOT_FORMAT = os.getenv("FOOTBOT_SNAPSHOT_FORMAT", "jsonl.gz").strip().lower()
+GZIP_LEVEL = int(os.getenv("FOOTBOT_SNAPSHOT_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("FOOTBOT_SNAPSHOT_ZSTD_LEVEL", "10"))
+PARQUET_BATCH = 512        # lignes par lot en lecture parquet
+
+# Extension → format ; ordre = priorité de lecture si plusieurs fichiers existent pour la même date
+EXTENSIONS = (
+    (".parquet", "parquet"),
+    (".jsonl.zst", "jsonl.zst"),
+    (".jsonl.gz", "jsonl.gz"),
+    (".jsonl", "jsonl"),
+    (".json", "json"),
+)
+FORMATS = tuple(fmt for _, fmt in EXTENSIONS)
+
+
+def _ext(fmt):
+    return next(ext for ext, f in EXTENSIONS if f == fmt)
+
+
+def format_of(path):
+    for ext, fmt in EXTENSIONS:
+        if path.endswith(ext):
+            return fmt
+    raise ValueError(f"format de snapshot inconnu : {path}")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def available_formats():
+    """Formats utilisables ici (zstd / parquet dépendent de modules optionnels)."""
+    out = []
+    for fmt in FORMATS:
+        if fmt == "jsonl.zst" and _zstd() is None:
+            continue
+        if fmt == "parquet" and _pyarrow() is None:
+            continue
+        out.append(fmt)
+    return out
+
+
+def resolve_format(fmt=None):
+    """Format demandé (ou SNAPSHOT_FORMAT) ; repli sur jsonl.gz si son module est absent."""
+    fmt = (fmt or SNAPSHOT_FORMAT).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"FOOTBOT_SNAPSHOT_FORMAT inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+    if fmt not in available_formats():
+        print(f"[⚠️ Snapshot] format {fmt} indisponible (module optionnel absent) → jsonl.gz")
+        return "jsonl.gz"
+    return fmt
+
+
+# ----------------------------------------------------
+# Chemins
+# ----------------------------------------------------
+def snapshot_path(prefix, date, fmt=None, base_dir=BASE_DIR):
+    """Ex. snapshot_path("fixtures_raw", "2025-11-02") → <base>/fixtures_raw_2025-11-02.jsonl.gz"""
+    return os.path.join(base_dir, f"{prefix}_{date}{_ext(resolve_format(fmt))}")
+
+
+def find_snapshot(prefix, date, base_dir=BASE_DIR):
+    """Snapshot existant pour la date (tous formats, y compris l'ancien .json) ; None sinon."""
+    for ext, _ in EXTENSIONS:
+        path = os.path.join(base_dir, f"{prefix}_{date}{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def list_snapshots(prefix="fixtures_raw", base_dir=BASE_DIR):
+    """Un chemin par date (format prioritaire si doublon), triés par date."""
+    by_date = {}
+    for ext, _ in reversed(EXTENSIONS):          # les formats prioritaires écrasent les autres
+        for path in glob.glob(os.path.join(glob.escape(base_dir), f"{prefix}_*{ext}")):
+            by_date[os.path.basename(path)[len(prefix) + 1:-len(ext)]] = path
+    return [by_date[d] for d in sorted(by_date)]
+
+
+# ----------------------------------------------------
+# Écriture (atomique)
+# ----------------------------------------------------
+def _write_jsonl(f, rows):
+    n = 0
+    for row in rows:
+        f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        f.write(b"\n")
+        n += 1
+    return n
+
+
+def _write_parquet(path, rows):
+    pa = _pyarrow()
+    rows = list(rows)
+    cols = list(dict.fromkeys(k for r in rows for k in r))
+    nested = [c for c in cols if any(isinstance(r.get(c), (dict, list)) for r in rows)]
+    data = {c: [json.dumps(r.get(c), ensure_ascii=False) if c in nested else r.get(c) for r in rows] for c in cols}
+    table = pa.table(data).replace_schema_metadata({"footbot_json_columns": json.dumps(nested)})
+    pa.parquet.write_table(table, path, compression="zstd")
+    return len(rows)
+
+
+def write_snapshot(path, rows):
+    """Écrit `rows` (itérable de dicts) au format déduit de l'extension ; retourne le nombre de lignes."""
+    fmt = format_of(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        if fmt == "parquet":
+            n = _write_parquet(tmp, rows)
+        elif fmt == "json":
+            rows = list(rows)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(rows, f, ensure_ascii=False, indent=2)
+            n = len(rows)
+        elif fmt == "jsonl.gz":
+            with gzip.open(tmp, "wb", compresslevel=GZIP_LEVEL) as f:
+                n = _write_jsonl(f, rows)
+        elif fmt == "jsonl.zst":
+            with open(tmp, "wb") as raw, _zstd().ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw) as f:
+                n = _write_jsonl(f, rows)
+        else:
+            with open(tmp, "wb") as f:
+                n = _write_jsonl(f, rows)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return n
+
+
+def save_snapshot(prefix, date, rows, fmt=None, base_dir=BASE_DIR):
+    """Écrit le snapshot du jour au format choisi ; supprime les autres formats de la même date."""
+    path = snapshot_path(prefix, date, fmt, base_dir)
+    n = write_snapshot(path, rows)
+    for ext, _ in EXTENSIONS:
+        other = os.path.join(base_dir, f"{prefix}_{date}{ext}")
+        if other != path and os.path.exists(other):
+            os.remove(other)
+    return path, n
+
+
+# ----------------------------------------------------
+# Lecture en flux
+# ----------------------------------------------------
+def _iter_jsonl(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _iter_parquet(path):
+    pa = _pyarrow()
+    if pa is None:
+        raise ImportError("pyarrow requis pour lire les snapshots .parquet")
+    pf = pa.parquet.ParquetFile(path)
+    meta = pf.schema_arrow.metadata or {}
+    nested = set(json.loads(meta.get(b"footbot_json_columns", b"[]")))
+    for batch in pf.iter_batches(batch_size=PARQUET_BATCH):
+        for row in batch.to_pylist():
+            for c in nested:
+                if row.get(c) is not None:
+                    row[c] = json.loads(row[c])
+            yield row
+
+
+def iter_snapshot(path):
+    """Itère les fixtures du snapshot sans charger tout le fichier (sauf ancien .json : liste unique)."""
+    fmt = format_of(path)
+    if fmt == "parquet":
+        yield from _iter_parquet(path)
+    elif fmt == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield from (fx for fx in data if isinstance(fx, dict))
+    elif fmt == "jsonl.gz":
+        with gzip.open(path, "rb") as f:
+            yield from _iter_jsonl(f)
+    elif fmt == "jsonl.zst":
+        zstd = _zstd()
+        if zstd is None:
+            raise ImportError("zstandard requis pour lire les snapshots .jsonl.zst")
+        with open(path, "rb") as raw, zstd.ZstdDecompressor().stream_reader(raw) as f:
+            yield from _iter_jsonl(io.BufferedReader(f))
+    else:
+        with open(path, "rb") as f:
+            yield from _iter_jsonl(f)
+
+
+def load_snapshot(path):
+    return list(iter_snapshot(path))
+
+
+# ----------------------------------------------------
+# CLI : comparaison des formats / conversion des anciens .json
+# ----------------------------------------------------
+def _stats(paths, workdir):
+    rows = [fx for p in paths for fx in iter_snapshot(p)]
+    print(f"{len(rows)} fixtures ({len(paths)} fichiers)")
+    print(f"{'format':<11} {'Ko':>9} {'écriture':>10} {'lecture':>10}")
+    for fmt in available_formats():
+        path = os.path.join(workdir, f"bench{_ext(fmt)}")
+        t0 = time.perf_counter()
+        write_snapshot(path, rows)
+        t1 = time.perf_counter()
+        back = sum(1 for _ in iter_snapshot(path))
+        t2 = time.perf_counter()
+        assert back == len(rows), (fmt, back)
+        print(f"{fmt:<11} {os.path.getsize(path) / 1024:9.1f} {1000 * (t1 - t0):8.1f}ms {1000 * (t2 - t1):8.1f}ms")
+    missing = sorted(set(FORMATS) - set(available_formats()))
+    if missing:
+        print(f"(indisponibles ici, module optionnel absent : {', '.join(missing)})")
+
+
+def _convert(paths, fmt):
+    for p in paths:
+        if format_of(p) != "json":
+            continue
+        date = os.path.basename(p)[len("fixtures_raw_"):-len(".json")]
+        rows = load_snapshot(p)
+        out, n = save_snapshot("fixtures_raw", date, rows, fmt, os.path.dirname(p) or ".")
+        print(f"  {os.path.basename(p)} → {os.path.basename(out)} ({n} fixtures)")
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    rest = sys.argv[2:]
+    fmt = rest.pop() if rest and rest[-1] in FORMATS else None
+    paths = rest or list_snapshots("fixtures_raw")
+    if cmd == "convert":
+        _convert(paths, fmt)
+    else:
+        with tempfile.TemporaryDirectory() as d:
+            _stats(paths, d)
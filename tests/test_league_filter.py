@@ -0,0 +1,65 @@
+# ================================
+# tests/test_league_filter.py — FootBot PRO
+# LeagueFilter (compilé + mémoïsé) ≡ reference_is_relevant, règle par règle
+# ================================
+import pytest
+
+from league_filter import LeagueFilter, LEAGUE_FILTER, reference_is_relevant
+
+CASES = [
+    ("England", "Premier League", True),                      # (pays, ligue) exact
+    ("Germany", "Bundesliga", True),
+    ("Austria", "Bundesliga", True),
+    ("Germany", "Bundesliga Women", False),                   # exclusion avant le set exact
+    ("Wales", "Premier League", False),                       # nom exact, mauvais pays
+    ("England", "Premier League 2", False),
+    ("England", "FA Cup", False),
+    ("World", "UEFA Champions League", True),                 # nom générique (sous-chaîne)
+    ("World", "UEFA Europa Conference League", True),
+    ("World", "UEFA Youth League", False),
+    ("World", "Champions League Women", False),               # 'women' (virgule manquante corrigée)
+    ("Mexico", "Liga MX", False),                             # 'Liga MX' (idem)
+    ("Argentina", "Copa Argentina", False),
+    ("World", "World Cup - Qualification Europe", True),      # qualifs CdM : Europe seulement
+    ("World", "World Cup - Qualification South America", False),
+    ("World", "World Cup - Qualification CONCACAF", False),
+    ("World", "world cup - qualification europe", True),
+    ("World", "UEFA CHAMPIONS LEAGUE", True),                 # insensible à la casse
+    ("World", "World Cup", False),                            # 'Cup' exclu avant les noms génériques
+    ("Guatemala", "Liga Nacional", False),
+    ("France", None, False),
+    ("France", "", False),
+]
+
+
+@pytest.mark.parametrize("country,name,expected", CASES)
+def test_matches_reference(country, name, expected):
+    assert reference_is_relevant(country, name) is expected
+    assert LeagueFilter().is_relevant(country, name) is expected
+    assert LEAGUE_FILTER.is_relevant(country, name) is expected
+
+
+def test_custom_lists():
+    major = [("Spain", "La Liga"), "Cup Winners"]
+    excluded = ["u21", "Reserve"]
+    flt = LeagueFilter(major=major, excluded=excluded)
+    for country, name in (("Spain", "La Liga"), ("Italy", "La Liga"), ("World", "cup winners final"),
+                          ("World", "Cup Winners U21"), ("Spain", "Reserve La Liga"), ("World", "Other")):
+        assert flt.is_relevant(country, name) == reference_is_relevant(country, name, excluded, major)
+
+
+def test_empty_lists():
+    flt = LeagueFilter(major=[], excluded=[])
+    assert flt.excluded_re is None and flt.generic_re is None
+    assert not flt.is_relevant("England", "Premier League")
+
+
+def test_memo_by_league_id():
+    flt = LeagueFilter()
+    fx = {"league_id": 39, "country": "England", "league_name": "Premier League"}
+    assert flt.is_relevant_fixture(fx) is True
+    assert flt._memo == {39: True}
+    # même id → décision mémoïsée, sans relire le nom
+    assert flt.is_relevant_fixture({"league_id": 39, "country": "England", "league_name": "FA Cup"}) is True
+    assert flt.is_relevant_fixture({"country": "England", "league_name": "FA Cup"}) is False
+    assert ("England", "FA Cup") in flt._memo
@@ -0,0 +1,84 @@
+# ================================
+# tests/test_poisson_math.py — FootBot PRO
+# Poisson / Skellam vs formules fermées (toujours) et vs scipy.stats (si installé)
+# ================================
+import math
+
+import numpy as np
+import pytest
+
+from poisson_math import (
+    pmf_table, poisson_cdf, poisson_over, poisson_pmf, poisson_sf, skellam_cdf, skellam_pmf,
+)
+
+LAMBDAS = (0.0, 0.15, 0.9, 1.5, 2.7, 5.8)
+MUS = ((0.2, 0.2), (1.4, 1.1), (2.6, 0.5), (0.7, 2.4))
+
+
+def _pmf(k, lam):
+    return (1.0 if k == 0 else 0.0) if lam == 0 else math.exp(-lam) * lam ** k / math.factorial(k)
+
+
+@pytest.mark.parametrize("lam", LAMBDAS)
+def test_poisson_closed_forms(lam):
+    for k in range(-1, 9):
+        ref = _pmf(k, lam) if k >= 0 else 0.0
+        cdf = sum(_pmf(i, lam) for i in range(k + 1))
+        assert poisson_pmf(k, lam) == pytest.approx(ref, abs=1e-12)
+        assert poisson_cdf(k, lam) == pytest.approx(cdf, abs=1e-12)
+        assert poisson_cdf(k + 0.5, lam) == pytest.approx(cdf, abs=1e-12)      # k réel arrondi vers le bas
+        assert poisson_sf(k, lam) == pytest.approx(1 - cdf, abs=1e-12)
+    assert poisson_over(lam, 1.5) == pytest.approx(1 - math.exp(-lam) * (1 + lam), abs=1e-12)
+
+
+def test_poisson_arrays_match_scalars():
+    lam = np.array(LAMBDAS)
+    for k in (0, 2, 5):
+        assert np.allclose(poisson_pmf(k, lam), [poisson_pmf(k, x) for x in LAMBDAS], atol=1e-12)
+        assert np.allclose(poisson_cdf(k, lam), [poisson_cdf(k, x) for x in LAMBDAS], atol=1e-12)
+    ks = np.array([-1, 0, 1, 3, 7, 2])
+    assert np.allclose(poisson_cdf(ks, lam), [poisson_cdf(int(k), x) for k, x in zip(ks, LAMBDAS)], atol=1e-12)
+    assert np.allclose(poisson_over(lam, np.array([0.5, 1.5, 2.5, 0.5, 1.5, 3.5])),
+                       [poisson_over(x, line) for x, line in zip(LAMBDAS, (0.5, 1.5, 2.5, 0.5, 1.5, 3.5))])
+    assert isinstance(poisson_pmf(2, 1.3), float) and isinstance(poisson_cdf(2, 1.3), float)
+
+
+def test_pmf_table():
+    t = pmf_table([0.0, 1.2, 3.0], 6)
+    assert t.shape == (3, 7)
+    assert np.allclose(t[1], [_pmf(k, 1.2) for k in range(7)])
+    assert list(t[0]) == [1.0] + [0.0] * 6
+    tail = pmf_table([1.2, 3.0], 6, tail=True)
+    assert np.allclose(tail.sum(axis=1), 1.0)
+    assert tail[1, -1] == pytest.approx(1 - sum(_pmf(k, 3.0) for k in range(6)))
+
+
+@pytest.mark.parametrize("mu1,mu2", MUS)
+def test_skellam_by_convolution(mu1, mu2):
+    for d in range(-4, 5):
+        ref = sum(_pmf(d + j, mu1) * _pmf(j, mu2) for j in range(max(0, -d), 60))
+        assert skellam_pmf(d, mu1, mu2) == pytest.approx(ref, abs=1e-12)
+        cdf = sum(sum(_pmf(x + j, mu1) * _pmf(j, mu2) for j in range(max(0, -x), 60)) for x in range(-60, d + 1))
+        assert skellam_cdf(d, mu1, mu2) == pytest.approx(cdf, abs=1e-12)
+    assert isinstance(skellam_pmf(0, mu1, mu2), float) and isinstance(skellam_cdf(0, mu1, mu2), float)
+
+
+def test_skellam_arrays():
+    mu1, mu2 = np.array([m[0] for m in MUS]), np.array([m[1] for m in MUS])
+    assert np.allclose(skellam_pmf(1, mu1, mu2), [skellam_pmf(1, a, b) for a, b in MUS])
+    assert np.allclose(skellam_cdf(np.array([-2, 0, 1, 3]), mu1, mu2),
+                       [skellam_cdf(d, a, b) for d, (a, b) in zip((-2, 0, 1, 3), MUS)])
+    assert skellam_cdf(-100, 1.0, 1.0) == 0.0 and skellam_cdf(100, 1.0, 1.0) == pytest.approx(1.0)
+
+
+def test_against_scipy():
+    stats = pytest.importorskip("scipy.stats")
+    rnd = np.random.default_rng(11)
+    lam = rnd.uniform(0.1, 6.0, 200)
+    mu1, mu2 = rnd.uniform(0.2, 3.0, 200), rnd.uniform(0.2, 2.5, 200)
+    for k in range(8):
+        assert np.allclose(poisson_cdf(k, lam), stats.poisson.cdf(k, lam), atol=1e-12)
+        assert np.allclose(poisson_pmf(k, lam), stats.poisson.pmf(k, lam), atol=1e-12)
+    for d in (-2, 0, 1):
+        assert np.allclose(skellam_pmf(d, mu1, mu2), stats.skellam.pmf(d, mu1, mu2), atol=1e-9)
+        assert np.allclose(skellam_cdf(d, mu1, mu2), stats.skellam.cdf(d, mu1, mu2), atol=1e-9)
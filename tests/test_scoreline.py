@@ -0,0 +1,83 @@
+# ================================
+# tests/test_scoreline.py — FootBot PRO
+# Marchés dérivés de la matrice des scores vs formules fermées (Poisson indépendant)
+# ================================
+import math
+
+import numpy as np
+import pytest
+
+from poisson_math import poisson_over, skellam_cdf, skellam_pmf
+from scoreline import MAX_GOALS, fixture_markets, markets, score_matrix, top_scores
+
+LH = np.array([0.15, 0.6, 1.3, 1.8, 2.9])
+LA = np.array([0.15, 1.9, 0.9, 1.1, 0.4])
+
+
+@pytest.fixture(scope="module")
+def mk():
+    return fixture_markets(LH, LA, rho=0.0)
+
+
+def test_matrix_mass():
+    M = score_matrix(LH, LA, rho=0.0)
+    assert M.shape == (len(LH), MAX_GOALS + 1, MAX_GOALS + 1)
+    assert np.allclose(M.sum(axis=(1, 2)), 1.0)
+    assert M[2, 1, 0] == pytest.approx(math.exp(-1.3) * 1.3 * math.exp(-0.9))
+    assert score_matrix(1.2, 0.8).shape == (1, MAX_GOALS + 1, MAX_GOALS + 1)
+
+
+def test_totals_and_btts(mk):
+    lam = LH + LA
+    for line in (0.5, 1.5, 2.5, 3.5, 4.5, 5.5):
+        assert np.allclose(mk[f"over_{line}"], poisson_over(lam, line), atol=1e-12)
+        assert np.allclose(mk[f"over_{line}"] + mk[f"under_{line}"], 1.0)
+    assert np.allclose(mk["btts_yes"], 1 - np.exp(-LH) - np.exp(-LA) + np.exp(-lam), atol=1e-12)
+    assert np.allclose(mk["home_scores"], 1 - np.exp(-LH), atol=1e-12)
+    assert np.allclose(mk["away_scores"], 1 - np.exp(-LA), atol=1e-12)
+
+
+def test_1x2_and_handicaps(mk):
+    # écarts < MAX_GOALS : la queue tronquée ne pèse que ~1e-9 pour ces λ
+    assert np.allclose(mk["p_home"] + mk["p_draw"] + mk["p_away"], 1.0)
+    assert np.allclose(mk["p_draw"], skellam_pmf(0, LH, LA), atol=1e-8)
+    assert np.allclose(mk["p_away"], skellam_cdf(-1, LH, LA), atol=1e-8)
+    ah = mk["ah_home_-1.0"]
+    assert np.allclose(ah["win"], 1 - skellam_cdf(1, LH, LA), atol=1e-8)
+    assert np.allclose(ah["push"], skellam_pmf(1, LH, LA), atol=1e-8)
+    assert np.allclose(ah["win"] + ah["push"] + ah["lose"], 1.0)
+    assert np.allclose(mk["ah_home_-0.5"]["win"], mk["p_home"])
+    assert np.allclose(mk["ah_home_+0.5"]["win"], mk["p_home"] + mk["p_draw"])
+    assert np.allclose(mk["ah_home_+0.0"]["push"], mk["p_draw"])
+
+
+def test_selected_lines():
+    out = fixture_markets(1.4, 1.0, rho=0.0, ou_lines=(1.5,), ah_lines=())
+    assert "over_1.5" in out and "over_2.5" not in out
+    assert not any(k.startswith("ah_home") for k in out)
+    assert float(out["over_1.5"][0]) == pytest.approx(poisson_over(2.4, 1.5))
+
+
+def test_dixon_coles():
+    M0, M = score_matrix(LH, LA, rho=0.0), score_matrix(LH, LA, rho=-0.1)
+    assert np.allclose(M.sum(axis=(1, 2)), 1.0, atol=1e-12)          # masse conservée
+    assert np.allclose(M[:, 2:, :], M0[:, 2:, :]) and np.allclose(M[:, :, 2:], M0[:, :, 2:])
+    assert (M[:, 0, 0] > M0[:, 0, 0]).all() and (M[:, 1, 1] > M0[:, 1, 1]).all()
+    assert (markets(M)["p_draw"] > markets(M0)["p_draw"]).all()
+
+
+def test_top_scores():
+    top = top_scores(score_matrix(LH, LA, rho=0.0), k=3)
+    assert len(top) == len(LH) and all(len(t) == 3 for t in top)
+    assert top[0][0] == ("0-0", pytest.approx(math.exp(-0.3)))
+    assert top[4][0][0] == "2-0"                                    # modes : ⌊2.9⌋ et ⌊0.4⌋
+    probs = [p for _, p in top[3]]
+    assert probs == sorted(probs, reverse=True)
+
+
+def test_top_scores_tail_label():
+    # λ élevé : la case « 3 buts ou plus » domine → libellée « 3+ », pas un score exact
+    M = score_matrix([9.0], [0.05], rho=0.0, max_goals=3)
+    assert top_scores(M, k=1)[0][0][0] == "3+-0"
+    M = score_matrix([0.05], [12.0], rho=0.0)
+    assert top_scores(M, k=1)[0][0][0] == f"0-{MAX_GOALS}+"
@@ -0,0 +1,75 @@
+# ================================
+# tests/test_scoring_batch.py — FootBot PRO
+# compute_signals_batch ≡ compute_signals_for_profile (signaux + effets de bord) sur des fixtures fixes
+# ================================
+import copy
+import random
+
+import pytest
+
+from scoring import compute_signals_for_profile
+from scoring_batch import compute_signals_batch, _synthetic_enrichment
+
+PROFILES = (
+    {"RES_C": 0.70, "O15_C": 0.60, "BTTS_C": 0.70, "TEAM_C": 0.65},
+    {"RES_C": 0.55, "O15_C": 0.50, "BTTS_C": 0.55, "TEAM_C": 0.50},
+)
+
+# (score_home, score_away, status) : à venir, victoires, nul, 0-0, score partiel
+_SCORES = ((None, None, "NS"), (2, 1, "FT"), (0, 3, "FT"), (1, 1, "FT"), (0, 0, "FT"), (3, 0, "FT"), (1, None, "1H"))
+
+
+def _fixtures(n=48, seed=2025):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        sh, sa, status = _SCORES[i % len(_SCORES)]
+        fx = {"id": 1000 + i, "league_id": 39, "league_name": "Premier League", "country": "England",
+              "home_team": f"Dom {i}", "away_team": f"Ext {i}",
+              "score_home": sh, "score_away": sa, "status": status}
+        out.append(_synthetic_enrichment(fx, rnd))
+    # cas limites : forme vide, cotes absentes, xG nuls, H2H avec pourcentages
+    out.append({"home_team": "A", "away_team": "B", "home_form": {}, "away_form": {}, "status": "NS"})
+    out.append({"home_team": "C", "away_team": "D", "home_form": {"n": 0, "wins": 0}, "away_form": {"n": 0},
+                "xg_home": 0, "xg_away": None, "odds_home": 1.01, "odds_away": 30.0, "odds_draw": 12.0,
+                "score_home": 4, "score_away": 4, "status": "FT"})
+    out.append({"home_team": "E", "away_team": "F", "home_form": {"n": 5, "wins": 4, "gf": 12, "ga": 2, "xg_for": 2.1},
+                "away_form": {"n": 5, "wins": 1, "gf": 3, "ga": 9, "xg_for": 0.7},
+                "_h2h": {"n": 6, "score_h2h": 1.2, "home_win_pct": 0.5, "away_win_pct": 0.17},
+                "odds_over_1_5": 1.2, "odds_btts_yes": 1.9, "score_home": 2, "score_away": 2, "status": "FT"})
+    return out
+
+
+@pytest.mark.parametrize("P", PROFILES)
+def test_batch_matches_scalar(P):
+    fixtures = _fixtures()
+    ref_fx, new_fx = copy.deepcopy(fixtures), copy.deepcopy(fixtures)
+    ref = [compute_signals_for_profile(fx, P) for fx in ref_fx]
+    new = compute_signals_batch(new_fx, P)
+    assert new == ref
+    assert new_fx == ref_fx                     # _xg_home_display / _xg_away_display identiques
+    assert sum(len(s) for s in ref) > 0         # les seuils laissent passer des signaux
+
+
+def test_empty():
+    assert compute_signals_batch([], PROFILES[0]) == []
+
+
+def test_unreadable_fixture_raises_without_on_error():
+    bad = {"home_team": "X", "away_team": "Y", "home_form": {"n": 2, "wins": "x"}, "away_form": {}}
+    with pytest.raises(TypeError):
+        compute_signals_for_profile(copy.deepcopy(bad), PROFILES[0])
+    with pytest.raises(TypeError):
+        compute_signals_batch([copy.deepcopy(bad)], PROFILES[0])
+
+
+def test_on_error_isolates_unreadable_fixture():
+    fixtures = _fixtures(n=6)
+    bad = {"home_team": "X", "away_team": "Y", "home_form": {"n": 2, "wins": "x"}, "away_form": {}}
+    errors = []
+    out = compute_signals_batch(fixtures[:3] + [bad] + fixtures[3:], PROFILES[1],
+                                on_error=lambda fx, e: errors.append((fx["home_team"], type(e))))
+    ref = [compute_signals_for_profile(fx, PROFILES[1]) for fx in copy.deepcopy(fixtures)]
+    assert errors == [("X", TypeError)]
+    assert out[3] == []
+    assert out[:3] + out[4:] == ref
@@ -0,0 +1,78 @@
+# ================================
+# tests/test_signal_eval.py — FootBot PRO
+# evaluate_won ≡ df.apply(is_won, axis=1) (valeurs et dtype) sur des lignes fixes
+# ================================
+import numpy as np
+import pandas as pd
+import pytest
+
+from signal_eval import MARKETS, _EDGE_CASES, classify_market, evaluate_won, is_won, parse_scores
+
+COLS = ["Type", "Suggestion", "Match", "Resultat"]
+
+
+def _same(df):
+    ref = df.apply(is_won, axis=1)
+    new = evaluate_won(df)
+    assert new.dtype == ref.dtype
+    assert new.index.equals(ref.index)
+    for i in df.index:
+        assert new[i] is ref[i] or new[i] == ref[i], df.loc[i].to_dict()
+    return new
+
+
+def test_edge_cases():
+    _same(pd.DataFrame(_EDGE_CASES, columns=COLS))
+
+
+@pytest.mark.parametrize("row,expected", [
+    (("Résultat", "Victoire domicile", "A – B", "2–1"), True),
+    (("Résultat", "Victoire extérieure", "A – B", "2–1"), False),
+    (("Résultat", "Match nul", "A – B", "1:1"), True),
+    (("Over 1.5", "Over 1.5 buts", "A – B", "1–0"), False),
+    (("Over 1.5", "Over 1.5 buts", "A – B", "1-1"), True),
+    (("BTTS", "oui", "A – B", "2–0"), False),
+    (("BTTS", "oui", "A – B", "2–3"), True),
+    (("Équipe marque", "B marque", "A – B", "0–2"), True),
+    (("Équipe marque", "A marque", "A – B", "0–2"), False),
+    (("Corners", "Over 9.5", "A – B", "2–1"), None),
+    (("BTTS", "oui", "A – B", "—"), None),
+])
+def test_known_outcomes(row, expected):
+    alone = evaluate_won(pd.DataFrame([row], columns=COLS)).iloc[0]
+    mixed = _same(pd.DataFrame(_EDGE_CASES + [row], columns=COLS)).iloc[-1]
+    for v in (alone, mixed):
+        assert v is None if expected is None else v == expected
+
+
+def test_all_played_gives_bool_dtype():
+    df = pd.DataFrame([("Over 1.5", "o", "A – B", "2–1"), ("BTTS", "oui", "A – B", "0–0")] * 3, columns=COLS)
+    assert _same(df).dtype == bool
+
+
+def test_no_row_needs_suggestion():
+    # ni Résultat ni Équipe marque joués : aucune suggestion à factoriser
+    _same(pd.DataFrame([("Over 1.5", "o", "A – B", "2–1"), ("Corners", "x", "A – B", "1–0")], columns=COLS))
+    _same(pd.DataFrame([("Résultat", "Victoire domicile", "A – B", None),
+                        ("Équipe marque", "A marque", "A – B", "—")], columns=COLS))
+
+
+def test_missing_columns_and_custom_index():
+    df = pd.DataFrame({"Type": ["Over 1.5", "Résultat", "BTTS"], "Resultat": ["3–0", "1–0", "1–1"]},
+                      index=[10, 5, 7])
+    _same(df)                                    # ni Suggestion ni Match : row.get → None
+    _same(df.drop(columns=["Type"]))
+
+
+def test_empty_frame():
+    out = evaluate_won(pd.DataFrame(columns=COLS))
+    assert len(out) == 0 and out.dtype == object
+
+
+def test_helpers():
+    cat = classify_market(pd.Series(["BTTS", "résultat", "over 1.5", "Equipe marque", "foo"]))
+    assert list(cat.categories) == list(MARKETS)
+    assert list(cat.codes) == [2, 0, 1, 3, -1]
+    sh, sa = parse_scores(pd.Series(["2–1", "0 - 3", "x", None]))
+    assert list(sh[:2]) == [2.0, 0.0] and list(sa[:2]) == [1.0, 3.0]
+    assert np.isnan(sh[2:]).all() and np.isnan(sa[2:]).all()
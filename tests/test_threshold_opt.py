@@ -0,0 +1,88 @@
+# ================================
+# tests/test_threshold_opt.py — FootBot PRO
+# Courbe + sélection de seuils ≡ anciennes boucles de analyse_globale, sur des signaux fixes
+# ================================
+import numpy as np
+import pandas as pd
+import pytest
+
+from threshold_opt import (
+    CURVE_COLUMNS, _curve_thresholds, _loop_thresholds, best_threshold, curve_panel_html, curves_frame,
+    find_optimal_threshold, threshold_curve, threshold_grid,
+)
+
+
+def _signals(n=600, seed=0):
+    """Signaux seedés : IC entiers et décimaux, quelques IC manquants, won True / False / None."""
+    rng = np.random.default_rng(seed)
+    ic = rng.uniform(45, 100, n)
+    ic = np.where(rng.random(n) < 0.5, ic.round(), ic.round(1))
+    ic[rng.random(n) < 0.02] = np.nan
+    p_win = np.clip((np.nan_to_num(ic, nan=50) - 40) / 70, 0, 1)
+    won = np.where(rng.random(n) < p_win, True, False).astype(object)
+    won[rng.random(n) < 0.1] = None
+    types = rng.choice(["Résultat", "Over 1.5", "BTTS", "Équipe marque"], n)
+    return pd.DataFrame({"Type": types, "IC": ic, "won": won})
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_loops(seed):
+    df = _signals(seed=seed)
+    assert _curve_thresholds(df) == _loop_thresholds(df)
+
+
+def test_matches_loops_small_and_flat():
+    # peu de signaux (< 10 au-dessus de tout seuil) → défauts ; taux plat → repli à 70
+    few = pd.DataFrame({"Type": ["BTTS"] * 6, "IC": [55, 61, 70, 80, 90, 95],
+                        "won": [True, False, None, True, False, True]})
+    flat = pd.DataFrame({"Type": ["Over 1.5"] * 40, "IC": np.linspace(50, 99, 40), "won": [True, False] * 20})
+    for df in (few, flat):
+        assert _curve_thresholds(df) == _loop_thresholds(df)
+    (thr, _, vol), _ = _curve_thresholds(flat)["Over 1.5"]
+    assert (thr, vol) == (70, 40)
+
+
+def test_curve_counts():
+    df = _signals(200, seed=3)
+    curve = threshold_curve(df["IC"], df["won"], thresholds=[50, 60.5, 75, 99.9, 100])
+    for _, pt in curve.iterrows():
+        above = df[df["IC"] >= pt["Seuil"]]
+        assert pt["Volume"] == len(above)
+        assert pt["Joues"] == above["won"].notna().sum()
+        assert pt["Gagnes"] == above["won"].eq(True).sum()
+        assert pt["Part_volume"] == pytest.approx(len(above) / len(df) * 100)
+        if len(above):
+            assert pt["Taux"] == pytest.approx(above["won"].eq(True).sum() / len(above) * 100)
+        else:
+            assert np.isnan(pt["Taux"])
+
+
+def test_empty_curve():
+    curve = threshold_curve([], [])
+    assert (curve["Volume"] == 0).all() and curve["Part_volume"].isna().all()
+    assert best_threshold(curve, 0, np.nan) == (None, 0, 0)
+    assert find_optimal_threshold(curve) == 50
+
+
+def test_threshold_grid():
+    assert list(threshold_grid(60, 62, 0.5)) == [60.0, 60.5, 61.0, 61.5]
+    fine, coarse = threshold_grid(50, 100, 0.1), threshold_grid(50, 100, 1)
+    assert len(fine) == 500 and set(coarse) <= set(fine)       # mêmes flottants quel que soit le pas
+    assert 60.3 in set(fine)
+
+
+def test_incompatible_step():
+    curve = threshold_curve([60, 70], [True, False], thresholds=threshold_grid(50, 100, 1))
+    with pytest.raises(ValueError):
+        find_optimal_threshold(curve, step=0.5)
+
+
+def test_outputs():
+    df = _signals(100, seed=4)
+    curves = {t: threshold_curve(g["IC"], g["won"]) for t, g in df.groupby("Type")}
+    long = curves_frame(curves)
+    assert list(long.columns) == ["Type", *CURVE_COLUMNS]
+    assert len(long) == sum(len(c) for c in curves.values())
+    assert list(curves_frame({}).columns) == ["Type", *CURVE_COLUMNS]
+    html = curve_panel_html({"<b>": curves["BTTS"]}, marks={"<b>": 72})
+    assert "&lt;b&gt;" in html and html.count("<svg") == 1
@@ -0,0 +1,242 @@
+# ================================
+# threshold_opt.py — FootBot PRO
+# Seuils d'IC optimaux en une passe : tri unique de l'IC + sommes cumulées (O(n log n))
+#   threshold_curve(ic, won)  → courbe complète précision / volume, un point par seuil (pas 0.1 % par défaut)
+#   best_threshold / find_optimal_threshold → mêmes règles que les anciennes boucles de analyse_globale,
+#                                             relues sur la courbe au lieu de refiltrer le DataFrame
+#   python threshold_opt.py [N]  → parité vs anciennes boucles sur les rapports + chrono sur l'historique ×N
+# ================================
+import os
+import sys
+import time
+import html as _html
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+# Pas de la courbe (exportée / affichée) et pas des seuils candidats (1 = grille historique 60, 61, …)
+CURVE_STEP = float(os.getenv("FOOTBOT_CURVE_STEP", "0.1"))
+THRESHOLD_STEP = float(os.getenv("FOOTBOT_THRESHOLD_STEP", "1"))
+CURVE_RANGE = (50, 100)          # seuils couverts par la courbe : [50 ; 100[
+
+CURVE_COLUMNS = ("Seuil", "Volume", "Joues", "Gagnes", "Taux", "Taux_joues", "Part_volume")
+
+
+def threshold_grid(lo, hi, step):
+    """
+    Seuils lo, lo + step, … < hi, calculés en entiers puis divisés par 10^décimales :
+    un même seuil a exactement la même valeur flottante quel que soit le pas (60.0, 60.5…).
+    """
+    scale = 10 ** max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+    ticks = np.arange(round(lo * scale), round(hi * scale), round(step * scale))
+    return ticks / scale
+
+
+def _num(x):
+    """Seuil entier → int (affiché « 79 » comme l'ancienne grille np.arange), sinon float."""
+    x = float(x)
+    return int(x) if x.is_integer() else x
+
+
+# ----------------------------------------------------
+# Courbe précision / volume
+# ----------------------------------------------------
+def threshold_curve(ic, won, thresholds=None):
+    """
+    Pour chaque seuil t : Volume (IC ≥ t), Joues (won non nul), Gagnes (won True),
+    Taux = Gagnes / Volume (non joués comptés perdus, règle de best_threshold),
+    Taux_joues = Gagnes / Joues (règle de find_optimal_threshold), Part_volume = Volume / total.
+    Un tri de l'IC, deux sommes cumulées et un searchsorted : O(n log n + T log n).
+    """
+    if thresholds is None:
+        thresholds = threshold_grid(*CURVE_RANGE, CURVE_STEP)
+    thresholds = np.asarray(thresholds, dtype=float)
+    ic = pd.to_numeric(pd.Series(ic), errors="coerce").to_numpy(dtype=float)
+    won = pd.Series(won)
+    played = won.notna().to_numpy()
+    wins = won.eq(True).to_numpy()
+
+    keep = ~np.isnan(ic)                 # IC manquant : jamais au-dessus d'un seuil (NaN >= t est faux)
+    order = np.argsort(ic[keep], kind="stable")
+    ic_sorted = ic[keep][order]
+    # cum_x[i] = somme de x sur les signaux triés d'indice ≥ i (0 en fin de tableau)
+    cum_played = np.append(np.cumsum(played[keep][order][::-1])[::-1], 0)
+    cum_wins = np.append(np.cumsum(wins[keep][order][::-1])[::-1], 0)
+
+    idx = np.searchsorted(ic_sorted, thresholds, side="left")   # 1er indice avec IC ≥ t
+    volume = len(ic_sorted) - idx
+    n_played, n_wins = cum_played[idx], cum_wins[idx]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taux = np.where(volume > 0, n_wins / volume * 100, np.nan)
+        taux_joues = np.where(n_played > 0, n_wins / n_played * 100, np.nan)
+        part = volume / len(ic) * 100 if len(ic) else np.full(len(thresholds), np.nan)
+    return pd.DataFrame({"Seuil": thresholds, "Volume": volume, "Joues": n_played, "Gagnes": n_wins,
+                         "Taux": taux, "Taux_joues": taux_joues, "Part_volume": part})
+
+
+def _on_grid(curve, lo, hi, step):
+    """Points de la courbe aux seuils candidats ; le pas doit être un multiple du pas de la courbe."""
+    grid = threshold_grid(lo, hi, step)
+    pts = curve.set_index("Seuil").reindex(grid)
+    if pts["Volume"].isna().any():
+        raise ValueError(f"pas de seuil {step} incompatible avec la courbe (pas {CURVE_STEP}, plage {CURVE_RANGE})")
+    return pts
+
+
+def _first_max(rate, ok):
+    """Indice du 1er maximum strictement positif de rate parmi ok (boucle « if rate > best_rate » partant de 0)."""
+    r = np.where(ok & (rate > 0), rate, -np.inf)
+    i = int(np.argmax(r)) if len(r) else 0
+    return i if len(r) and r[i] > -np.inf else None
+
+
+# ----------------------------------------------------
+# Règles de sélection (identiques aux anciennes boucles de analyse_globale)
+# ----------------------------------------------------
+def best_threshold(curve, total, global_rate, step=THRESHOLD_STEP, lo=60, hi=96,
+                   min_share=0.15, margin=0.5, fallback=70):
+    """
+    (seuil, taux, volume) : meilleur taux au-dessus du seuil parmi les seuils gardant ≥ 15 % du
+    volume et battant le taux global d'au moins 0.5 point ; sinon (70, taux global, total).
+    """
+    pts = _on_grid(curve, lo, hi, step)
+    rate = pts["Taux"].to_numpy()
+    vol = pts["Volume"].to_numpy()
+    i = _first_max(rate, (vol >= min_share * total) & (rate >= global_rate + margin))
+    if i is not None:
+        return _num(pts.index[i]), rate[i], int(vol[i])
+    if total > 0:
+        return fallback, global_rate, total
+    return None, 0, 0
+
+
+def find_optimal_threshold(curve, step=THRESHOLD_STEP, lo=50, hi=100, min_volume=10, default=50):
+    """Seuil (50–99 %) qui maximise la réussite réelle (signaux joués) avec ≥ 10 signaux au-dessus."""
+    pts = _on_grid(curve, lo, hi, step)
+    i = _first_max(pts["Taux_joues"].to_numpy(), pts["Volume"].to_numpy() >= min_volume)
+    return default if i is None else _num(pts.index[i])
+
+
+# ----------------------------------------------------
+# Sorties : CSV long + panneau HTML (SVG inline, pas de dépendance JS)
+# ----------------------------------------------------
+def curves_frame(curves):
+    """{Type: courbe} → DataFrame long (Type, Seuil, …) pour l'export CSV."""
+    if not curves:
+        return pd.DataFrame(columns=("Type",) + CURVE_COLUMNS)
+    return pd.concat([c.assign(Type=t) for t, c in curves.items()], ignore_index=True)[["Type", *CURVE_COLUMNS]]
+
+
+def _svg(curve, mark=None, width=520, height=180, pad=28):
+    lo, hi = CURVE_RANGE
+    x = lambda s: pad + (s - lo) / (hi - lo) * (width - 2 * pad)
+    y = lambda v: height - pad - v / 100 * (height - 2 * pad)
+
+    def line(col, color):
+        pts = curve[curve[col].notna()]
+        coords = " ".join(f"{x(s):.1f},{y(v):.1f}" for s, v in zip(pts["Seuil"], pts[col]))
+        return f"<polyline fill='none' stroke='{color}' stroke-width='2' points='{coords}'/>"
+
+    grid = "".join(
+        f"<line x1='{x(s):.1f}' y1='{y(0):.1f}' x2='{x(s):.1f}' y2='{y(100):.1f}' stroke='#e8eef7'/>"
+        f"<text x='{x(s):.1f}' y='{height - 8}' font-size='10' text-anchor='middle' fill='#666'>{s}</text>"
+        for s in range(lo, hi + 1, 10)
+    )
+    marker = ""
+    if mark is not None:
+        marker = (f"<line x1='{x(mark):.1f}' y1='{y(0):.1f}' x2='{x(mark):.1f}' y2='{y(100):.1f}' "
+                  f"stroke='#2ecc71' stroke-dasharray='4 3'/>")
+    return (f"<svg viewBox='0 0 {width} {height}' width='100%' style='max-width:{width}px'>{grid}"
+            f"{line('Part_volume', '#3498db')}{line('Taux', '#0e4c92')}{marker}</svg>")
+
+
+def curve_panel_html(curves, marks=None):
+    """Une courbe par type : taux au-dessus du seuil (bleu foncé), part du volume (bleu), seuil retenu (vert)."""
+    if not curves:
+        return "<p class='note'>Aucune courbe disponible.</p>"
+    marks = marks or {}
+    cells = "".join(
+        f"<div style='flex:1 1 480px'><h3 style='text-align:center;color:#19407a;margin:6px 0'>"
+        f"{_html.escape(str(t))}</h3>{_svg(c, marks.get(t))}</div>"
+        for t, c in curves.items()
+    )
+    return (f"<div style='display:flex;flex-wrap:wrap;gap:12px'>{cells}</div>"
+            f"<div class='small'>Axe horizontal : seuil d'IC (%) · bleu foncé = taux de réussite au-dessus du seuil "
+            f"· bleu clair = part du volume conservée · vert = seuil optimal retenu · pas de la courbe {CURVE_STEP} %</div>")
+
+
+# ----------------------------------------------------
+# Contrôle de parité + chrono (anciennes boucles de analyse_globale comme référence)
+# ----------------------------------------------------
+def _best_threshold_loop(subdf):
+    best_thr, best_rate, best_vol = None, 0, 0
+    total = len(subdf)
+    global_rate = subdf["won"].eq(True).mean() * 100 if "won" in subdf else np.nan
+    for thr in np.arange(60, 96, 1):
+        filt = subdf[subdf["IC"] >= thr]
+        if len(filt) < 0.15 * total:
+            continue
+        wins = filt["won"].eq(True).sum()
+        rate = (wins / len(filt) * 100) if len(filt) > 0 else 0
+        if rate >= global_rate + 0.5 and rate > best_rate:
+            best_rate, best_thr, best_vol = rate, thr, len(filt)
+    if best_thr is None and total > 0:
+        best_thr, best_rate, best_vol = 70, global_rate, total
+    return best_thr, best_rate, best_vol
+
+
+def _find_optimal_threshold_loop(df, col_proba, col_result):
+    best_thr, best_rate = 50, 0.0
+    for t in range(50, 100):
+        subset = df[df[col_proba] >= t]
+        if len(subset) < 10:
+            continue
+        rate = subset[col_result].mean() * 100
+        if rate > best_rate:
+            best_rate, best_thr = rate, t
+    return best_thr
+
+
+def _curve_thresholds(df):
+    out = {}
+    for t, g in df.groupby("Type"):
+        curve = threshold_curve(g["IC"], g["won"])
+        out[t] = (best_threshold(curve, len(g), g["won"].eq(True).mean() * 100), find_optimal_threshold(curve))
+    return out
+
+
+def _loop_thresholds(df):
+    return {t: (_best_threshold_loop(g), _find_optimal_threshold_loop(g, "IC", "won")) for t, g in df.groupby("Type")}
+
+
+def parity_check(scale=100):
+    from signal_eval import _history_frame, evaluate_won
+    hist = _history_frame().rename(columns={"proba": "IC"})
+    hist["won"] = evaluate_won(hist)
+    rng = np.random.default_rng(0)
+    noisy = hist.assign(IC=(hist["IC"] + rng.integers(-40, 6, len(hist))).clip(0, 100))   # autres formes de courbe
+
+    ok = True
+    for name, df in (("rapports", hist), ("IC décalés", noisy)):
+        ref, new = _loop_thresholds(df), _curve_thresholds(df)
+        bad = {t: (ref[t], new.get(t)) for t in ref if ref[t] != new.get(t)}
+        ok &= not bad
+        print(f"{name:<12} {len(df):>7} lignes | {len(ref)} types | écarts : {len(bad)}")
+        for t, (r, v) in bad.items():
+            print(f"  ❌ {t} : boucles={r} courbe={v}")
+
+    big = pd.concat([hist] * scale, ignore_index=True)
+    t0 = time.perf_counter()
+    _loop_thresholds(big)
+    t1 = time.perf_counter()
+    _curve_thresholds(big)
+    t2 = time.perf_counter()
+    n_pts = len(threshold_grid(*CURVE_RANGE, CURVE_STEP))
+    print(f"historique ×{scale} ({len(big)} lignes) : boucles {t1 - t0:.2f}s | courbe ({n_pts} seuils) "
+          f"{t2 - t1:.3f}s | ×{(t1 - t0) / max(t2 - t1, 1e-9):.0f}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if parity_check(int(sys.argv[1]) if len(sys.argv) > 1 else 100) else 1)
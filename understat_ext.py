@@ -1,38 +1,177 @@
 # =====================================================
 # understat_ext.py — module d’intégration Understat (v2025 corrigé)
 # =====================================================
-import os, json, time, requests
-from bs4 import BeautifulSoup
+import os, atexit, threading
 from team_name_map import map_understat_name
+from http_client import understat_get
+from understat_parse import extract_var
+from cache_store import CACHE
+from metrics import METRICS
 
 CACHE_FILE = os.path.join(os.path.dirname(__file__), "cache_understat.json")
-BASE_URL = "https://understat.com/team"
+UNDERSTAT_BASE = os.getenv("UNDERSTAT_BASE", "https://understat.com").rstrip("/")   # surchargeable (serveur de bench)
+BASE_URL = f"{UNDERSTAT_BASE}/team"
 
 # -----------------------
-# Cache local
+# Cache local (SQLite, namespace "understat") — écriture différée
 # -----------------------
-if os.path.exists(CACHE_FILE):
-    try:
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            CACHE = json.load(f)
-    except Exception:
-        CACHE = {}
-else:
-    CACHE = {}
-
-def _save_cache():
-    try:
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(CACHE, f, indent=2, ensure_ascii=False)
-    except Exception:
-        pass
+# Les résultats sont d'abord gardés en mémoire puis écrits par lots (une transaction) :
+#   - dès UNDERSTAT_FLUSH_BATCH entrées en attente,
+#   - toutes les UNDERSTAT_FLUSH_SECONDS secondes (timer),
+#   - et en fin de run (atexit).
+UNDERSTAT_FLUSH_SECONDS = float(os.getenv("UNDERSTAT_FLUSH_SECONDS", "30"))
+UNDERSTAT_FLUSH_BATCH = int(os.getenv("UNDERSTAT_FLUSH_BATCH", "50"))
+
+_PENDING = {}
+_PENDING_LOCK = threading.Lock()
+_FLUSH_TIMER = None
+_IMPORTED = False
+
+def _ensure_imported():
+    """Import unique de l'ancien cache_understat.json, au 1er accès (pas à l'import du module)."""
+    global _IMPORTED
+    if _IMPORTED:
+        return
+    with _PENDING_LOCK:
+        if not _IMPORTED:
+            CACHE.import_json_file("understat", CACHE_FILE)
+            _IMPORTED = True
+
+def flush_cache():
+    """Écrit les entrées en attente dans le store (atomique : une transaction)."""
+    global _FLUSH_TIMER
+    with _PENDING_LOCK:
+        batch = list(_PENDING.items())
+        _PENDING.clear()
+        if _FLUSH_TIMER is not None:
+            _FLUSH_TIMER.cancel()
+            _FLUSH_TIMER = None
+    if batch:
+        CACHE.set_many("understat", batch)
+
+def _cache_lookup(key):
+    with _PENDING_LOCK:
+        if key in _PENDING:
+            return _PENDING[key]
+    _ensure_imported()
+    return CACHE.get("understat", key)
+
+def _save_cache(key, data):
+    global _FLUSH_TIMER
+    with _PENDING_LOCK:
+        _PENDING[key] = data
+        full = len(_PENDING) >= UNDERSTAT_FLUSH_BATCH
+        if not full and _FLUSH_TIMER is None:
+            _FLUSH_TIMER = threading.Timer(UNDERSTAT_FLUSH_SECONDS, flush_cache)
+            _FLUSH_TIMER.daemon = True
+            _FLUSH_TIMER.start()
+    if full:
+        flush_cache()
+
+atexit.register(flush_cache)
+
+# -----------------------
+# Calcul des splits xG depuis une liste de matchs Understat
+# -----------------------
+def _splits_from_matches(matches, team_name):
+    """matches : format Understat {"h": {"title"}, "a": {"title"}, "xG": {"h", "a"}}."""
+    home_games = [m for m in matches if m["h"]["title"] == team_name]
+    away_games = [m for m in matches if m["a"]["title"] == team_name]
+    all_games = matches
+
+    def avg(v):
+        return sum(v) / len(v) if v else 0
+
+    xg_home = avg([float(m["xG"]["h"]) for m in home_games if m["xG"]["h"]])
+    xga_home = avg([float(m["xG"]["a"]) for m in home_games if m["xG"]["a"]])
+    xg_away = avg([float(m["xG"]["a"]) for m in away_games if m["xG"]["a"]])
+    xga_away = avg([float(m["xG"]["h"]) for m in away_games if m["xG"]["h"]])
+    xg_overall = avg([float(m["xG"]["h"]) + float(m["xG"]["a"]) for m in all_games]) / 2
+    xga_overall = xg_overall  # symétrique en moyenne
+
+    return {
+        "xg_home": xg_home,
+        "xga_home": xga_home,
+        "xg_away": xg_away,
+        "xga_away": xga_away,
+        "xg_overall": xg_overall,
+        "xga_overall": xga_overall,
+    }
+
+# -----------------------
+# Chargement par ligue (Top 5) : 1 page = toutes les équipes
+# -----------------------
+LEAGUE_URL = f"{UNDERSTAT_BASE}/league"
+LEAGUE_TTL = 86400  # une page par ligue/saison et par jour
+
+# (pays, ligue API-Football) → slug Understat
+UNDERSTAT_LEAGUES = {
+    ("England", "Premier League"): "EPL",
+    ("Spain", "La Liga"): "La_liga",
+    ("Germany", "Bundesliga"): "Bundesliga",
+    ("Italy", "Serie A"): "Serie_A",
+    ("France", "Ligue 1"): "Ligue_1",
+}
+
+LEAGUE_SPLITS = {}         # (slug, season) -> {team_title: splits}
+_LEAGUE_LOCKS = {}
+
+def understat_league_slug(league_name, country=None):
+    if not league_name:
+        return None
+    if country:
+        return UNDERSTAT_LEAGUES.get((country, league_name))
+    for (_, name), slug in UNDERSTAT_LEAGUES.items():
+        if name == league_name:
+            return slug
+    return None
+
+def _fetch_league_splits(slug, season):
+    """Télécharge la page ligue et calcule les splits de chaque équipe (matchs joués)."""
+    url = f"{LEAGUE_URL}/{slug}/{season}"
+    with METRICS.timer("understat_fetch_s", kind="league"):
+        r = understat_get(url, timeout=15)
+    r.raise_for_status()
+    dates = extract_var(r.content, "datesData")
+    played = [m for m in dates if m.get("isResult")]
+
+    by_team = {}
+    for m in played:
+        by_team.setdefault(m["h"]["title"], []).append(m)
+        by_team.setdefault(m["a"]["title"], []).append(m)
+    splits = {team: _splits_from_matches(ms, team) for team, ms in by_team.items()}
+    print(f"[✅ Understat ligue] {slug} ({season}) → {len(splits)} équipes")
+    return splits
+
+def get_league_splits(slug, season):
+    """{team_title: splits} pour une ligue Understat (mémoire → SQLite 24h → 1 requête)."""
+    key = (slug, season)
+    if key in LEAGUE_SPLITS:
+        return LEAGUE_SPLITS[key]
+    with _PENDING_LOCK:
+        lock = _LEAGUE_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        if key in LEAGUE_SPLITS:
+            return LEAGUE_SPLITS[key]
+        cache_key = f"league:{slug}:{season}"
+        splits = CACHE.get("understat", cache_key)
+        if splits is None:
+            try:
+                splits = _fetch_league_splits(slug, season)
+                CACHE.set("understat", cache_key, splits, ttl=LEAGUE_TTL)
+            except Exception as e:
+                print(f"[⚠️] Understat ligue {slug} ({season}) : {e}")
+                splits = {}
+        LEAGUE_SPLITS[key] = splits
+        return splits
 
 # -----------------------
 # Lecture xG d’une équipe
 # -----------------------
-def get_team_splits(team_name, season):
+def get_team_splits(team_name, season, league_name=None, country=None):
     """
     Retourne un dict contenant les xG moyens Home/Away/Overall pour une équipe Understat.
+    Top 5 ligues (league_name/country connus) : lus dans la page ligue, sans requête par équipe.
     Si indisponible, renvoie un fallback neutre (pas d’erreur).
     """
     if not team_name:
@@ -40,32 +179,32 @@ def get_team_splits(team_name, season):
 
     # mapping nom
     team_name = map_understat_name(team_name)
+
+    slug = understat_league_slug(league_name, country)
+    if slug:
+        data = get_league_splits(slug, season).get(team_name)
+        if data is not None:
+            METRICS.inc("understat_lookups", source="league")
+            return data
     key = f"{team_name}_{season}"
 
     # --- Vérifie le cache ---
-    if key in CACHE:
-        try:
-            globals()["STATS"]["n_understat"] = globals().get("STATS", {}).get("n_understat", 0) + 1
-        except Exception:
-            pass
-        return CACHE[key]
+    cached = _cache_lookup(key)
+    if cached is not None:
+        METRICS.inc("understat_lookups", source="cache")
+        return cached
 
     # --- Requête Understat ---
     url = f"{BASE_URL}/{team_name.replace(' ', '%20')}/{season}"
-    headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-        time.sleep(0.2)
+        with METRICS.timer("understat_fetch_s", kind="team"):
+            r = understat_get(url, timeout=10)
 
         if r.status_code == 404:
             print(f"[ℹ️] Understat: no data for {team_name} – using fallback.")
             data = _fallback(team_name)
-            CACHE[key] = data
-            _save_cache()
-            try:
-                globals()["STATS"]["n_understat"] = globals().get("STATS", {}).get("n_understat", 0) + 1
-            except Exception:
-                pass
+            _save_cache(key, data)
+            METRICS.inc("understat_lookups", source="not_found")
             return data
 
         r.raise_for_status()
@@ -73,58 +212,22 @@ def get_team_splits(team_name, season):
     except Exception as e:
         print(f"[⚠️] Understat error {team_name}: {e}")
         data = _fallback(team_name)
-        CACHE[key] = data
-        _save_cache()
-        try:
-            globals()["STATS"]["n_understat"] = globals().get("STATS", {}).get("n_understat", 0) + 1
-        except Exception:
-            pass
+        _save_cache(key, data)
+        METRICS.inc("understat_lookups", source="error")
         return data
 
     # --- Extraction ---
     try:
-        soup = BeautifulSoup(r.text, "html.parser")
-        scripts = soup.find_all("script")
-        target = [s for s in scripts if "matchesData" in s.text]
-        if not target:
-            raise ValueError("matchesData introuvable.")
-
-        js = target[0].string
-        js = js[js.index("matchesData") + 13 : js.index("];") + 1]
-        matches = json.loads(js)
+        # matchesData contient aussi les matchs à venir (xG null) : on ne garde que les joués
+        matches = [m for m in extract_var(r.content, "matchesData") if m.get("isResult", True)]
         if not matches:
             raise ValueError("Aucun match Understat.")
 
-        home_games = [m for m in matches if m["h"]["title"] == team_name]
-        away_games = [m for m in matches if m["a"]["title"] == team_name]
-        all_games = matches
-
-        def avg(v):
-            return sum(v) / len(v) if v else 0
-
-        xg_home = avg([float(m["xG"]["h"]) for m in home_games if m["xG"]["h"]])
-        xga_home = avg([float(m["xG"]["a"]) for m in home_games if m["xG"]["a"]])
-        xg_away = avg([float(m["xG"]["a"]) for m in away_games if m["xG"]["a"]])
-        xga_away = avg([float(m["xG"]["h"]) for m in away_games if m["xG"]["h"]])
-        xg_overall = avg([float(m["xG"]["h"]) + float(m["xG"]["a"]) for m in all_games]) / 2
-        xga_overall = xg_overall  # symétrique en moyenne
-
-        data = {
-            "xg_home": xg_home,
-            "xga_home": xga_home,
-            "xg_away": xg_away,
-            "xga_away": xga_away,
-            "xg_overall": xg_overall,
-            "xga_overall": xga_overall,
-        }
-
-        CACHE[key] = data
-        _save_cache()
-
-        try:
-            globals()["STATS"]["n_understat"] = globals().get("STATS", {}).get("n_understat", 0) + 1
-        except Exception:
-            pass
+        data = _splits_from_matches(matches, team_name)
+
+        _save_cache(key, data)
+
+        METRICS.inc("understat_lookups", source="fetched")
 
         print(f"[✅ Understat] {team_name} ({season}) → {data}")
         return data
@@ -132,12 +235,8 @@ def get_team_splits(team_name, season):
     except Exception as e:
         print(f"[⚠️] Understat parse error {team_name}: {e}")
         data = _fallback(team_name)
-        CACHE[key] = data
-        _save_cache()
-        try:
-            globals()["STATS"]["n_understat"] = globals().get("STATS", {}).get("n_understat", 0) + 1
-        except Exception:
-            pass
+        _save_cache(key, data)
+        METRICS.inc("understat_lookups", source="parse_error")
         return data
 
 # -----------------------
@@ -0,0 +1,52 @@
+# ================================
+# understat_parse.py — FootBot PRO
+# Extraction directe des JSON Understat (sans BeautifulSoup)
+# ================================
+import re
+import json
+import codecs
+
+# Les pages Understat embarquent :  var matchesData = JSON.parse('\x5B\x7B...');
+KNOWN_VARS = ("matchesData", "teamsData", "playersData", "datesData")
+
+_VAR_RE = re.compile(rb"var\s+(\w+)\s*=\s*JSON\.parse\('(.*?)'\)", re.S)
+_HEX_RE = re.compile(rb"\\x([0-9A-Fa-f]{2})")
+
+
+def _unhex(m):
+    return bytes((int(m.group(1), 16),))
+
+
+def decode_payload(payload: bytes):
+    """Chaîne JSON.parse('...') échappée en \\xNN → objet Python."""
+    try:
+        raw = codecs.escape_decode(payload)[0]   # décodeur C (\xNN, \', \\)
+    except Exception:
+        raw = _HEX_RE.sub(_unhex, payload)
+    return json.loads(raw.decode("utf-8"))
+
+
+def extract_vars(page, names=KNOWN_VARS):
+    """
+    Parcourt les octets bruts de la page et renvoie {nom: objet} pour les
+    variables demandées (les autres payloads ne sont pas décodés).
+    """
+    if isinstance(page, str):
+        page = page.encode("utf-8")
+    wanted = set(names)
+    out = {}
+    for m in _VAR_RE.finditer(page):
+        name = m.group(1).decode("ascii", "ignore")
+        if name in wanted and name not in out:
+            out[name] = decode_payload(m.group(2))
+            if len(out) == len(wanted):
+                break
+    return out
+
+
+def extract_var(page, name):
+    """Un seul payload ; lève ValueError s'il est absent."""
+    data = extract_vars(page, (name,))
+    if name not in data:
+        raise ValueError(f"{name} introuvable.")
+    return data[name]
@@ -1,7 +1,8 @@
-import math, os, json, hashlib
+import math, os, re, json, hashlib, threading
 from datetime import datetime, timedelta
-from scipy.stats import poisson
 from config import CACHE_TTL_DAYS
+from cache_store import CACHE, NAMESPACE_TTL
+from poisson_math import poisson_over as _poisson_over
 
 # --- maths ---
 def logistic(x):
@@ -16,27 +17,79 @@ def normalize_implied_probs(c_home, c_draw, c_away):
     return pH/s, pD/s, pA/s
 
 def poisson_over(lambda_total, line):
-    return 1 - poisson.cdf(math.floor(line), lambda_total)
+    return _poisson_over(lambda_total, line)  # poisson_math : pas de scipy au démarrage
 
-# --- cache fichiers ---
-CACHE_DIR = os.path.join(os.getcwd(), "cache")
-os.makedirs(CACHE_DIR, exist_ok=True)
+# --- cache (SQLite, cf. cache_store.py) ---
+# Clés "namespace:reste" → namespace SQLite (TTL propre) ; sans préfixe → "default".
+# Les anciens fichiers cache/<sha1>.json sont importés en une fois (namespace LEGACY_NS, par sha1
+# de la clé : la clé d'origine n'est pas dans le fichier) ; chaque entrée rejoint son vrai namespace
+# à la 1re lecture de sa clé. Les fichiers (suivis par git) restent en place : un marqueur dans
+# `meta` évite de les réimporter.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv("FOOTBOT_LEGACY_CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+LEGACY_NS = "legacy_json"
+_LEGACY_NAME = re.compile(r"^[0-9a-f]{40}\.json$")
+_legacy_lock = threading.Lock()
+_legacy_done = False
 
-def _cache_path(key: str):
-    h = hashlib.sha1(key.encode()).hexdigest()
-    return os.path.join(CACHE_DIR, f"{h}.json")
+def _cache_hash(key: str):
+    return hashlib.sha1(key.encode()).hexdigest()
 
-def cache_get(key: str):
-    path = _cache_path(key)
-    if not os.path.exists(path):
+def _cache_ns(key: str):
+    ns, sep, _ = key.partition(":")
+    return ns if sep and ns in NAMESPACE_TTL else "default"
+
+def migrate_legacy_cache(cache_dir=CACHE_DIR):
+    """Importe une seule fois tous les cache/<sha1>.json dans LEGACY_NS (avec leur date), sans les supprimer."""
+    marker = f"imported:{LEGACY_NS}:{os.path.abspath(cache_dir)}"
+    if CACHE.marked(marker):
+        return 0
+    try:
+        names = [n for n in os.listdir(cache_dir) if _LEGACY_NAME.match(n)]
+    except OSError:
+        return 0
+    items = []
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            with open(path, "r", encoding="utf8") as f:
+                data = json.load(f)
+            items.append((name[:-len(".json")], {"mtime": os.stat(path).st_mtime, "data": data}))
+        except (OSError, ValueError):
+            continue
+    if items:
+        CACHE.set_many(LEGACY_NS, items, ttl=None)
+        if CACHE.get(LEGACY_NS, items[-1][0]) is None:     # transaction en échec : nouvel essai au prochain run
+            return 0
+        print(f"[📦 Cache] {len(items)} ancien(s) fichier(s) cache/*.json importé(s) → {LEGACY_NS}")
+    CACHE.mark(marker)
+    return len(items)
+
+def _legacy_cache_get(key: str, max_age_days):
+    global _legacy_done
+    if not _legacy_done:
+        with _legacy_lock:
+            if not _legacy_done:
+                migrate_legacy_cache()
+                _legacy_done = True
+    h = _cache_hash(key)
+    entry = CACHE.get(LEGACY_NS, h)
+    if entry is None:
         return None
-    mtime = datetime.fromtimestamp(os.stat(path).st_mtime)
-    if datetime.now() - mtime > timedelta(days=CACHE_TTL_DAYS):
+    mtime = datetime.fromtimestamp(entry["mtime"])
+    if max_age_days is not None and datetime.now() - mtime > timedelta(days=max_age_days):
         return None
-    with open(path, "r", encoding="utf8") as f:
-        return json.load(f)
+    CACHE.set(_cache_ns(key), key, entry["data"], created=entry["mtime"])   # garde l'âge du fichier
+    CACHE.delete(LEGACY_NS, h)
+    return entry["data"]
+
+def cache_get(key: str, max_age_days=CACHE_TTL_DAYS):
+    """max_age_days=None → entrée sans expiration (données immuables)."""
+    max_age = None if max_age_days is None else max_age_days * 86400.0
+    data = CACHE.get(_cache_ns(key), key, max_age=max_age)
+    if data is None:
+        data = _legacy_cache_get(key, max_age_days)
+    return data
 
 def cache_set(key: str, data):
-    path = _cache_path(key)
-    with open(path, "w", encoding="utf8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    CACHE.set(_cache_ns(key), key, data)